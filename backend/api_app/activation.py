@@ -0,0 +1,116 @@
+"""
+Wydawanie i weryfikacja tokenów aktywacji konta.
+
+Przy wydaniu tokenu w cache zapisywany jest zwarty wpis `"<czas wydania>:<skrót tokenu>"`
+pod kluczem zależnym od id użytkownika. Wpis służy tylko do szybkiego odrzucenia:
+tokeny zastąpione nowszym lub przeterminowane są odrzucane bez zapytania do bazy.
+O ważności tokenu rozstrzyga default_token_generator (zależny od stanu konta), więc
+brak wpisu – inny worker bez współdzielonego cache, restart, wyparcie z cache –
+nie unieważnia poprawnego linku: użytkownik jest wtedy ładowany z bazy jak zwykle
+(dokładnie raz), a przeterminowanie rozpoznawane po znaczniku czasu w tokenie.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.http import base36_to_int
+
+ACTIVATED = 'activated'
+ALREADY_ACTIVE = 'already_active'
+EXPIRED = 'expired'
+INVALID = 'invalid'
+UNKNOWN_USER = 'unknown_user'
+
+_ACTIVE_MARKER = 'active'
+
+
+def _cache_key(uid):
+    return f'activation_{uid}'
+
+
+def _digest(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()[:32]
+
+
+def issue_activation_token(user):
+    """
+    Generuje token aktywacyjny dla użytkownika i zapisuje jego metadane w cache.
+
+    Wpis żyje dwa razy dłużej niż token, aby po jego wygaśnięciu można było
+    zwrócić komunikat "Token wygasł." zamiast "Nieprawidłowy token.".
+    Nowy token zastępuje poprzedni.
+    """
+    token = default_token_generator.make_token(user)
+    entry = f'{int(time.time())}:{_digest(token)}'
+    cache.set(_cache_key(user.pk), entry, timeout=2 * settings.PASSWORD_RESET_TIMEOUT)
+    return token
+
+
+def _token_age(token):
+    """
+    Wiek tokenu w sekundach ze znacznika czasu przed "-" (base36, jak w
+    PasswordResetTokenGenerator) albo None dla tokenu w złym formacie.
+    """
+    try:
+        timestamp, _hash = str(token).split('-', 1)
+        issued = base36_to_int(timestamp)
+    except ValueError:
+        return None
+    generator = default_token_generator
+    return generator._num_seconds(generator._now()) - issued
+
+
+def activation_link(user):
+    """Wydaje nowy token i zwraca link aktywacyjny do frontendu."""
+    token = issue_activation_token(user)
+    return f"{settings.FRONTEND_URL}/activate?uid={user.pk}&token={token}"
+
+
+def activate_account(uid, token):
+    """
+    Weryfikuje token i aktywuje konto.
+
+    Zwraca jedną ze stałych: ACTIVATED, ALREADY_ACTIVE, EXPIRED, INVALID, UNKNOWN_USER.
+    """
+    try:
+        uid = int(uid)
+    except (TypeError, ValueError):
+        return INVALID
+
+    entry = cache.get(_cache_key(uid))
+    if entry == _ACTIVE_MARKER:
+        return ALREADY_ACTIVE
+    if entry is not None:
+        issued_at, digest = entry.split(':', 1)
+        if not constant_time_compare(digest, _digest(str(token))):
+            return INVALID
+        if time.time() - int(issued_at) > settings.PASSWORD_RESET_TIMEOUT:
+            return EXPIRED
+
+    user = User.objects.filter(pk=uid).first()
+    if user is None:
+        cache.delete(_cache_key(uid))
+        return UNKNOWN_USER
+    if user.is_active:
+        cache.set(_cache_key(uid), _ACTIVE_MARKER, timeout=settings.PASSWORD_RESET_TIMEOUT)
+        return ALREADY_ACTIVE
+    if entry is None:
+        # Bez wpisu w cache wiek tokenu bierzemy z jego znacznika czasu – przeterminowany
+        # link ma dostać "Token wygasł.", a nie "Nieprawidłowy token.".
+        age = _token_age(token)
+        if age is None:
+            return INVALID
+        if age > settings.PASSWORD_RESET_TIMEOUT:
+            return EXPIRED
+    if not default_token_generator.check_token(user, token):
+        return INVALID
+
+    user.is_active = True
+    user.save(update_fields=['is_active'])
+    cache.set(_cache_key(uid), _ACTIVE_MARKER, timeout=settings.PASSWORD_RESET_TIMEOUT)
+    return ACTIVATED
@@ -0,0 +1,75 @@
+"""
+Analiza wydatków użytkownika (/api/expenses/analytics/).
+
+Obliczenia (NumPy) są w api_app.expense_stats; ten moduł trzyma wynik w cache
+pod kluczem z wersją danych użytkownika. Sygnały zapisu i usunięcia wydatku
+zmieniają wersję (po zatwierdzeniu transakcji), więc wynik obowiązuje do
+najbliższego zapisu wydatku.
+
+Wersja jest widoczna dla wszystkich workerów tylko we współdzielonym cache (Redis).
+Przy cache w pamięci procesu zmiana wersji dociera wyłącznie do workera, który
+zapisał wydatek, więc wynik jest tam trzymany najwyżej
+EXPENSE_ANALYTICS_LOCAL_CACHE_TTL sekund zamiast EXPENSE_ANALYTICS_CACHE_TTL.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .catalogue import get_category_catalogue
+from .checks import cache_is_process_local
+
+ANALYTICS_VERSION_CACHE_KEY = 'expense_analytics_version:{}'
+ANALYTICS_CACHE_KEY = 'expense_analytics:{}:{}:{}'
+
+
+def _data_version(user_id):
+    key = ANALYTICS_VERSION_CACHE_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Wersja z zegara, a nie licznik od zera – po wypadnięciu klucza z cache
+        # stare wyniki nie mogą znów stać się aktualne.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _result_ttl():
+    if cache_is_process_local():
+        return settings.EXPENSE_ANALYTICS_LOCAL_CACHE_TTL
+    return settings.EXPENSE_ANALYTICS_CACHE_TTL
+
+
+def get_expense_analytics(user):
+    """Zwraca analizę wydatków użytkownika z cache albo liczy ją od nowa."""
+    today = timezone.localdate()
+    # Wersja jest odczytywana przed danymi: zapis w trakcie liczenia zmieni wersję,
+    # więc nieaktualny wynik trafi pod klucz, którego nikt już nie przeczyta.
+    key = ANALYTICS_CACHE_KEY.format(user.pk, _data_version(user.pk), today)
+    result = cache.get(key)
+    if result is None:
+        # Import na żądanie – moduł jest ładowany przez sygnały przy starcie,
+        # a NumPy wydłużyłby zimny start każdego workera.
+        from .expense_stats import analyse, expense_columns
+
+        names = {category['id']: category['name'] for category in get_category_catalogue()}
+        result = analyse(expense_columns(user), today, names)
+        # Data w kluczu – wynik zależy od dnia (średnie, prognoza); stary wygasa sam.
+        cache.set(key, result, timeout=_result_ttl())
+    return result
+
+
+def invalidate_expense_analytics(*user_ids, using):
+    """Zmienia wersję danych użytkowników po zatwierdzeniu transakcji w bazie `using`."""
+    if not user_ids:
+        return
+    transaction.on_commit(
+        lambda: cache.set_many(
+            {ANALYTICS_VERSION_CACHE_KEY.format(user_id): time.time_ns() for user_id in user_ids},
+            timeout=None,
+        ),
+        using=using,
+    )
@@ -6,4 +6,5 @@ class ApiAppConfig(AppConfig):
     name = 'api_app'
 
     def ready(self):
+        import api_app.checks
         import api_app.signals
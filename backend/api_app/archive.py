@@ -0,0 +1,129 @@
+"""
+Archiwum wydatków.
+
+Tabela Expense trzyma tylko "gorące" dane z ostatnich EXPENSE_ARCHIVE_MONTHS miesięcy.
+Starsze wiersze przenosi partiami polecenie `archive_expenses` do ArchivedExpense,
+aktualizując jednocześnie sumy w MonthlyExpenseTotal. Widoki czytają oba poziomy
+przez funkcje z tego modułu, więc archiwizacja jest dla API przezroczysta.
+"""
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import events
+from .models import ArchivedExpense, Expense, MonthlyExpenseTotal
+
+
+def add_months(day, months):
+    """Zwraca pierwszy dzień miesiąca przesuniętego o `months` względem `day`."""
+    year, month = divmod(day.year * 12 + day.month - 1 + months, 12)
+    return date(year, month + 1, 1)
+
+
+def archive_cutoff(months=None, today=None):
+    """Zwraca datę, przed którą wydatki są archiwizowane (pierwszy dzień miesiąca)."""
+    months = settings.EXPENSE_ARCHIVE_MONTHS if months is None else months
+    return add_months(today or timezone.localdate(), -max(1, months))
+
+
+def archive_batch(alias, cutoff, batch_size=1000):
+    """
+    Archiwizuje w bazie `alias` jedną partię wydatków sprzed `cutoff`.
+
+    Kopia do archiwum, aktualizacja sum miesięcznych i usunięcie z Expense dzieją
+    się w jednej transakcji, więc przerwana archiwizacja niczego nie dubluje.
+    Zwraca liczbę zarchiwizowanych wydatków (0 – nie ma już czego archiwizować).
+    """
+    with transaction.atomic(using=alias):
+        rows = list(
+            Expense._base_manager.using(alias)
+            .select_for_update()
+            .filter(date__lt=cutoff)
+            .order_by('pk')
+            .values('id', 'user_id', 'category_id', 'amount', 'date')[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        ArchivedExpense.objects.using(alias).bulk_create(
+            [ArchivedExpense(**row) for row in rows],
+            ignore_conflicts=True,
+        )
+        totals = defaultdict(lambda: [Decimal('0'), 0])
+        for row in rows:
+            key = (row['user_id'], row['category_id'], row['date'].replace(day=1))
+            totals[key][0] += row['amount']
+            totals[key][1] += 1
+        for (user_id, category_id, month), (total, count) in totals.items():
+            # Po usunięciu kategorii może istnieć kilka sum z category=NULL – aktualizujemy jedną.
+            existing = MonthlyExpenseTotal.objects.using(alias).filter(
+                user_id=user_id, category_id=category_id, month=month
+            ).values_list('pk', flat=True).first()
+            if existing:
+                MonthlyExpenseTotal.objects.using(alias).filter(pk=existing).update(
+                    total=F('total') + total, count=F('count') + count
+                )
+            else:
+                MonthlyExpenseTotal.objects.using(alias).create(
+                    user_id=user_id, category_id=category_id, month=month, total=total, count=count
+                )
+        # Wydatek trafia do archiwum, a nie znika – bez zdarzeń `deleted` w strumieniu zmian.
+        with events.muted():
+            Expense._base_manager.using(alias).filter(pk__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+def category_totals(user, start, end, category_ids=None):
+    """
+    Zwraca słownik {id_kategorii: suma} wydatków użytkownika w zakresie dat;
+    z `category_ids` – tylko dla podanych kategorii (np. poddrzewa, api_app.category_tree).
+
+    Dane gorące są sumowane z Expense, a zarchiwizowane miesiące pochodzą z sum
+    miesięcznych (z dokładnością do miesiąca). Bieżący miesiąc nigdy nie jest
+    archiwizowany, więc podsumowanie bieżącego miesiąca nie czyta archiwum.
+    """
+    scope = {} if category_ids is None else {'category_id__in': category_ids}
+    totals = defaultdict(Decimal)
+    hot = (
+        Expense.objects.for_user(user)
+        .filter(date__range=[start, end], **scope)
+        .values('category_id')
+        .annotate(total=Sum('amount'))
+    )
+    for row in hot:
+        totals[row['category_id']] += row['total']
+
+    if start < timezone.localdate().replace(day=1):
+        archived = (
+            MonthlyExpenseTotal.objects.for_user(user)
+            .filter(month__gte=start.replace(day=1), month__lte=end, **scope)
+            .values('category_id')
+            .annotate(total=Sum('total'))
+        )
+        for row in archived:
+            totals[row['category_id']] += row['total']
+    return dict(totals)
+
+
+def get_archived_expense(user, pk):
+    return ArchivedExpense.objects.for_user(user).filter(pk=pk).first()
+
+
+def delete_archived_expense(expense):
+    """Usuwa zarchiwizowany wydatek i odejmuje go od sumy miesięcznej."""
+    alias = expense._state.db
+    with transaction.atomic(using=alias):
+        totals = MonthlyExpenseTotal.objects.using(alias).filter(
+            user_id=expense.user_id, category_id=expense.category_id, month=expense.date.replace(day=1)
+        )
+        existing = totals.filter(count__gt=0).values_list('pk', flat=True).first()
+        if existing:
+            totals.filter(pk=existing).update(total=F('total') - expense.amount, count=F('count') - 1)
+        totals.filter(count=0).delete()
+        expense.delete()
@@ -0,0 +1,160 @@
+"""
+Dziennik działań moderatorów (ModeratorAuditEvent).
+
+Zapis wiersza przy każdym żądaniu moderatora wydłużałby odpowiedź, więc widoki
+tylko dopisują zdarzenie do bufora w pamięci procesu (AuditBuffer.record – bez
+zapytań SQL). Wątek w tle zapisuje bufor partiami jednym bulk_create: gdy uzbiera
+się AUDIT_BATCH_SIZE zdarzeń albo co AUDIT_FLUSH_INTERVAL sekund; resztę zapisuje
+flush() przy zamykaniu procesu (atexit – także w workerach gunicorna i uvicorna).
+
+Bufor mieści najwyżej AUDIT_BUFFER_SIZE zdarzeń. Gdy baza nie przyjmuje zapisów,
+nieudana partia wraca do bufora, a po jego zapełnieniu nowe zdarzenia są pomijane
+(z ostrzeżeniem w logu) – awaria bazy nie zwiększa zużycia pamięci bez końca.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+
+from .models import ModeratorAuditEvent
+
+logger = logging.getLogger(__name__)
+
+
+class AuditBuffer:
+    """
+    Ograniczony bufor zdarzeń z wątkiem zapisującym je partiami.
+
+    Z `background=False` wątek nie powstaje – bufor zapisuje tylko flush() (benchmarki).
+    """
+
+    def __init__(self, background=True):
+        self.background = background
+        self._events = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.dropped = 0
+
+    def record(self, event):
+        """Dodaje niezapisane zdarzenie do bufora; zwraca False, gdy bufor jest pełny."""
+        with self._lock:
+            self._ensure_worker()
+            if len(self._events) >= settings.AUDIT_BUFFER_SIZE:
+                self.dropped += 1
+                return False
+            self._events.append(event)
+            full = len(self._events) >= settings.AUDIT_BATCH_SIZE
+        if full:
+            self._wake.set()
+        return True
+
+    def pending(self):
+        return len(self._events)
+
+    def flush(self):
+        """
+        Zapisuje wszystkie zdarzenia z bufora partiami; zwraca liczbę zapisanych.
+
+        Przy błędzie bazy niezapisana partia wraca na początek bufora (w miarę
+        wolnego miejsca), a wyjątek jest przekazywany dalej.
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    size = min(settings.AUDIT_BATCH_SIZE, len(self._events))
+                    batch = [self._events.popleft() for _ in range(size)]
+                if not batch:
+                    break
+                try:
+                    ModeratorAuditEvent.objects.bulk_create(batch)
+                except DatabaseError:
+                    self._requeue(batch)
+                    raise
+                written += len(batch)
+        if self.dropped:
+            logger.warning("Dziennik audytu: pominięto %d zdarzeń (pełny bufor).", self.dropped)
+            self.dropped = 0
+        return written
+
+    def _requeue(self, batch):
+        with self._lock:
+            free = max(0, settings.AUDIT_BUFFER_SIZE - len(self._events))
+            kept = batch[:free]
+            self._events.extendleft(reversed(kept))
+            self.dropped += len(batch) - len(kept)
+
+    def _ensure_worker(self):
+        # Po fork() (np. gunicorn --preload) wątek rodzica nie istnieje w workerze.
+        if not self.background or self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._events.clear()
+        self._thread = threading.Thread(target=self._run, name='audit-log-flusher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(settings.AUDIT_FLUSH_INTERVAL)
+            self._wake.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except DatabaseError:
+                logger.exception("Dziennik audytu: nie udało się zapisać partii, ponowienie za %s s.",
+                                 settings.AUDIT_FLUSH_INTERVAL)
+
+    def shutdown(self):
+        """Zapisuje resztę bufora przy zamykaniu procesu."""
+        if self._pid != os.getpid():
+            return
+        try:
+            self.flush()
+        except DatabaseError:
+            logger.exception("Dziennik audytu: %d zdarzeń nie zapisano przy zamykaniu procesu.", self.pending())
+
+
+audit_buffer = AuditBuffer()
+atexit.register(audit_buffer.shutdown)
+
+
+def record(request, action, status_code, target_id=None, target_username=''):
+    """Dodaje do bufora zdarzenie żądania moderatora `request` (bez zapytań SQL)."""
+    if not settings.AUDIT_LOG_ENABLED or not request.user.is_authenticated:
+        return
+    audit_buffer.record(ModeratorAuditEvent(
+        actor_id=request.user.pk,
+        actor_username=request.user.get_username(),
+        action=action,
+        target_id=target_id,
+        target_username=target_username,
+        status_code=status_code,
+        ip_address=request.META.get('REMOTE_ADDR') or None,
+    ))
+
+
+class ModeratorAuditMixin:
+    """
+    Domieszka APIView zapisująca każde żądanie do dziennika działań moderatorów.
+
+    `audit_actions` mapuje metodę HTTP na akcję; widok może ustawić `self.audit_target`
+    (obiekt User), aby zachować nazwę użytkownika – np. przed jego usunięciem.
+    """
+    audit_actions = {}
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        action = self.audit_actions.get(request.method)
+        if action is not None:
+            target = getattr(self, 'audit_target', None)
+            record(request, action, response.status_code, target_id=kwargs.get('pk'),
+                   target_username=target.get_username() if target is not None else '')
+        return response
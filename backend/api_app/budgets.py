@@ -0,0 +1,244 @@
+"""
+Miesięczne limity wydatków w kategoriach (CategoryBudget).
+
+Zamiast liczyć SUM() wydatków przy każdym zapisie, widoki przekazują tu zmianę
+wydatku (przed/po), a moduł przesuwa o różnicę bieżącą sumę w MonthlyCategorySpend
+– odczyt limitu, jedno UPDATE i jeden odczyt sumy na zapis w kategorii z limitem. Suma powstaje
+leniwie (SUM() raz na użytkownika, kategorię i miesiąc) przy pierwszym zapisie
+w bieżącym miesiącu; w poprzednich miesiącach aktualizowane są tylko istniejące sumy.
+
+Przekroczenie progu z CATEGORY_BUDGET_THRESHOLDS (w bieżącym miesiącu) dodaje wpis
+do kolejki BudgetAlert w tej samej transakcji co zapis wydatku – powiadomienia
+wysyła polecenie `send_budget_alerts`, a nie żądanie użytkownika. Zgodność sum
+z wydatkami sprawdza (i naprawia) polecenie `reconcile_category_spend`.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .archive import add_months
+from .models import ArchivedExpense, BudgetAlert, CategoryBudget, Expense, MonthlyCategorySpend
+
+def get_user_budgets(user_id, category_ids, using):
+    """
+    Zwraca limity użytkownika w podanych kategoriach jako słownik {id_kategorii: limit}.
+
+    Czytane z bazy `using` w transakcji zapisu wydatku (jedno zapytanie po indeksie
+    unikalnym (user, category)), a nie z cache – limit zmieniony przez inny proces
+    obowiązuje od razu, bez unieważniania między workerami.
+    """
+    category_ids = [category_id for category_id in category_ids if category_id is not None]
+    if not category_ids:
+        return {}
+    return dict(
+        CategoryBudget.objects.using(using)
+        .filter(user_id=user_id, category_id__in=category_ids)
+        .values_list('category_id', 'limit')
+    )
+
+
+def alert_level(total, limit):
+    """Liczba progów CATEGORY_BUDGET_THRESHOLDS (w % limitu) osiągniętych przez `total`."""
+    return sum(1 for threshold in settings.CATEGORY_BUDGET_THRESHOLDS if total * 100 >= limit * threshold)
+
+
+def expense_state(expense):
+    """Stan wydatku istotny dla limitów: (id kategorii, miesiąc, kwota)."""
+    return expense.category_id, expense.date.replace(day=1), Decimal(expense.amount)
+
+
+def record_expense_change(user_id, before, after, using):
+    """
+    Przesuwa bieżące sumy o zmianę wydatku i sprawdza progi limitów.
+
+    `before` i `after` to stany z expense_state() (None – wydatek nie istniał
+    lub został usunięty). Wywoływać w transakcji zapisu wydatku w bazie `using`.
+    """
+    deltas = defaultdict(Decimal)
+    if before is not None:
+        deltas[before[:2]] -= before[2]
+    if after is not None:
+        deltas[after[:2]] += after[2]
+    budgets = get_user_budgets(
+        user_id, {category_id for (category_id, _month), delta in deltas.items() if delta}, using
+    )
+    for (category_id, month), delta in deltas.items():
+        if delta and category_id in budgets:
+            _apply_delta(user_id, category_id, month, delta, budgets[category_id], using)
+
+
+def _current_month():
+    return timezone.localdate().replace(day=1)
+
+
+def _spend_rows(user_id, category_id, month, using):
+    return MonthlyCategorySpend.objects.using(using).filter(user_id=user_id, category_id=category_id, month=month)
+
+
+def _apply_delta(user_id, category_id, month, delta, limit, using):
+    rows = _spend_rows(user_id, category_id, month, using)
+    if not rows.update(total=F('total') + delta):
+        if month != _current_month():
+            return
+        # Pierwszy zapis w miesiącu – suma obejmuje już bieżący zapis.
+        if not _create_spend(user_id, category_id, month, using):
+            rows.update(total=F('total') + delta)
+    if month == _current_month():
+        _evaluate(rows, limit)
+
+
+def _create_spend(user_id, category_id, month, using):
+    """Tworzy bieżącą sumę z SUM() wydatków; False, jeśli utworzył ją równoległy zapis."""
+    total = month_total(user_id, category_id, month, using)
+    try:
+        with transaction.atomic(using=using):
+            MonthlyCategorySpend.objects.using(using).create(
+                user_id=user_id, category_id=category_id, month=month, total=total
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+def month_total(user_id, category_id, month, using):
+    """SUM() wydatków użytkownika w kategorii i miesiącu (bieżące i zarchiwizowane)."""
+    total = Decimal('0')
+    for model in (Expense, ArchivedExpense):
+        total += model._base_manager.using(using).filter(
+            user_id=user_id, category_id=category_id, date__gte=month, date__lt=add_months(month, 1)
+        ).aggregate(total=Sum('amount'))['total'] or 0
+    return total
+
+
+def _evaluate(rows, limit):
+    """
+    Porównuje sumę z progami limitu i przy przekroczeniu nowego progu dodaje
+    powiadomienie do kolejki.
+
+    Wiersz sumy jest już zablokowany przez UPDATE w tej transakcji, więc
+    równoległe zapisy nie powiadomią dwa razy o tym samym progu. Spadek poniżej
+    progu obniża poziom – ponowne przekroczenie znów wyśle powiadomienie.
+    """
+    spend = rows.values('pk', 'user_id', 'category_id', 'month', 'total', 'alert_level').get()
+    level = alert_level(spend['total'], limit)
+    if level == spend['alert_level']:
+        return
+    rows.filter(pk=spend['pk']).update(alert_level=level)
+    if level > spend['alert_level']:
+        BudgetAlert.objects.using(rows.db).create(
+            user_id=spend['user_id'],
+            category_id=spend['category_id'],
+            month=spend['month'],
+            threshold=settings.CATEGORY_BUDGET_THRESHOLDS[level - 1],
+            total=spend['total'],
+            limit=limit,
+        )
+
+
+def record_generated_expenses(expenses, using):
+    """
+    Dopisuje do bieżących sum wydatki wstawione przez bulk_create (np. wydatki cykliczne).
+
+    Limity wszystkich użytkowników partii są czytane jednym zapytaniem; sumy są
+    przesuwane raz na (użytkownik, kategoria, miesiąc). Wywoływać w transakcji
+    wstawiania wydatków w bazie `using`.
+    """
+    deltas = defaultdict(Decimal)
+    for expense in expenses:
+        category_id, month, amount = expense_state(expense)
+        deltas[(expense.user_id, category_id, month)] += amount
+    if not deltas:
+        return
+    budgets = {
+        (user_id, category_id): limit
+        for user_id, category_id, limit in CategoryBudget.objects.using(using)
+        .filter(user_id__in={user_id for user_id, _category_id, _month in deltas})
+        .values_list('user_id', 'category_id', 'limit')
+    }
+    for (user_id, category_id, month), delta in deltas.items():
+        if (user_id, category_id) in budgets:
+            _apply_delta(user_id, category_id, month, delta, budgets[(user_id, category_id)], using)
+
+
+def save_budget(user, category_id, limit):
+    """
+    Ustawia limit kategorii i od razu ocenia bieżący miesiąc (np. limit niższy niż wydatki).
+
+    Zwraca (limit, czy utworzono nowy).
+    """
+    budgets = CategoryBudget.objects.for_user(user)
+    with transaction.atomic(using=budgets.db):
+        budget, created = budgets.update_or_create(
+            user_id=user.pk, category_id=category_id, defaults={'limit': limit}
+        )
+        month = _current_month()
+        rows = _spend_rows(user.pk, category_id, month, budgets.db).select_for_update()
+        try:
+            _evaluate(rows, Decimal(limit))
+        except MonthlyCategorySpend.DoesNotExist:
+            if _create_spend(user.pk, category_id, month, budgets.db):
+                _evaluate(rows, Decimal(limit))
+    return budget, created
+
+
+def delete_budget(user, category_id):
+    """
+    Usuwa limit kategorii razem z jej bieżącymi sumami.
+
+    Bez limitu sumy nie są aktualizowane, więc po jego ponownym ustawieniu
+    muszą powstać od nowa z SUM().
+    """
+    budgets = CategoryBudget.objects.for_user(user)
+    with transaction.atomic(using=budgets.db):
+        deleted, _ = budgets.filter(category_id=category_id).delete()
+        MonthlyCategorySpend.objects.for_user(user).filter(category_id=category_id).delete()
+    return bool(deleted)
+
+
+def reconcile_batch(alias, after_pk, batch_size, fix=False):
+    """
+    Porównuje partię bieżących sum (pk > after_pk) z SUM() wydatków w bazie `alias`.
+
+    Zwraca (ostatni pk partii lub None, lista rozbieżności (suma, oczekiwana kwota)).
+    Z `fix` rozbieżne sumy są poprawiane; wiersze partii są wtedy blokowane przed
+    liczeniem SUM(), więc równoległy zapis wydatku dopisze swoją zmianę po naprawie.
+    """
+    with transaction.atomic(using=alias):
+        rows = MonthlyCategorySpend.objects.using(alias).filter(pk__gt=after_pk).order_by('pk')
+        if fix:
+            rows = rows.select_for_update()
+        batch = list(rows[:batch_size])
+        if not batch:
+            return None, []
+
+        expected = defaultdict(Decimal)
+        for model in (Expense, ArchivedExpense):
+            sums = (
+                model._base_manager.using(alias)
+                .filter(
+                    user_id__in={spend.user_id for spend in batch},
+                    category_id__in={spend.category_id for spend in batch},
+                    date__gte=min(spend.month for spend in batch),
+                    date__lt=add_months(max(spend.month for spend in batch), 1),
+                )
+                .annotate(month=TruncMonth('date'))
+                .values('user_id', 'category_id', 'month')
+                .annotate(total=Sum('amount'))
+            )
+            for row in sums:
+                expected[(row['user_id'], row['category_id'], row['month'])] += row['total']
+
+        mismatches = []
+        for spend in batch:
+            total = expected[(spend.user_id, spend.category_id, spend.month)]
+            if spend.total != total:
+                mismatches.append((spend, total))
+                if fix:
+                    MonthlyCategorySpend.objects.using(alias).filter(pk=spend.pk).update(total=total)
+        return batch[-1].pk, mismatches
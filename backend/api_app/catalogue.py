@@ -0,0 +1,48 @@
+from django.core.cache import cache
+
+from .category_tree import build_tree, subtree_map
+from .models import Category, CategoryClosure
+
+CATEGORY_CATALOGUE_CACHE_KEY = 'category_catalogue'
+CATEGORY_TREE_CACHE_KEY = 'category_tree'
+CATEGORY_SUBTREES_CACHE_KEY = 'category_subtrees'
+
+
+def get_category_catalogue():
+    """
+    Zwraca katalog kategorii jako listę słowników {'id', 'name', 'parent'}.
+
+    Katalog jest mały i zmienia się rzadko, więc trzymamy go w cache bez limitu
+    czasu; jest unieważniany sygnałami przy każdej zmianie modelu Category.
+    """
+    catalogue = cache.get(CATEGORY_CATALOGUE_CACHE_KEY)
+    if catalogue is None:
+        catalogue = list(Category.objects.order_by('id').values('id', 'name', 'parent'))
+        cache.set(CATEGORY_CATALOGUE_CACHE_KEY, catalogue, timeout=None)
+    return catalogue
+
+
+def get_category_tree():
+    """Zwraca katalog kategorii jako drzewo {'id', 'name', 'children'} (w cache jak katalog)."""
+    tree = cache.get(CATEGORY_TREE_CACHE_KEY)
+    if tree is None:
+        tree = build_tree(get_category_catalogue())
+        cache.set(CATEGORY_TREE_CACHE_KEY, tree, timeout=None)
+    return tree
+
+
+def get_category_subtrees():
+    """
+    Zwraca mapę {id_kategorii: [id kategorii poddrzewa, łącznie z nią]} z tabeli
+    domknięcia – jedno zapytanie, w cache jak katalog.
+    """
+    subtrees = cache.get(CATEGORY_SUBTREES_CACHE_KEY)
+    if subtrees is None:
+        subtrees = subtree_map(CategoryClosure.objects.values_list('ancestor_id', 'descendant_id'))
+        cache.set(CATEGORY_SUBTREES_CACHE_KEY, subtrees, timeout=None)
+    return subtrees
+
+
+def invalidate_category_catalogue():
+    """Usuwa katalog, drzewo i mapę poddrzew kategorii z cache (np. po zmianie kategorii)."""
+    cache.delete_many([CATEGORY_CATALOGUE_CACHE_KEY, CATEGORY_TREE_CACHE_KEY, CATEGORY_SUBTREES_CACHE_KEY])
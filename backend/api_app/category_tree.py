@@ -0,0 +1,75 @@
+"""
+Drzewo kategorii (Category.parent) i jego tabela domknięcia (CategoryClosure).
+
+Tabela jest aktualizowana po każdym zapisie kategorii (sygnał post_save, w transakcji
+Category.save): nowa kategoria dostaje ścieżki od wszystkich przodków rodzica,
+a zmiana rodzica przenosi całe poddrzewo – usuwa ścieżki do starych przodków i dodaje
+iloczyn nowych przodków i poddrzewa. Koszt zależy od rozmiaru poddrzewa i głębokości,
+a nie od liczby wszystkich kategorii.
+
+Wydatki mogą leżeć w innej bazie (shardzie) niż kategorie, więc podsumowania nie łączą
+tabeli domknięcia z wydatkami w SQL: mapa poddrzew jest w cache (api_app.catalogue),
+suma poddrzewa to jedno zapytanie z listą id kategorii, a sumy wszystkich kategorii są
+zwijane do przodków w Pythonie (rollup_totals).
+"""
+
+from collections import defaultdict
+
+from .models import CategoryClosure
+
+
+def sync_category_closure(category, using):
+    """Dopasowuje wiersze domknięcia do rodzica kategorii (po utworzeniu lub zmianie rodzica)."""
+    closure = CategoryClosure.objects.using(using)
+    subtree = dict(closure.filter(ancestor_id=category.pk).values_list('descendant_id', 'depth'))
+    if not subtree:
+        closure.create(ancestor_id=category.pk, descendant_id=category.pk, depth=0)
+        subtree = {category.pk: 0}
+
+    old = set(closure.filter(descendant_id=category.pk, depth__gt=0).values_list('ancestor_id', 'depth'))
+    new = set()
+    if category.parent_id is not None:
+        new = {
+            (ancestor_id, depth + 1)
+            for ancestor_id, depth in closure.filter(descendant_id=category.parent_id).values_list('ancestor_id', 'depth')
+        }
+    if old == new:
+        return
+    if old:
+        closure.filter(descendant_id__in=list(subtree), ancestor_id__in=[ancestor_id for ancestor_id, _depth in old]).delete()
+    closure.bulk_create(
+        CategoryClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=ancestor_depth + depth)
+        for ancestor_id, ancestor_depth in new
+        for descendant_id, depth in subtree.items()
+    )
+
+
+def build_tree(catalogue):
+    """Zamienia płaski katalog {'id', 'name', 'parent'} w drzewo {'id', 'name', 'children'}."""
+    nodes = {category['id']: {'id': category['id'], 'name': category['name'], 'children': []} for category in catalogue}
+    roots = []
+    for category in catalogue:
+        parent = nodes.get(category['parent'])
+        (parent['children'] if parent else roots).append(nodes[category['id']])
+    return roots
+
+
+def subtree_map(pairs):
+    """Zamienia pary (przodek, potomek) w słownik {id_kategorii: [id kategorii poddrzewa]}."""
+    subtrees = defaultdict(list)
+    for ancestor_id, descendant_id in pairs:
+        subtrees[ancestor_id].append(descendant_id)
+    return dict(subtrees)
+
+
+def rollup_totals(totals, subtrees):
+    """
+    Zwija sumy {id_kategorii: suma} do przodków: zwraca {id_kategorii: suma poddrzewa}
+    dla kategorii, których poddrzewo ma wydatki. Koszt O(liczba wierszy domknięcia).
+    """
+    rolled = {}
+    for category_id, descendants in subtrees.items():
+        found = [totals[descendant_id] for descendant_id in descendants if descendant_id in totals]
+        if found:
+            rolled[category_id] = sum(found)
+    return rolled
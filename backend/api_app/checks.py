@@ -0,0 +1,43 @@
+"""
+Sprawdzenia konfiguracji współdzielonego stanu (manage.py check --deploy, gunicorn.conf.py).
+
+Limity zapytań, tokeny aktywacyjne, wersje cache analityki, dziennik unieważnień
+tokenów i piny replik żyją w cache 'default', a strumień zmian wydatków – w brokerze
+zdarzeń. Przy kilku workerach oba muszą być współdzielone (Redis); cache w pamięci
+procesu daje każdemu workerowi osobną kopię i te mechanizmy przestają działać.
+"""
+
+from django.conf import settings
+from django.core import checks
+
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_process_local(alias='default'):
+    """Czy cache `alias` jest w pamięci procesu (każdy worker ma własną kopię)."""
+    return settings.CACHES[alias]['BACKEND'] in PROCESS_LOCAL_CACHE_BACKENDS
+
+
+def process_local_state(serves_events=True):
+    """Lista stanu trzymanego w pamięci procesu, który przy kilku workerach musi być współdzielony."""
+    problems = []
+    if cache_is_process_local():
+        problems.append("cache 'default' jest w pamięci procesu (ustaw CACHE_URL, np. redis://redis:6379/0)")
+    if serves_events and not settings.EXPENSE_EVENTS_REDIS_URL:
+        problems.append("broker zdarzeń wydatków jest w pamięci procesu (ustaw EXPENSE_EVENTS_REDIS_URL)")
+    return problems
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_state(app_configs, **kwargs):
+    return [
+        checks.Warning(
+            problem,
+            hint="Przy więcej niż jednym workerze lub instancji aplikacji użyj Redis (zob. docker-compose.yml).",
+            id=f'api_app.W00{index}',
+        )
+        for index, problem in enumerate(process_local_state(), start=1)
+    ]
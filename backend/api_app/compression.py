@@ -0,0 +1,100 @@
+"""
+Kodeki kompresji odpowiedzi i negocjacja Accept-Encoding.
+
+gzip jest zawsze dostępny (zlib); brotli i zstd – tylko po zainstalowaniu pakietów
+`brotli` i `zstandard`. Każdy kodek udostępnia kompresor strumieniowy z trzema
+operacjami: compress(dane), flush() – wypchnięcie wszystkiego, co dotąd przyszło
+(kolejny fragment strumienia można od razu wysłać klientowi) – oraz finish().
+"""
+
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class StreamCompressor:
+    def __init__(self, compress, flush, finish):
+        self.compress = compress
+        self.flush = flush
+        self.finish = finish
+
+
+def _gzip(level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return StreamCompressor(compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush)
+
+
+def _brotli(level):
+    compressor = brotli.Compressor(quality=level)
+    return StreamCompressor(compressor.process, compressor.flush, compressor.finish)
+
+
+def _zstd(level):
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    return StreamCompressor(
+        compressor.compress,
+        lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+        compressor.flush,
+    )
+
+
+# Kolejność to preferencja serwera przy równych wagach q w Accept-Encoding.
+CODECS = {
+    'zstd': (_zstd, 'COMPRESSION_ZSTD_LEVEL') if zstandard else None,
+    'br': (_brotli, 'COMPRESSION_BROTLI_LEVEL') if brotli else None,
+    'gzip': (_gzip, 'COMPRESSION_GZIP_LEVEL'),
+}
+
+
+def available_encodings():
+    return [name for name, codec in CODECS.items() if codec]
+
+
+def stream_compressor(encoding, level=None):
+    """Zwraca StreamCompressor dla kodowania; poziom domyślnie z settings."""
+    factory, level_setting = CODECS[encoding]
+    return factory(getattr(settings, level_setting) if level is None else level)
+
+
+def compress(encoding, data, level=None):
+    compressor = stream_compressor(encoding, level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Wybiera kodowanie z nagłówka Accept-Encoding (z wagami q) spośród dostępnych.
+
+    Zwraca None, jeśli klient nie akceptuje żadnego z nich.
+    """
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for name in available_encodings():
+        q = weights.get(name, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
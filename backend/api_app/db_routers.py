@@ -0,0 +1,131 @@
+"""
+Routing bazy danych.
+
+UserShardRouter kieruje modele dzielone per użytkownik (api_app.sharding) do shardu
+użytkownika. Pozostałe modele obsługuje PrimaryReplicaRouter: zapis do bazy
+głównej, bezpieczne odczyty do replik.
+
+Repliki (aliasy 'replica_N') są konfigurowane w settings przez DB_REPLICAS. Odczyty
+trafiają do bazy głównej, gdy:
+  - żądanie modyfikuje dane (metoda inna niż GET/HEAD/OPTIONS),
+  - użytkownik niedawno zapisywał dane (pin w cache albo ciasteczko ustawiane
+    przez ReplicaStickinessMiddleware na REPLICA_STICKY_SECONDS – "read-your-writes"),
+  - trwa transakcja na bazie głównej lub kod jawnie użył use_primary().
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .sharding import USER_SHARDED_MODELS, is_user_sharded, shard_aliases, shard_for_user, sharding_enabled
+
+_pinned = ContextVar('db_pinned_to_primary', default=False)
+_wrote = ContextVar('db_wrote_to_primary', default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+@contextmanager
+def use_primary():
+    """Kieruje wszystkie odczyty w bloku do bazy głównej."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+@contextmanager
+def track_request(pinned):
+    """
+    Ustawia stan routingu na czas jednego żądania.
+
+    Zwraca funkcję, która po zakończeniu żądania mówi, czy zapisywano do bazy głównej.
+    """
+    pin_token = _pinned.set(pinned)
+    wrote_token = _wrote.set(False)
+    try:
+        yield _wrote.get
+    finally:
+        _pinned.reset(pin_token)
+        _wrote.reset(wrote_token)
+
+
+class UserShardRouter:
+    """
+    Router shardów: modele z USER_SHARDED_MODELS trafiają do shardu użytkownika.
+
+    Użytkownik jest ustalany ze wskazówki 'user_id' (Expense.objects.for_user)
+    albo z instancji przekazanej przez Django (wiersz modelu dzielonego lub
+    obiekt User przy relacjach typu user.expenses). Zapytania bez użytkownika
+    muszą jawnie wskazać shard przez .using(alias). Pozostałe modele przekazywane
+    są dalej (None) do kolejnych routerów.
+    """
+
+    def _user_id(self, hints):
+        if 'user_id' in hints:
+            return hints['user_id']
+        instance = hints.get('instance')
+        if instance is None:
+            return None
+        if is_user_sharded(type(instance)):
+            return instance.user_id
+        if isinstance(instance, get_user_model()):
+            return instance.pk
+        return None
+
+    def _db_for_model(self, model, hints):
+        if not sharding_enabled() or not is_user_sharded(model):
+            return None
+        user_id = self._user_id(hints)
+        return shard_for_user(user_id) if user_id is not None else None
+
+    def db_for_read(self, model, **hints):
+        return self._db_for_model(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for_model(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Wiersze z shardów wskazują na użytkowników i kategorie w bazie głównej.
+        if is_user_sharded(type(obj1)) or is_user_sharded(type(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if not sharding_enabled():
+            return None
+        sharded = f'{app_label}.{model_name}' in USER_SHARDED_MODELS
+        if db in shard_aliases():
+            return sharded
+        return False if sharded else None
+
+
+class PrimaryReplicaRouter:
+    """Router: zapisy do 'default', odczyty do losowej repliki (jeśli jest to bezpieczne)."""
+
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if not replicas or _pinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in replicas:
+            # Relacje obiektu czytamy z tej samej repliki, z której pochodzi obiekt.
+            return instance._state.db
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,32 @@
+"""
+Znormalizowane (małe litery) wyszukiwanie użytkowników po adresie e-mail.
+
+Migracja 0004 tworzy unikalny indeks funkcyjny na NULLIF(LOWER(email), '') w tabeli
+auth_user. Zapytania muszą używać dokładnie tego samego wyrażenia (NormalizedEmail),
+aby baza (MySQL 8.0.13+ / SQLite) skorzystała z indeksu zamiast pełnego skanu.
+Puste adresy są mapowane na NULL, więc nie kolidują ze sobą w indeksie unikalnym.
+"""
+
+from django.contrib.auth.models import User
+from django.db.models import CharField, Func
+
+
+class NormalizedEmail(Func):
+    """Wyrażenie NULLIF(LOWER(email), '') – identyczne z wyrażeniem indeksu."""
+    template = "NULLIF(LOWER(%(expressions)s), '')"
+    output_field = CharField()
+
+
+def normalize_email(email):
+    """Normalizuje adres e-mail do postaci porównywanej w indeksie."""
+    return email.strip().lower()
+
+
+def users_with_email_key():
+    """QuerySet użytkowników z adnotacją email_key (znormalizowany e-mail)."""
+    return User.objects.annotate(email_key=NormalizedEmail('email'))
+
+
+def users_by_email(email):
+    """Użytkownicy o danym adresie e-mail (bez rozróżniania wielkości liter), przez indeks."""
+    return users_with_email_key().filter(email_key=normalize_email(email))
@@ -0,0 +1,248 @@
+"""
+Strumień zmian wydatków (Server-Sent Events).
+
+Sygnały post_save/post_delete wydatków publikują po zatwierdzeniu transakcji
+zdarzenia `created`, `updated` i `deleted` na kanale użytkownika. Widok
+`api_app.views.events` subskrybuje kanał i wysyła je klientowi jako SSE.
+
+Brokery:
+  - InProcessBroker – w pamięci procesu (testy, dev, jeden worker uvicorna);
+    zdarzenia z innych procesów nie docierają, więc przy kilku workerach
+    (gunicorn -w N, uvicorn --workers N) giną – potrzebny jest RedisBroker
+    (EXPENSE_EVENTS_REDIS_URL; gunicorn.conf.py bez niego odmawia startu).
+  - RedisBroker – historia w strumieniu Redis (XADD z limitem długości),
+    powiadomienia przez Pub/Sub. Jeden proces utrzymuje jedną subskrypcję
+    Pub/Sub niezależnie od liczby otwartych strumieni.
+
+Identyfikatory zdarzeń mają format `<liczba>-<liczba>` (jak w strumieniach Redis)
+i rosną w obrębie kanału, więc klient może wznowić strumień od Last-Event-ID.
+Jeśli zdarzenia po tym identyfikatorze nie są już w historii, klient dostaje
+zdarzenie `reset` i powinien pobrać pełną listę wydatków.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+Event = namedtuple('Event', 'id type data')
+
+_muted = ContextVar('expense_events_muted', default=False)
+
+
+def event_sort_key(event_id):
+    """Klucz porównania identyfikatorów zdarzeń; None dla niepoprawnego identyfikatora."""
+    try:
+        return tuple(int(part) for part in event_id.split('-'))
+    except (AttributeError, ValueError):
+        return None
+
+
+def _offer(queue, event):
+    """Wkłada zdarzenie do kolejki subskrybenta; przepełniona kolejka dostaje `reset`."""
+    if queue.full():
+        while not queue.empty():
+            queue.get_nowait()
+        event = Event(None, 'reset', {})
+    queue.put_nowait(event)
+
+
+class InProcessBroker:
+    def __init__(self, history_size):
+        self.history_size = history_size
+        self._epoch = int(time.time() * 1000)
+        self._counter = itertools.count(1)
+        self._history = defaultdict(lambda: deque(maxlen=history_size))
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, event_type, data):
+        with self._lock:
+            event = Event(f'{self._epoch}-{next(self._counter)}', event_type, data)
+            self._history[user_id].append(event)
+            subscribers = list(self._subscribers[user_id])
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # Pętla zdarzeń subskrybenta została już zamknięta.
+                pass
+
+    async def history(self, user_id, after):
+        with self._lock:
+            events = list(self._history.get(user_id, ()))
+        return _events_after(events, after, trimmed=len(events) >= self.history_size, epoch=self._epoch)
+
+    async def subscribe(self, user_id, queue):
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers[user_id].add(entry)
+        return entry
+
+    async def unsubscribe(self, user_id, entry):
+        with self._lock:
+            self._subscribers[user_id].discard(entry)
+            if not self._subscribers[user_id]:
+                del self._subscribers[user_id]
+
+
+class RedisBroker:
+    STREAM_KEY = 'expense_events:{}'
+    CHANNEL = 'expense_events'
+
+    def __init__(self, url, history_size):
+        import redis
+        import redis.asyncio
+
+        self.url = url
+        self.history_size = history_size
+        self._client = redis.Redis.from_url(url)
+        self._async_client = redis.asyncio.Redis.from_url(url)
+        self._connection_errors = (redis.ConnectionError, redis.TimeoutError)
+        self._subscribers = defaultdict(set)
+        self._listener = None
+
+    def publish(self, user_id, event_type, data):
+        payload = json.dumps(data)
+        event_id = self._client.xadd(
+            self.STREAM_KEY.format(user_id),
+            {'type': event_type, 'data': payload},
+            maxlen=self.history_size,
+            approximate=False,
+        ).decode()
+        self._client.publish(self.CHANNEL, json.dumps({
+            'user': user_id, 'id': event_id, 'type': event_type, 'data': data,
+        }))
+
+    async def history(self, user_id, after):
+        key = self.STREAM_KEY.format(user_id)
+        entries = await self._async_client.xrange(key, min='-', max='+')
+        events = [
+            Event(entry_id.decode(), fields[b'type'].decode(), json.loads(fields[b'data']))
+            for entry_id, fields in entries
+        ]
+        return _events_after(events, after, trimmed=len(events) >= self.history_size)
+
+    async def subscribe(self, user_id, queue):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        self._subscribers[user_id].add(queue)
+        return queue
+
+    async def unsubscribe(self, user_id, entry):
+        self._subscribers[user_id].discard(entry)
+        if not self._subscribers[user_id]:
+            del self._subscribers[user_id]
+
+    async def _listen(self):
+        """
+        Jedna subskrypcja Pub/Sub na proces, rozdzielająca zdarzenia do kolejek strumieni.
+
+        Po zerwaniu połączenia z Redis subskrypcja jest odnawiana, a otwarte strumienie
+        dostają `reset` – zdarzenia z przerwy nie zostały dostarczone.
+        """
+        while True:
+            pubsub = self._async_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.CHANNEL)
+                async for message in pubsub.listen():
+                    payload = json.loads(message['data'])
+                    event = Event(payload['id'], payload['type'], payload['data'])
+                    for queue in list(self._subscribers.get(payload['user'], ())):
+                        _offer(queue, event)
+            except (OSError, self._connection_errors):
+                logger.warning("Utracono połączenie Pub/Sub z Redis – ponawiam subskrypcję.")
+                for queues in list(self._subscribers.values()):
+                    for queue in list(queues):
+                        _offer(queue, Event(None, 'reset', {}))
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+
+def _events_after(events, after, trimmed, epoch=None):
+    """
+    Zwraca (zdarzenia po `after`, czy historia jest kompletna).
+
+    Historia jest niekompletna, gdy `after` jest niepoprawny, pochodzi z innego
+    uruchomienia brokera w pamięci albo starsze zdarzenia zostały już przycięte;
+    wtedy zwracane są wszystkie zachowane zdarzenia (ostatnie wyznacza nowy punkt
+    wznowienia).
+    """
+    if after is None:
+        return [], True
+    after_key = event_sort_key(after)
+    if after_key is None or (epoch is not None and after_key[0] != epoch):
+        return events, False
+    newer = [event for event in events if event_sort_key(event.id) > after_key]
+    if trimmed and len(newer) == len(events):
+        return events, False
+    return newer, True
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Zwraca broker wybrany przez EXPENSE_EVENTS_REDIS_URL (pusty – w pamięci procesu)."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                if settings.EXPENSE_EVENTS_REDIS_URL:
+                    _broker = RedisBroker(settings.EXPENSE_EVENTS_REDIS_URL, settings.EXPENSE_EVENTS_HISTORY)
+                else:
+                    _broker = InProcessBroker(settings.EXPENSE_EVENTS_HISTORY)
+    return _broker
+
+
+@contextmanager
+def muted():
+    """
+    Wyłącza publikację zdarzeń w bloku – dla operacji, które nie zmieniają wydatków
+    widzianych przez użytkownika (archiwizacja, przenosiny między shardami).
+    """
+    token = _muted.set(True)
+    try:
+        yield
+    finally:
+        _muted.reset(token)
+
+
+def is_muted():
+    return _muted.get()
+
+
+def expense_event_data(expense):
+    return {
+        'id': expense.pk,
+        'category': expense.category_id,
+        'amount': str(expense.amount),
+        'date': str(expense.date),
+    }
+
+
+def publish_on_commit(user_id, event_type, data, using):
+    """Publikuje zdarzenie po zatwierdzeniu transakcji w bazie `using` (chyba że wyciszone)."""
+    if is_muted():
+        return
+
+    def publish():
+        try:
+            get_broker().publish(user_id, event_type, data)
+        except Exception:
+            # Zapis już się udał – niedostępny broker nie może zamienić go w błąd 500.
+            logger.exception("Nie udało się opublikować zdarzenia wydatku.")
+
+    transaction.on_commit(publish, using=using)
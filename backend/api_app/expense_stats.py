@@ -0,0 +1,238 @@
+"""
+Obliczenia analizy wydatków (api_app.analytics).
+
+Wydatki z obu poziomów (Expense i ArchivedExpense) są pobierane jednym
+zapytaniem na tabelę jako kolumny liczb całkowitych – dni od 1970-01-01,
+kwoty w groszach, id kategorii (-1 dla braku kategorii) – i przeliczane
+wektorowo w NumPy, bez pętli po wierszach w Pythonie:
+  - dzienne sumy ze średnimi kroczącymi 7- i 30-dniowymi,
+  - sumy miesięczne wg kategorii ze zmianą miesiąc do miesiąca,
+  - prognoza wydatków do końca bieżącego miesiąca (trend liniowy z ostatnich
+    tygodni z poprawką na dzień tygodnia),
+  - wydatki odstające w swojej kategorii (zmodyfikowany z-score: mediana i MAD).
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BigIntegerField, CharField, F, Value
+from django.db.models.functions import Cast, Coalesce, Round
+
+from .models import ArchivedExpense, Expense
+
+# Prognoza: liczba dni historii (pełne tygodnie) dla trendu i sezonowości tygodniowej.
+FORECAST_HISTORY_DAYS = 84
+# Wydatek jest odstający, gdy zmodyfikowany z-score w jego kategorii przekracza próg
+# (Iglewicz i Hoaglin); kategorie z mniejszą liczbą wydatków są pomijane.
+OUTLIER_THRESHOLD = 3.5
+OUTLIER_MIN_SAMPLES = 8
+OUTLIER_LIMIT = 20
+
+NO_CATEGORY = -1
+
+Columns = namedtuple('Columns', 'ids days cents categories')
+
+
+def _query_columns(queryset):
+    queryset = queryset.annotate(
+        # Round przed rzutowaniem – SQLite trzyma kwoty jako REAL, a CAST obcina.
+        cents=Cast(Round(F('amount') * 100), BigIntegerField()),
+        category_key=Coalesce('category_id', Value(NO_CATEGORY)),
+        # Data jako tekst 'RRRR-MM-DD' – NumPy parsuje całą kolumnę naraz.
+        day=Cast('date', CharField()),
+    ).values_list('id', 'day', 'cents', 'category_key')
+    # Surowy kursor zamiast iteracji po QuerySet: konwertery Django i sterownika
+    # wywoływane dla każdego wiersza kosztują przy 100 tys. wydatków więcej niż
+    # samo zapytanie i obliczenia razem.
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    ids, dates, cents, categories = zip(*rows) if rows else ((), (), (), ())
+    return Columns(
+        np.array(ids, dtype=np.int64),
+        np.array(dates, dtype='datetime64[D]').astype(np.int64),
+        np.array(cents, dtype=np.int64),
+        np.array(categories, dtype=np.int64),
+    )
+
+
+def expense_columns(user):
+    """Zwraca kolumny (id, dzień, grosze, kategoria) wszystkich wydatków użytkownika."""
+    parts = [_query_columns(model.objects.for_user(user)) for model in (Expense, ArchivedExpense)]
+    return Columns(*(np.concatenate(column) for column in zip(*parts)))
+
+
+def _day_number(day):
+    return int(np.datetime64(day, 'D').astype(np.int64))
+
+
+def _date(day_number):
+    return str(np.datetime64(int(day_number), 'D'))
+
+
+def _money(cents):
+    return f'{round(float(cents)) / 100:.2f}'
+
+
+def _weekday(day_numbers):
+    # 1970-01-01 to czwartek; poniedziałek = 0.
+    return (day_numbers + 3) % 7
+
+
+def daily_totals(columns, first, last):
+    """Sumy groszy dla każdego dnia z zakresu [first, last] (numery dni)."""
+    mask = (columns.days >= first) & (columns.days <= last)
+    return np.bincount(
+        columns.days[mask] - first, weights=columns.cents[mask], minlength=last - first + 1
+    )
+
+
+def rolling_mean(values, window):
+    """Średnie z `window` kolejnych wartości; i-ty wynik kończy się na values[i + window - 1]."""
+    sums = np.cumsum(np.concatenate(([0.0], values)))
+    return (sums[window:] - sums[:-window]) / window
+
+
+def _daily(columns, today):
+    days = settings.EXPENSE_ANALYTICS_DAYS
+    first = today - days + 1
+    totals = daily_totals(columns, first - 29, today)
+    average7 = rolling_mean(totals, 7)[-days:]
+    average30 = rolling_mean(totals, 30)[-days:]
+    return [
+        {
+            'date': _date(first + index),
+            'total': _money(total),
+            'average7': _money(avg7),
+            'average30': _money(avg30),
+        }
+        for index, (total, avg7, avg30) in enumerate(zip(totals[29:], average7, average30))
+    ]
+
+
+def _month_number(day_numbers):
+    return day_numbers.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+
+def _monthly(columns, today, names):
+    count = settings.EXPENSE_ANALYTICS_MONTHS
+    current = int(_month_number(np.array([today]))[0])
+    # Jeden miesiąc więcej – zmiana w pierwszym raportowanym miesiącu.
+    first = current - count
+    months = _month_number(columns.days)
+    mask = (months >= first) & (months <= current)
+
+    category_ids, category_index = np.unique(columns.categories[mask], return_inverse=True)
+    grid = np.bincount(
+        category_index * (count + 1) + (months[mask] - first),
+        weights=columns.cents[mask],
+        minlength=len(category_ids) * (count + 1),
+    ).reshape(len(category_ids), count + 1)
+    change = grid[:, 1:] - grid[:, :-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percent = np.where(grid[:, :-1] > 0, change / grid[:, :-1] * 100, np.nan)
+
+    return {
+        'months': [str(np.datetime64(int(month), 'M')) for month in range(first + 1, current + 1)],
+        'categories': [
+            {
+                'category': names.get(int(category_id)) or 'Brak kategorii',
+                'totals': [_money(total) for total in totals[1:]],
+                'change': [_money(value) for value in changes],
+                'changePercent': [None if np.isnan(value) else round(float(value), 1) for value in percents],
+            }
+            for category_id, totals, changes, percents in zip(category_ids, grid, change, percent)
+        ],
+    }
+
+
+def _forecast(columns, today):
+    """
+    Prognoza wydatków do końca miesiąca.
+
+    Trend to prosta dopasowana do dziennych sum z FORECAST_HISTORY_DAYS dni przed
+    dzisiejszym (dzisiejszy dzień jest niepełny), mnożona przez współczynnik dnia
+    tygodnia (średnia dla dnia tygodnia / średnia ogólna z tej samej historii).
+    """
+    today_date = np.datetime64(today, 'D')
+    first_of_month = _day_number(today_date.astype('datetime64[M]'))
+    last_of_month = _day_number((today_date.astype('datetime64[M]') + 1)) - 1
+    month_to_date = daily_totals(columns, first_of_month, today).sum()
+
+    history_first = today - FORECAST_HISTORY_DAYS
+    history = daily_totals(columns, history_first, today - 1)
+    positions = np.arange(FORECAST_HISTORY_DAYS)
+    slope, intercept = np.polyfit(positions, history, 1)
+
+    weekdays = _weekday(history_first + positions)
+    weekday_means = np.bincount(weekdays, weights=history, minlength=7) / np.bincount(weekdays, minlength=7)
+    mean = history.mean()
+    factors = weekday_means / mean if mean > 0 else np.ones(7)
+
+    future = np.arange(today + 1, last_of_month + 1)
+    predicted = np.clip(intercept + slope * (future - history_first), 0, None) * factors[_weekday(future)]
+    remaining = predicted.sum()
+    return {
+        'monthToDate': _money(month_to_date),
+        'forecastRemaining': _money(remaining),
+        'forecastTotal': _money(month_to_date + remaining),
+        'daysRemaining': len(future),
+        'dailyTrend': _money(slope),
+    }
+
+
+def _group_medians(values, starts, sizes):
+    """Mediany w grupach; `values` posortowane wg (grupa, wartość), grupy od `starts`."""
+    lower = values[starts + (sizes - 1) // 2]
+    upper = values[starts + sizes // 2]
+    return (lower + upper) / 2
+
+
+def _outliers(columns, today, names):
+    """Wydatki z ostatnich EXPENSE_ANALYTICS_DAYS dni odstające w górę w swojej kategorii."""
+    if not len(columns.cents):
+        return []
+    category_ids, index, sizes = np.unique(columns.categories, return_inverse=True, return_counts=True)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    order = np.lexsort((columns.cents, index))
+    medians = _group_medians(columns.cents[order].astype(np.float64), starts, sizes)
+    deviations = np.abs(columns.cents - medians[index])
+    order = np.lexsort((deviations, index))
+    mads = _group_medians(deviations[order], starts, sizes)
+
+    mad = mads[index]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = np.where(mad > 0, 0.6745 * (columns.cents - medians[index]) / mad, 0.0)
+    flagged = np.flatnonzero(
+        (scores > OUTLIER_THRESHOLD)
+        & (sizes[index] >= OUTLIER_MIN_SAMPLES)
+        & (columns.days > today - settings.EXPENSE_ANALYTICS_DAYS)
+    )
+    flagged = flagged[np.argsort(-scores[flagged], kind='stable')][:OUTLIER_LIMIT]
+    return [
+        {
+            'id': int(columns.ids[position]),
+            'date': _date(columns.days[position]),
+            'category': names.get(int(columns.categories[position])) or 'Brak kategorii',
+            'amount': _money(columns.cents[position]),
+            'median': _money(medians[index[position]]),
+            'score': round(float(scores[position]), 1),
+        }
+        for position in flagged
+    ]
+
+
+def analyse(columns, today, names):
+    """Liczy analizę z kolumn wydatków; `today` to data, `names` – {id kategorii: nazwa}."""
+    today = _day_number(today)
+    return {
+        'daily': _daily(columns, today),
+        'monthly': _monthly(columns, today, names),
+        'forecast': _forecast(columns, today),
+        'outliers': _outliers(columns, today, names),
+    }
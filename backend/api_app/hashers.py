@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 z liczbą iteracji z ustawienia PBKDF2_ITERATIONS.
+
+    Nazwa algorytmu pozostaje 'pbkdf2_sha256', więc istniejące skróty są
+    rozpoznawane, a przy zmianie liczby iteracji Django przelicza skrót
+    przy najbliższym poprawnym logowaniu.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PBKDF2_ITERATIONS
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id z kosztem czasowym, pamięciowym (KiB) i równoległością z ustawień
+    ARGON2_TIME_COST, ARGON2_MEMORY_COST i ARGON2_PARALLELISM.
+
+    Skróty z innymi parametrami są przeliczane przy najbliższym poprawnym logowaniu.
+    """
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
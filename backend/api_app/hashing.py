@@ -0,0 +1,58 @@
+"""
+Ograniczona pula wątków do liczenia skrótów haseł.
+
+Skróty haseł (PBKDF2, Argon2) są kosztowne obliczeniowo. Wykonywanie ich w puli
+o stałej liczbie wątków (PASSWORD_HASH_WORKERS) ogranicza liczbę rdzeni, które
+fala logowań może zająć w procesie, a ograniczona kolejka (PASSWORD_HASH_QUEUE)
+sprawia, że nadmiarowe żądania szybko dostają 503 zamiast czekać bez końca.
+Obie funkcje bibliotek hashujących zwalniają GIL, więc pozostałe wątki
+aplikacji obsługują w tym czasie inne endpointy.
+
+PASSWORD_HASH_WORKERS = 0 wyłącza pulę – skrót liczony jest w wątku żądania.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class HashingBusy(Exception):
+    """Pula haseł jest pełna – żądanie należy odrzucić (503)."""
+
+
+_lock = threading.Lock()
+_pool = None
+
+
+def _get_pool():
+    """Zwraca pulę dla bieżącego procesu (po fork() tworzona jest nowa)."""
+    global _pool
+    with _lock:
+        if _pool is None or _pool[0] != os.getpid():
+            workers = settings.PASSWORD_HASH_WORKERS
+            _pool = (
+                os.getpid(),
+                ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash'),
+                threading.BoundedSemaphore(workers + settings.PASSWORD_HASH_QUEUE),
+            )
+        return _pool[1], _pool[2]
+
+
+def run_hash(func, *args):
+    """
+    Wykonuje func(*args) w puli haseł i zwraca wynik.
+
+    Rzuca HashingBusy, jeśli w ciągu PASSWORD_HASH_QUEUE_TIMEOUT sekund nie
+    zwolniło się miejsce w puli (wykonywane + oczekujące zadania).
+    """
+    if not settings.PASSWORD_HASH_WORKERS:
+        return func(*args)
+    executor, slots = _get_pool()
+    if not slots.acquire(timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT):
+        raise HashingBusy()
+    try:
+        return executor.submit(func, *args).result()
+    finally:
+        slots.release()
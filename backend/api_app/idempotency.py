@@ -0,0 +1,207 @@
+"""
+Nagłówek Idempotency-Key dla zapisów wydatków.
+
+Klient nadaje każdej operacji zapisu losowy klucz i powtarza go przy ponawianiu
+żądania. Klucz (w zakresie użytkownika, ważność IDEMPOTENCY_KEY_TTL) i pierwsza
+odpowiedź są zapisywane w tabeli IdempotencyKey w bazie głównej, a powtórzenia
+dostają ją z powrotem bez walidacji, zapisu wydatku i bez zajmowania miejsca
+w limicie żądań. Zapisana odpowiedź trafia też do cache – powtórzenie w procesie,
+który ją widzi, nie kosztuje zapytania; cache nie decyduje jednak o niczym.
+
+Równoległe duplikaty (ponowienie w trakcie obsługi pierwszego żądania, także
+w innym workerze lub instancji) rozstrzyga unikalność (user, key_hash): tylko
+żądanie, którego INSERT się udał, wykonuje zapis. Pozostałe od razu dostają 409
+z nagłówkiem Retry-After – nie blokują workera czekaniem – a ponowione po
+zakończeniu pierwszego dostają zapisaną odpowiedź. Klucz porzucony przez właściciela (np. zabity worker) można przejąć po
+IDEMPOTENCY_LOCK_TIMEOUT. Ten sam klucz z innym żądaniem (metoda, ścieżka, treść)
+daje 422.
+Odpowiedzi 5xx, 409 i 429 nie są zapamiętywane – takie żądanie można ponowić.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+IDEMPOTENCY_CACHE_KEY = 'idempotency:{}:{}'
+MAX_KEY_LENGTH = 255
+RETRY_AFTER_SECONDS = 1
+
+_UNSTORED_STATUSES = {status.HTTP_409_CONFLICT, status.HTTP_429_TOO_MANY_REQUESTS}
+
+
+class IdempotencyKeyInvalid(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = f"Nagłówek Idempotency-Key musi mieć od 1 do {MAX_KEY_LENGTH} znaków."
+    default_code = 'idempotency_key_invalid'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "Ten klucz Idempotency-Key został użyty z innym żądaniem."
+    default_code = 'idempotency_key_reused'
+
+
+class IdempotencyKeyInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Żądanie z tym kluczem Idempotency-Key jest w trakcie obsługi."
+    default_code = 'idempotency_key_in_progress'
+    # Domyślny exception_handler DRF zamienia `wait` na nagłówek Retry-After.
+    wait = RETRY_AFTER_SECONDS
+
+
+class _Replay(Exception):
+    """Przerywa obsługę żądania zapisaną odpowiedzią (zob. IdempotentWritesMixin)."""
+
+    def __init__(self, stored):
+        super().__init__()
+        self.stored = stored
+
+
+def _fingerprint(request):
+    digest = hashlib.sha256(f'{request.method} {request.get_full_path()}\n'.encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+class IdempotentRequest:
+    """Żądanie, które zajęło klucz (wiersz IdempotencyKey) i musi zapisać odpowiedź albo go zwolnić."""
+
+    def __init__(self, row, cache_key):
+        self.row = row
+        self.cache_key = cache_key
+
+    @classmethod
+    def begin(cls, request):
+        """
+        Zwraca IdempotentRequest (klucz zajęty przez to żądanie) albo None dla żądania bez klucza.
+
+        Zgłasza _Replay z zapisaną odpowiedzią, gdy żądanie zostało już obsłużone,
+        albo IdempotencyKeyInProgress (409), gdy pierwsze żądanie jest jeszcze w toku.
+        """
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return None
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            raise IdempotencyKeyInvalid()
+        # Skrót klucza – dowolne znaki z nagłówka nie trafiają do bazy ani do klucza cache.
+        user_id = request.user.pk
+        key_hash = hashlib.sha256(key.encode()).hexdigest()
+        cache_key = IDEMPOTENCY_CACHE_KEY.format(user_id, key_hash)
+        fingerprint = _fingerprint(request)
+
+        stored = cache.get(cache_key)
+        if stored is not None:
+            _replay(stored, fingerprint)
+
+        keys = IdempotencyKey.objects.using(DEFAULT_DB_ALIAS)
+        while True:
+            now = timezone.now()
+            locked_until = now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+            try:
+                # Savepoint – nieudany INSERT nie psuje transakcji, w której działa widok.
+                with transaction.atomic(using=DEFAULT_DB_ALIAS):
+                    row = keys.create(
+                        user_id=user_id, key_hash=key_hash, fingerprint=fingerprint, locked_until=locked_until,
+                        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                    )
+                return cls(row, cache_key)
+            except IntegrityError:
+                row = keys.filter(user_id=user_id, key_hash=key_hash).first()
+
+            if row is not None and row.expires_at <= now:
+                # Wygasły, jeszcze nieusunięty klucz – jak nowy.
+                keys.filter(pk=row.pk, expires_at__lte=now).delete()
+                continue
+            if row is not None:
+                if row.fingerprint != fingerprint:
+                    raise IdempotencyKeyReused()
+                if row.status_code is not None:
+                    stored = {'fingerprint': row.fingerprint, 'status': row.status_code,
+                              'data': json.loads(row.response_body)}
+                    cache.set(cache_key, stored, timeout=max(1, int((row.expires_at - now).total_seconds())))
+                    _replay(stored, fingerprint)
+                # Właściciel nie skończył w czasie IDEMPOTENCY_LOCK_TIMEOUT (np. zabity worker) – przejmujemy.
+                if row.locked_until <= now and keys.filter(
+                    pk=row.pk, status_code=None, locked_until=row.locked_until,
+                ).update(locked_until=locked_until):
+                    row.locked_until = locked_until
+                    return cls(row, cache_key)
+                raise IdempotencyKeyInProgress()
+
+    def _owned(self):
+        # Po przejęciu klucza przez ponowienie locked_until już się nie zgadza – nie ruszamy cudzego wiersza.
+        return IdempotencyKey.objects.using(DEFAULT_DB_ALIAS).filter(
+            pk=self.row.pk, status_code=None, locked_until=self.row.locked_until,
+        )
+
+    def finish(self, response):
+        """Zapisuje odpowiedź (poza 5xx, 409 i 429 – wtedy zwalnia klucz do ponowienia)."""
+        code = response.status_code
+        if code >= 500 or code in _UNSTORED_STATUSES:
+            self.release()
+            return
+        body = json.dumps(response.data, cls=DjangoJSONEncoder)
+        if self._owned().update(status_code=code, response_body=body):
+            cache.set(
+                self.cache_key,
+                {'fingerprint': self.row.fingerprint, 'status': code, 'data': json.loads(body)},
+                timeout=settings.IDEMPOTENCY_KEY_TTL,
+            )
+
+    def release(self):
+        self._owned().delete()
+
+
+def _replay(stored, fingerprint):
+    if stored['fingerprint'] != fingerprint:
+        raise IdempotencyKeyReused()
+    raise _Replay(stored)
+
+
+class IdempotentWritesMixin:
+    """
+    Domieszka APIView obsługująca nagłówek Idempotency-Key w metodach zapisu.
+
+    Klucz jest sprawdzany po uwierzytelnieniu i uprawnieniach (zakres użytkownika),
+    a przed throttlingiem – powtórzenie nie zużywa limitu żądań.
+    """
+    idempotent_methods = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+    def check_throttles(self, request):
+        self.idempotent_request = None
+        if request.method in self.idempotent_methods:
+            self.idempotent_request = IdempotentRequest.begin(request)
+        super().check_throttles(request)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _Replay):
+            response = Response(exc.stored['data'], status=exc.stored['status'])
+            response['Idempotent-Replayed'] = 'true'
+            return response
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            # Nieobsłużony wyjątek (500) – finalize_response nie zostanie wywołane.
+            if getattr(self, 'idempotent_request', None) is not None:
+                self.idempotent_request.release()
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        idempotent_request = getattr(self, 'idempotent_request', None)
+        if idempotent_request is not None:
+            self.idempotent_request = None
+            idempotent_request.finish(response)
+        return response
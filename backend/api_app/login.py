@@ -0,0 +1,108 @@
+"""
+Skonsolidowana ścieżka logowania.
+
+Jedno zapytanie ładuje użytkownika, skrót hasła liczony jest w ograniczonej puli
+(api_app.hashing), a zapis po sukcesie to jeden UPDATE last_login (robi go odbiornik
+update_last_login sygnału user_logged_in; password zapisywane jest osobno tylko wtedy,
+gdy skrót wymaga przeliczenia po zmianie hashera lub jego parametrów).
+
+Ścieżka ta zastępuje ModelBackend, więc jest używana tylko wtedy, gdy
+AUTHENTICATION_BACKENDS zawiera wyłącznie ModelBackend. Przy innych backendach
+logowanie przechodzi przez django.contrib.auth.authenticate(). W obu przypadkach
+wysyłane są sygnały user_login_failed i user_logged_in.
+"""
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in, user_login_failed
+
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .hashing import run_hash
+
+SUCCESS = 'success'
+INACTIVE = 'inactive'
+INVALID_CREDENTIALS = 'invalid_credentials'
+
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+def _verify_password(user, raw_password):
+    """
+    Sprawdza hasło w puli haseł. Zwraca (czy_poprawne, nowy_skrót_lub_None).
+
+    Nowy skrót jest liczony tylko wtedy, gdy Django zgłosi potrzebę aktualizacji
+    (inny preferowany hasher lub zmienione parametry kosztu).
+    """
+    needs_rehash = []
+    is_correct = run_hash(check_password, raw_password, user.password, lambda _raw: needs_rehash.append(True))
+    if is_correct and needs_rehash:
+        return True, run_hash(make_password, raw_password)
+    return is_correct, None
+
+
+def _login_failed(username, request):
+    """Sygnał user_login_failed w tej samej postaci, w jakiej wysyła go authenticate()."""
+    user_login_failed.send(
+        sender=auth.__name__,
+        credentials={'username': username, 'password': '********************'},
+        request=request,
+    )
+
+
+def authenticate_login(username, password, request=None):
+    """
+    Uwierzytelnia użytkownika. Zwraca krotkę (status, użytkownik).
+
+    Status INACTIVE jest zwracany przed sprawdzeniem hasła – tak jak dotychczas,
+    aby frontend mógł zaproponować ponowne wysłanie linku aktywacyjnego.
+    Dla nieistniejącego użytkownika również liczony jest skrót, aby czas
+    odpowiedzi nie zdradzał istnienia konta (jak w ModelBackend).
+    """
+    if list(settings.AUTHENTICATION_BACKENDS) != [MODEL_BACKEND]:
+        return _authenticate_with_backends(username, password, request)
+
+    user = User.objects.filter(username=username).first()
+    if user is None:
+        run_hash(make_password, password)
+        _login_failed(username, request)
+        return INVALID_CREDENTIALS, None
+    if not user.is_active:
+        return INACTIVE, user
+
+    is_correct, new_hash = _verify_password(user, password)
+    if not is_correct:
+        _login_failed(username, request)
+        return INVALID_CREDENTIALS, None
+
+    if new_hash:
+        user.password = new_hash
+        user.save(update_fields=['password'])
+    user.backend = MODEL_BACKEND
+    user_logged_in.send(sender=user.__class__, request=request, user=user)
+    return SUCCESS, user
+
+
+def _authenticate_with_backends(username, password, request):
+    """
+    Logowanie przez skonfigurowane AUTHENTICATION_BACKENDS (bez puli haseł).
+
+    authenticate() sam wysyła user_login_failed; nieaktywne konto jest wykrywane
+    wcześniej, jak w ścieżce jednego zapytania.
+    """
+    existing = User.objects.filter(username=username).first()
+    if existing is not None and not existing.is_active:
+        return INACTIVE, existing
+    user = auth.authenticate(request, username=username, password=password)
+    if user is None:
+        return INVALID_CREDENTIALS, None
+    user_logged_in.send(sender=user.__class__, request=request, user=user)
+    return SUCCESS, user
+
+
+def issue_token_pair(user):
+    """Zwraca słownik {'refresh', 'access'} jak TokenObtainPairSerializer."""
+    refresh = RefreshToken.for_user(user)
+    return {'refresh': str(refresh), 'access': str(refresh.access_token)}
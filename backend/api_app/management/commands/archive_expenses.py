@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api_app.archive import archive_batch, archive_cutoff
+from api_app.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    """
+    Okresowa archiwizacja starych wydatków (uruchamiaj np. z crona raz na dobę).
+
+    W każdym shardzie przenosi partiami wydatki sprzed horyzontu (domyślnie
+    EXPENSE_ARCHIVE_MONTHS pełnych miesięcy) do ArchivedExpense i aktualizuje
+    sumy miesięczne. Każda partia to osobna, krótka transakcja.
+    """
+    help = "Przenosi wydatki starsze niż horyzont archiwum do tabeli archiwum."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, help="Horyzont w miesiącach (domyślnie EXPENSE_ARCHIVE_MONTHS).")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0, help="Przerwa (s) między partiami.")
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options['months'])
+        for alias in shard_aliases():
+            archived = 0
+            while True:
+                count = archive_batch(alias, cutoff, options['batch_size'])
+                if not count:
+                    break
+                archived += count
+                if options['pause']:
+                    time.sleep(options['pause'])
+            self.stdout.write(f"{alias}: zarchiwizowano wydatków sprzed {cutoff}: {archived}.")
@@ -0,0 +1,91 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api_app.analytics import get_expense_analytics
+from api_app.catalogue import get_category_catalogue
+from api_app.expense_stats import analyse, expense_columns
+from api_app.models import Expense
+
+BENCH_USERNAME = 'benchanalytics'
+
+
+class Command(BaseCommand):
+    """
+    Benchmark analizy wydatków (/api/expenses/analytics/) dla jednego użytkownika.
+
+    Wstawia użytkownikowi N wydatków (domyślnie 100 tys.) rozłożonych na podaną
+    liczbę lat i mierzy osobno: pobranie kolumn z bazy, obliczenia NumPy, pełne
+    liczenie bez cache oraz odczyt wyniku z cache. Uruchamiaj na bazie testowej.
+    """
+    help = "Mierzy czas analizy wydatków przy N wydatkach jednego użytkownika."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--expenses', type=int, default=100_000)
+        parser.add_argument('--years', type=int, default=3)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--keep', action='store_true', help="Nie usuwaj wstawionych wydatków.")
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME, defaults={'email': f'{BENCH_USERNAME}@example.com'})
+        expenses = Expense.objects.for_user(user)
+        existing = expenses.count()
+        if existing < options['expenses']:
+            started = time.perf_counter()
+            self._insert(user, options['expenses'] - existing, options['years'], options['batch_size'])
+            self.stdout.write(f"Wstawiono {options['expenses'] - existing} wydatków w {time.perf_counter() - started:.1f} s.")
+
+        today = timezone.localdate()
+        names = {category['id']: category['name'] for category in get_category_catalogue()}
+        columns = expense_columns(user)
+        self.stdout.write(f"Użytkownik {BENCH_USERNAME}: {len(columns.ids)} wydatków, powtórzeń {options['repeat']}.")
+
+        repeat = options['repeat']
+        self._time("pobranie kolumn z bazy", repeat, lambda: expense_columns(user))
+        self._time("obliczenia NumPy", repeat, lambda: analyse(columns, today, names))
+        self._time("bez cache (kolumny + obliczenia)", repeat, lambda: self._uncached(user))
+        self._time("z cache", repeat, lambda: get_expense_analytics(user))
+
+        if not options['keep']:
+            # _raw_delete bez sygnałów – inaczej każdy wiersz zmieniałby wersję analizy.
+            expenses._raw_delete(expenses.db)
+            user.delete()
+
+    def _uncached(self, user):
+        cache.clear()
+        return get_expense_analytics(user)
+
+    def _time(self, label, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f"  {label:<34} mediana {statistics.median(timings):9.2f} ms, min {min(timings):9.2f} ms"
+        )
+
+    def _insert(self, user, count, years, batch_size):
+        # bulk_create nie wysyła post_save, więc nie powstają zdarzenia ani unieważnienia.
+        categories = [None] + [category['id'] for category in get_category_catalogue()]
+        today = timezone.localdate()
+        days = years * 365
+        rng = random.Random(0)
+        manager = Expense.objects.for_user(user)
+        for offset in range(0, count, batch_size):
+            manager.bulk_create(
+                Expense(
+                    user=user,
+                    category_id=rng.choice(categories),
+                    amount=f'{rng.lognormvariate(3.5, 0.8):.2f}',
+                    date=today - timedelta(days=rng.randrange(days)),
+                )
+                for _ in range(min(batch_size, count - offset))
+            )
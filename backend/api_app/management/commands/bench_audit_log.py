@@ -0,0 +1,60 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+
+from api_app.audit import AuditBuffer
+from api_app.models import ModeratorAuditEvent
+
+BENCH_USERNAME = 'benchaudit'
+
+
+class Command(BaseCommand):
+    """
+    Benchmark dziennika działań moderatorów: koszt zapisu w ścieżce żądania.
+
+    Porównuje synchroniczne create() (wiersz na żądanie) z dopisaniem zdarzenia
+    do bufora (AuditBuffer.record) i zapisem bufora partiami (flush), a na koniec
+    sprawdza, że bufor nie rośnie ponad AUDIT_BUFFER_SIZE. Wpisy audytu są tylko
+    do dopisywania, więc uruchamiaj na bazie testowej.
+    """
+    help = "Porównuje synchroniczny zapis wpisów audytu z buforem zapisywanym partiami."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=5000)
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        count = options['events']
+        actor, _ = User.objects.get_or_create(username=BENCH_USERNAME, defaults={'email': f'{BENCH_USERNAME}@example.com'})
+
+        def event():
+            return ModeratorAuditEvent(actor_id=actor.pk, actor_username=actor.username,
+                                       action=ModeratorAuditEvent.VIEW, target_id=actor.pk, status_code=200)
+
+        started = time.perf_counter()
+        for _ in range(count):
+            event().save()
+        sync = time.perf_counter() - started
+
+        # Bez wątku w tle – flush jest mierzony osobno, w bieżącym wątku.
+        with override_settings(AUDIT_BATCH_SIZE=options['batch_size'], AUDIT_BUFFER_SIZE=count):
+            buffer = AuditBuffer(background=False)
+            started = time.perf_counter()
+            for _ in range(count):
+                buffer.record(event())
+            buffered = time.perf_counter() - started
+            started = time.perf_counter()
+            written = buffer.flush()
+            flushed = time.perf_counter() - started
+
+            overflow = sum(not buffer.record(event()) for _ in range(count + 100))
+            pending = buffer.pending()
+
+        self.stdout.write(f"{count} zdarzeń, baza {connection.vendor}, partie po {options['batch_size']}:")
+        self.stdout.write(f"  create() na żądanie      {sync / count * 1e6:9.1f} µs/zdarzenie")
+        self.stdout.write(f"  record() w żądaniu       {buffered / count * 1e6:9.1f} µs/zdarzenie")
+        self.stdout.write(f"  flush() partiami         {flushed / max(written, 1) * 1e6:9.1f} µs/zdarzenie ({written} zapisanych)")
+        self.stdout.write(f"  pełny bufor: {pending} oczekujących, {overflow} pominiętych z {count + 100}")
@@ -0,0 +1,138 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api_app.archive import category_totals
+from api_app.catalogue import get_category_subtrees
+from api_app.category_tree import rollup_totals
+from api_app.models import Category, CategoryClosure, Expense
+
+BENCH_USERNAME = 'benchcategorytree'
+PREFIX = 'bench_tree'
+
+
+class Command(BaseCommand):
+    """
+    Benchmark drzewa kategorii z tabelą domknięcia dla dwóch kształtów drzewa:
+    głębokiego (łańcuch --depth kategorii) i szerokiego (--width podkategorii
+    pod każdą z --roots kategorii głównych).
+
+    Mierzy: utworzenie kategorii (aktualizacja domknięcia), przeniesienie poddrzewa,
+    zwinięcie sum wszystkich kategorii z mapy poddrzew (z cache i bez) w porównaniu
+    z rekurencyjnym liczeniem poddrzewa po Category.parent (zapytanie na węzeł) oraz sumę
+    poddrzewa z --expenses wydatków jednym zapytaniem. Uruchamiaj na bazie testowej.
+    """
+    help = "Mierzy utrzymanie tabeli domknięcia kategorii i koszt podsumowań poddrzew."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--depth', type=int, default=100)
+        parser.add_argument('--roots', type=int, default=20)
+        parser.add_argument('--width', type=int, default=100)
+        parser.add_argument('--expenses', type=int, default=20_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME, defaults={'email': f'{BENCH_USERNAME}@example.com'})
+        self.repeat = options['repeat']
+        try:
+            self.stdout.write(f"Drzewo głębokie: łańcuch {options['depth']} kategorii")
+            chain = self._create([(None, options['depth'])], chained=True)
+            self._time("przeniesienie połowy łańcucha", lambda: self._move(chain[len(chain) // 2], None))
+            self._measure(user, chain[0], chain, options['expenses'])
+            self._cleanup(user)
+
+            self.stdout.write(
+                f"Drzewo szerokie: {options['roots']} kategorii głównych po {options['width']} podkategorii"
+            )
+            roots = self._create([(None, options['roots'])])
+            leaves = self._create([(root, options['width']) for root in roots])
+            self._time("przeniesienie kategorii z podkategoriami", lambda: self._move(roots[0], roots[1]))
+            self._measure(user, roots[1], roots + leaves, options['expenses'])
+        finally:
+            self._cleanup(user)
+            user.delete()
+
+    def _create(self, groups, chained=False):
+        """Tworzy kategorie (parent, liczba); z `chained` każda jest rodzicem następnej."""
+        created = []
+        timings = []
+        for parent, count in groups:
+            for _ in range(count):
+                started = time.perf_counter()
+                category = Category.objects.create(name=f'{PREFIX}_{time.time_ns()}', parent=parent)
+                timings.append((time.perf_counter() - started) * 1000)
+                created.append(category)
+                if chained:
+                    parent = category
+        label = f"utworzenie kategorii ({len(created)})"
+        self.stdout.write(
+            f"  {label:<44} mediana {statistics.median(timings):8.2f} ms, max {max(timings):8.2f} ms; "
+            f"wierszy domknięcia {CategoryClosure.objects.count()}"
+        )
+        return created
+
+    def _move(self, category, target):
+        # Tam i z powrotem – drzewo po pomiarze jest takie samo.
+        original = category.parent
+        category.parent = target
+        category.save()
+        category.parent = original
+        category.save()
+
+    def _measure(self, user, root, categories, expenses):
+        today = timezone.localdate()
+        rng = random.Random(0)
+        Expense.objects.for_user(user).bulk_create(
+            Expense(user=user, category=rng.choice(categories), amount=f'{rng.uniform(1, 200):.2f}',
+                    date=today - timedelta(days=rng.randrange(today.day)))
+            for _ in range(expenses)
+        )
+        start = today.replace(day=1)
+        totals = category_totals(user, start, today)
+
+        def cold():
+            cache.clear()
+            return rollup_totals(totals, get_category_subtrees())
+
+        self._time("zwinięcie sum (mapa poddrzew z bazy)", cold)
+        self._time("zwinięcie sum (mapa poddrzew z cache)", lambda: rollup_totals(totals, get_category_subtrees()))
+        self.queries = 0
+        self._time("rekurencja po parent – jedno poddrzewo", lambda: self._recursive(root.pk, totals), repeat=1)
+        self.stdout.write(f"    zapytań w rekurencji: {self.queries}")
+        subtree = get_category_subtrees()[root.pk]
+        self._time(f"suma poddrzewa ({len(subtree)} kat., {expenses} wydatków)",
+                   lambda: category_totals(user, start, today, category_ids=subtree))
+
+    def _recursive(self, category_id, totals):
+        """Suma poddrzewa liczona bez domknięcia – jak przy rekurencji w każdym żądaniu."""
+        total = totals.get(category_id, 0)
+        self.queries += 1
+        for child_id in Category.objects.filter(parent_id=category_id).values_list('pk', flat=True):
+            total += self._recursive(child_id, totals)
+        return total
+
+    def _time(self, label, func, repeat=None):
+        timings = []
+        for _ in range(repeat or self.repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(f"  {label:<44} mediana {statistics.median(timings):8.2f} ms")
+
+    def _cleanup(self, user):
+        expenses = Expense.objects.for_user(user)
+        expenses._raw_delete(expenses.db)
+        # Kategorii z podkategoriami nie można usunąć – usuwamy od najgłębszych.
+        depths = {}
+        for descendant_id, depth in CategoryClosure.objects.filter(
+            descendant__name__startswith=PREFIX
+        ).values_list('descendant_id', 'depth'):
+            depths[descendant_id] = max(depth, depths.get(descendant_id, 0))
+        for depth in sorted(set(depths.values()), reverse=True):
+            Category.objects.filter(pk__in=[pk for pk, level in depths.items() if level == depth]).delete()
@@ -0,0 +1,99 @@
+import json
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from api_app.compression import available_encodings, stream_compressor
+
+LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 11), 'zstd': (1, 3, 19)}
+
+
+def expense_list_payload(count, seed=0):
+    """Lista wydatków w formacie ExpenseListView.get (pogrupowana wg daty)."""
+    rng = random.Random(seed)
+    grouped = []
+    day = date(2025, 6, 30)
+    remaining = count
+    while remaining > 0:
+        size = min(remaining, rng.randint(1, 4))
+        grouped.append({
+            'date': day.isoformat(),
+            'expenses': [
+                {'id': rng.randint(1, 10 ** 6), 'category': rng.randint(1, 8), 'amount': f"{rng.uniform(1, 500):.2f}"}
+                for _ in range(size)
+            ],
+        })
+        remaining -= size
+        day -= timedelta(days=1)
+    return grouped
+
+
+def moderator_users_payload(count, seed=0):
+    """Lista użytkowników w formacie ModeratorUserListView.get."""
+    rng = random.Random(seed)
+    first_names = ['Anna', 'Jan', 'Katarzyna', 'Piotr', 'Maria', 'Tomasz', 'Agnieszka', 'Paweł']
+    last_names = ['Nowak', 'Kowalski', 'Wiśniewska', 'Wójcik', 'Kamińska', 'Lewandowski']
+    return [
+        {
+            'id': i,
+            'first_name': rng.choice(first_names),
+            'last_name': rng.choice(last_names),
+            'username': f'user{i}_{rng.randint(100, 999)}',
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+class Command(BaseCommand):
+    """
+    Pomiar zysku i kosztu CPU kompresji na reprezentatywnych odpowiedziach JSON.
+
+    Dla listy wydatków i listy użytkowników moderatora o kilku rozmiarach raportuje
+    dla każdego dostępnego kodowania i poziomu: rozmiar po kompresji, oszczędność
+    bajtów i medianę czasu kompresji. Kolumna "strumień" podaje rozmiar przy
+    kompresji fragmentami (StreamingHttpResponse, flush po każdym fragmencie).
+    """
+    help = "Mierzy oszczędność bajtów i koszt CPU kompresji odpowiedzi API."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10,100,1000', help="Liczby elementów oddzielone przecinkami.")
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--chunk-items', type=int, default=50, help="Elementów na fragment strumienia.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Dostępne kodowania: {', '.join(available_encodings())}")
+        for label, builder in (('wydatki', expense_list_payload), ('moderator', moderator_users_payload)):
+            for count in [int(size) for size in options['sizes'].split(',')]:
+                items = builder(count)
+                body = json.dumps(items, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+                chunks = [
+                    json.dumps(items[i:i + options['chunk_items']], ensure_ascii=False).encode('utf-8')
+                    for i in range(0, len(items), options['chunk_items'])
+                ]
+                self.stdout.write(f"\n{label}, {count} elementów: {len(body)} B bez kompresji")
+                for encoding in available_encodings():
+                    for level in LEVELS[encoding]:
+                        self._report(encoding, level, body, chunks, options['repeat'])
+
+    def _report(self, encoding, level, body, chunks, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            compressor = stream_compressor(encoding, level)
+            compressed = compressor.compress(body) + compressor.finish()
+            timings.append(time.perf_counter() - started)
+
+        compressor = stream_compressor(encoding, level)
+        streamed = sum(len(compressor.compress(chunk) + compressor.flush()) for chunk in chunks)
+        streamed += len(compressor.finish())
+
+        saved = len(body) - len(compressed)
+        self.stdout.write(
+            f"  {encoding:<4} poziom {level:>2}: {len(compressed):>8} B "
+            f"(oszczędność {saved:>8} B, {100 * saved / len(body):5.1f}%), "
+            f"{statistics.median(timings) * 1e6:9.1f} µs, "
+            f"{len(body) / statistics.median(timings) / 2 ** 20:7.1f} MiB/s, strumień {streamed:>8} B"
+        )
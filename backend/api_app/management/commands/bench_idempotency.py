@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api_app.models import Expense
+from api_app.views.expenses import ExpenseListView
+
+BENCH_USERNAME = 'benchidempotency'
+
+
+class Command(BaseCommand):
+    """
+    Sprawdza i mierzy obsługę nagłówka Idempotency-Key w POST /api/expenses/.
+
+    1. Burza ponowień: N wątków wysyła jednocześnie to samo żądanie z tym samym
+       kluczem i – jak klient – ponawia je po 409 zgodnie z Retry-After. Musi
+       powstać dokładnie jeden wydatek, a wszystkie odpowiedzi 201 muszą być identyczne.
+    2. To samo w N osobnych procesach (jak workery gunicorna) – każdy ma własny
+       cache w pamięci, więc o jednym zapisie decyduje wyłącznie baza.
+    3. Powtórzenia po zakończeniu pierwszego żądania: więcej powtórzeń niż limit
+       zakresu 'expense' – żadne nie może dostać 429 ani wykonać zapytania SQL
+       (zapisana odpowiedź jest w cache procesu).
+    4. Ten sam klucz z inną treścią – 422.
+
+    Kończy się błędem przy duplikacie wydatku lub innym naruszeniu. Czyści cache,
+    więc uruchamiaj na bazie i cache testowym.
+    """
+    help = "Symuluje równoległe duplikaty żądań z Idempotency-Key i mierzy koszt powtórzeń."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--processes', type=int, default=6)
+        parser.add_argument('--replays', type=int, default=200)
+        # Tryb procesu potomnego w teście 2: jedno żądanie o czasie --start-at, wynik jako JSON.
+        parser.add_argument('--child-key', help=argparse.SUPPRESS)
+        parser.add_argument('--start-at', type=float, help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        self.view = ExpenseListView.as_view()
+        self.factory = APIRequestFactory()
+        if options['child_key']:
+            return self._child(options['child_key'], options['start_at'])
+        cache.clear()
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME, defaults={'email': f'{BENCH_USERNAME}@example.com'})
+        expenses = Expense.objects.for_user(user)
+        expenses.delete()
+        self.user = user
+        try:
+            self._concurrent(expenses, options['concurrency'])
+            self._processes(expenses, options['processes'])
+            self._replays(expenses, options['replays'])
+            self._reused_key()
+        finally:
+            expenses.delete()
+            user.delete()
+            cache.clear()
+
+    def _post(self, key, amount='12.34'):
+        body = {'category': None, 'amount': amount, 'date': str(timezone.localdate())}
+        request = self.factory.post('/api/expenses/', json.dumps(body), content_type='application/json',
+                                    HTTP_IDEMPOTENCY_KEY=key)
+        force_authenticate(request, user=self.user)
+        response = self.view(request)
+        response.render()
+        return response
+
+    def _post_until_done(self, key):
+        """Wysyła żądanie i ponawia je po 409 (żądanie w toku) po czasie z Retry-After."""
+        conflicts = 0
+        while True:
+            response = self._post(key)
+            if response.status_code != 409:
+                return response, conflicts
+            conflicts += 1
+            time.sleep(int(response['Retry-After']))
+
+    def _concurrent(self, expenses, concurrency):
+        key = uuid.uuid4().hex
+        barrier = threading.Barrier(concurrency)
+        responses = [None] * concurrency
+        conflicts = [0] * concurrency
+
+        def submit(index):
+            try:
+                barrier.wait()
+                responses[index], conflicts[index] = self._post_until_done(key)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=submit, args=(index,)) for index in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = (time.perf_counter() - started) * 1000
+
+        statuses = Counter(response.status_code for response in responses)
+        replayed = sum(response.get('Idempotent-Replayed') == 'true' for response in responses)
+        bodies = {response.content for response in responses if response.status_code == 201}
+        created = expenses.count()
+        self.stdout.write(
+            f"Burza ponowień: {concurrency} równoległych żądań w {elapsed:.0f} ms, "
+            f"statusy {dict(statuses)}, odpowiedzi 409 {sum(conflicts)}, powtórzonych odpowiedzi {replayed}, "
+            f"utworzonych wydatków {created}."
+        )
+        if created != 1:
+            raise CommandError(f"Oczekiwano jednego wydatku, utworzono {created}.")
+        if statuses[201] != concurrency or len(bodies) != 1:
+            raise CommandError("Równoległe duplikaty dostały różne odpowiedzi.")
+
+    def _processes(self, expenses, processes):
+        key = uuid.uuid4().hex
+        before = expenses.count()
+        # Procesy startują ok. sekundy (import Django) – wspólny moment wysłania żądania.
+        start_at = time.time() + 3
+        children = [
+            subprocess.Popen(
+                [sys.executable, 'manage.py', 'bench_idempotency', '--child-key', key, '--start-at', str(start_at)],
+                cwd=settings.BASE_DIR, env=os.environ.copy(), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+            for _ in range(processes)
+        ]
+        results = []
+        for child in children:
+            out, err = child.communicate(timeout=120)
+            if child.returncode:
+                raise CommandError(f"Proces potomny zakończył się błędem:\n{err[-2000:]}")
+            results.append(json.loads(out.strip().splitlines()[-1]))
+
+        statuses = Counter(result['status'] for result in results)
+        replayed = sum(result['replayed'] for result in results)
+        conflicts = sum(result['conflicts'] for result in results)
+        bodies = {result['body'] for result in results if result['status'] == 201}
+        created = expenses.count() - before
+        self.stdout.write(
+            f"Burza ponowień z {processes} procesów (osobne cache): statusy {dict(statuses)}, "
+            f"odpowiedzi 409 {conflicts}, powtórzonych odpowiedzi {replayed}, utworzonych wydatków {created}."
+        )
+        if created != 1:
+            raise CommandError(f"Oczekiwano jednego wydatku, procesy utworzyły {created}.")
+        if statuses[201] != processes or len(bodies) != 1:
+            raise CommandError("Duplikaty z różnych procesów dostały różne odpowiedzi.")
+
+    def _child(self, key, start_at):
+        self.user = User.objects.get(username=BENCH_USERNAME)
+        time.sleep(max(0.0, start_at - time.time()))
+        response, conflicts = self._post_until_done(key)
+        self.stdout.write(json.dumps({
+            'status': response.status_code,
+            'conflicts': conflicts,
+            'replayed': response.get('Idempotent-Replayed') == 'true',
+            'body': response.content.decode(),
+        }))
+
+    def _replays(self, expenses, replays):
+        key = uuid.uuid4().hex
+        started = time.perf_counter()
+        first = self._post(key, amount='45.60')
+        first_ms = (time.perf_counter() - started) * 1000
+
+        timings = []
+        statuses = Counter()
+        with ExitStack() as stack:
+            captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in {DEFAULT_DB_ALIAS, expenses.db}]
+            for _ in range(replays):
+                started = time.perf_counter()
+                response = self._post(key, amount='45.60')
+                timings.append((time.perf_counter() - started) * 1000)
+                statuses[response.status_code] += 1
+                if response.content != first.content:
+                    raise CommandError("Powtórzenie zwróciło inną odpowiedź niż pierwsze żądanie.")
+        query_count = sum(len(queries) for queries in captured)
+        self.stdout.write(
+            f"Powtórzenia: pierwsze żądanie {first_ms:.2f} ms, {replays} powtórzeń – mediana "
+            f"{statistics.median(timings):.2f} ms, statusy {dict(statuses)}, zapytań SQL {query_count}."
+        )
+        if statuses[201] != replays or query_count:
+            raise CommandError("Powtórzenia muszą zwracać zapisaną odpowiedź bez zapytań i bez limitu żądań.")
+        if expenses.count() != 3:
+            raise CommandError("Powtórzenia utworzyły dodatkowe wydatki.")
+
+    def _reused_key(self):
+        key = uuid.uuid4().hex
+        self._post(key, amount='1.00')
+        response = self._post(key, amount='2.00')
+        self.stdout.write(f"Ten sam klucz z inną treścią: status {response.status_code}.")
+        if response.status_code != 422:
+            raise CommandError("Ponowne użycie klucza z inną treścią powinno zwrócić 422.")
@@ -0,0 +1,78 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+
+from api_app import login
+from api_app.hashing import HashingBusy
+
+BENCH_PREFIX = 'bench_login_'
+BENCH_PASSWORD = 'Bench!Password1'
+
+
+class Command(BaseCommand):
+    """
+    Benchmark przepustowości logowania (api_app.login) dla wybranych hasherów.
+
+    Dla każdej konfiguracji tworzy użytkowników ze skrótem w danym algorytmie
+    i wykonuje współbieżne logowania (wątki jak w workerze gthread), raportując
+    logowania/s, opóźnienia p50/p95 oraz liczbę odrzuceń przez pełną pulę haseł.
+    Pomija throttling i back-off widoku – mierzy sam koszt ścieżki logowania.
+    """
+    help = "Mierzy przepustowość logowania dla hasherów PBKDF2/Argon2 i puli haseł."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hashers', default='pbkdf2,argon2', help="Lista konfiguracji oddzielona przecinkami.")
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=8)
+
+    def handle(self, *args, **options):
+        for name in options['hashers'].split(','):
+            preferred = settings.PASSWORD_HASHER_CHOICES[name]
+            hashers = [preferred] + [h for h in settings.PASSWORD_HASHER_CHOICES.values() if h != preferred]
+            with override_settings(PASSWORD_HASHERS=hashers):
+                self._run(name, options)
+
+    def _run(self, name, options):
+        User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+        encoded = make_password(BENCH_PASSWORD)
+        # bulk_create nie wysyła post_save, więc nie powstają e-maile aktywacyjne.
+        User.objects.bulk_create(
+            User(username=f'{BENCH_PREFIX}{i}', password=encoded, is_active=True)
+            for i in range(options['users'])
+        )
+
+        def attempt(index):
+            started = time.perf_counter()
+            try:
+                result, _user = login.authenticate_login(f'{BENCH_PREFIX}{index % options["users"]}', BENCH_PASSWORD)
+                if result == login.SUCCESS:
+                    login.issue_token_pair(_user)
+            except HashingBusy:
+                result = 'busy'
+            finally:
+                connection.close()
+            return result, (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            results = list(executor.map(attempt, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(ms for result, ms in results if result == login.SUCCESS)
+        busy = sum(1 for result, _ms in results if result == 'busy')
+        p95 = latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+        self.stdout.write(
+            f"{name:<8} {len(latencies) / elapsed:8.1f} logowań/s  "
+            f"p50 {statistics.median(latencies) if latencies else 0.0:7.1f} ms  p95 {p95:7.1f} ms  "
+            f"odrzucone (503): {busy}  [pula: {settings.PASSWORD_HASH_WORKERS} wątków, "
+            f"współbieżność: {options['concurrency']}]"
+        )
+        User.objects.filter(username__startswith=BENCH_PREFIX).delete()
@@ -0,0 +1,79 @@
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.test import RequestFactory, override_settings
+from django.urls import path
+
+# Stos middleware sprzed podziału na API / resztę – punkt odniesienia.
+FULL_MIDDLEWARE = [
+    'csp.middleware.CSPMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+
+def _view(request):
+    return JsonResponse({'ok': True})
+
+
+# Minimalny URLconf polecenia: widok nie robi nic, więc mierzony jest sam narzut middleware.
+urlpatterns = [
+    path('api/bench/', _view),
+    path('bench/', _view),
+]
+
+
+class Command(BaseCommand):
+    """
+    Benchmark narzutu middleware na żądanie.
+
+    Dla każdej konfiguracji buduje pełny handler WSGI (z process_view itd.) wokół
+    pustego widoku i mierzy średni czas żądania GET; narzut to różnica względem
+    handlera bez żadnego middleware. Żądania niosą ciasteczka sesji, CSRF i JWT
+    jak żądania z przeglądarki.
+    """
+    help = "Mierzy narzut middleware na żądanie dla ścieżek API i spoza API."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        configurations = [
+            ('bez middleware', [], '/api/bench/'),
+            ('pełny stos (poprzedni)', FULL_MIDDLEWARE, '/api/bench/'),
+            ('bieżący, ścieżka API', settings.MIDDLEWARE, '/api/bench/'),
+            ('bieżący, poza API', settings.MIDDLEWARE, '/bench/'),
+        ]
+        baseline = None
+        for name, middleware, url in configurations:
+            per_request_us = self._measure(middleware, url, options['requests'])
+            baseline = per_request_us if baseline is None else baseline
+            self.stdout.write(
+                f"{name:<26} {per_request_us:8.1f} µs/żądanie  narzut {per_request_us - baseline:7.1f} µs "
+                f"({len(middleware)} middleware)"
+            )
+
+    def _measure(self, middleware, url, requests):
+        with override_settings(MIDDLEWARE=middleware, ROOT_URLCONF=__name__, ALLOWED_HOSTS=['testserver']):
+            handler = WSGIHandler()
+            environ = RequestFactory().get(url, HTTP_HOST='testserver').environ
+            environ['HTTP_COOKIE'] = 'sessionid=benchsession; csrftoken=benchcsrftokenbenchcsrftoken12; access_token=bench'
+
+            def start_response(status, headers):
+                pass
+
+            for _ in range(min(200, requests)):
+                handler(dict(environ), start_response)
+            started = time.perf_counter()
+            for _ in range(requests):
+                handler(dict(environ), start_response)
+            return (time.perf_counter() - started) / requests * 1e6
@@ -0,0 +1,115 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from api_app.models import Expense, RecurringExpense
+from api_app.recurring import materialize_batch
+from api_app.sharding import shard_aliases
+
+# Reguły benchmarku należą do nieistniejących użytkowników z tego zakresu id.
+BENCH_USER_BASE = 10 ** 12 - 10 ** 7
+
+
+class Command(BaseCommand):
+    """
+    Benchmark planisty wydatków cyklicznych.
+
+    Wstawia N reguł (domyślnie milion) do wykonania – część z zaległościami
+    z ostatnich dni, jak po przestoju – i mierzy czas ich przetworzenia przez
+    `--workers` równoległych wątków (każdy z własnym połączeniem, jak osobne
+    procesy planisty). Następnie sprawdza, że liczba wydatków zgadza się z planem,
+    a ponowne uruchomienie niczego nie generuje. Uruchamiaj na bazie testowej;
+    na SQLite (bez SKIP LOCKED i równoległych zapisów) używaj jednego wątku.
+    """
+    help = "Mierzy czas przetworzenia N zaległych reguł wydatków cyklicznych."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rules', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--catch-up-days', type=int, default=3, help="Maksymalna zaległość reguł dziennych.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--window', type=float, default=600.0, help="Docelowy czas przetworzenia (s).")
+        parser.add_argument('--keep', action='store_true', help="Nie usuwaj reguł i wydatków.")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        alias = shard_aliases()[0]
+        rules = RecurringExpense.objects.using(alias).filter(user_id__gte=BENCH_USER_BASE)
+        expenses = Expense.objects.using(alias).filter(user_id__gte=BENCH_USER_BASE)
+
+        started = time.perf_counter()
+        expected = self._insert(alias, options, today)
+        self.stdout.write(
+            f"Wstawiono {options['rules']} reguł ({expected} wydatków do wygenerowania) "
+            f"w {time.perf_counter() - started:.1f} s."
+        )
+
+        started = time.perf_counter()
+        totals = self._run(alias, today, options['batch_size'], options['workers'])
+        elapsed = time.perf_counter() - started
+        verdict = 'mieści się w' if elapsed <= options['window'] else 'PRZEKRACZA'
+        self.stdout.write(
+            f"  {options['workers']} wątk(i), partie po {options['batch_size']}: reguł {totals[0]}, "
+            f"wydatków {totals[1]} w {elapsed:.1f} s ({totals[0] / elapsed:,.0f} reguł/s) – "
+            f"{verdict} oknie {options['window']:.0f} s"
+        )
+
+        generated = expenses.count()
+        again = materialize_batch(alias, today, options['batch_size'])
+        self.stdout.write(
+            f"  wydatków w bazie: {generated} (oczekiwano {expected}), "
+            f"ponowne uruchomienie: {again[1]} nowych wydatków"
+        )
+
+        if not options['keep']:
+            expenses._raw_delete(alias)
+            rules._raw_delete(alias)
+
+    def _insert(self, alias, options, today):
+        """Wstawia reguły; co trzecia dzienna ma zaległości. Zwraca liczbę oczekiwanych wydatków."""
+        expected = 0
+        batch = []
+        for index in range(options['rules']):
+            if index % 3 == 0:
+                interval, start = RecurringExpense.DAY, today - timedelta(days=index // 3 % options['catch_up_days'])
+                expected += (today - start).days + 1
+            else:
+                interval, start = RecurringExpense.MONTH, today
+                expected += 1
+            batch.append(RecurringExpense(
+                user_id=BENCH_USER_BASE + index % options['users'], amount='49.99',
+                interval=interval, start_date=start, next_run=start,
+            ))
+            if len(batch) == 10000:
+                RecurringExpense.objects.using(alias).bulk_create(batch)
+                batch = []
+        RecurringExpense.objects.using(alias).bulk_create(batch)
+        return expected
+
+    def _run(self, alias, today, batch_size, workers):
+        totals = [0, 0]
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                while True:
+                    rules, expenses = materialize_batch(alias, today, batch_size)
+                    if not rules:
+                        return
+                    with lock:
+                        totals[0] += rules
+                        totals[1] += expenses
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return totals
@@ -0,0 +1,76 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api_app.emails import users_by_email
+from api_app.serializers import RegisterSerializer
+
+BENCH_PREFIX = 'benchreg'
+
+
+class Command(BaseCommand):
+    """
+    Benchmark walidacji rejestracji przy dużej tabeli użytkowników.
+
+    Wstawia N użytkowników (domyślnie milion), wypisuje plan zapytania o znormalizowany
+    e-mail i mierzy średni czas RegisterSerializer.is_valid() (w tym jedno zapytanie
+    o unikalność nazwy i e-maila) dla nowych i zajętych danych. Dla porównania mierzy
+    też dawne wyszukiwanie email__iexact. Uruchamiaj na bazie testowej.
+    """
+    help = "Mierzy czas walidacji rejestracji (unikalność e-maila i nazwy) przy N użytkownikach."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--attempts', type=int, default=200)
+        parser.add_argument('--keep', action='store_true', help="Nie usuwaj wstawionych użytkowników.")
+
+    def handle(self, *args, **options):
+        existing = User.objects.filter(username__startswith=BENCH_PREFIX).count()
+        if existing < options['users']:
+            started = time.perf_counter()
+            self._insert(existing, options['users'], options['batch_size'])
+            self.stdout.write(f"Wstawiono {options['users'] - existing} użytkowników w {time.perf_counter() - started:.1f} s.")
+
+        probe = f'{BENCH_PREFIX}{options["users"] // 2}@Example.COM'
+        self.stdout.write("EXPLAIN wyszukiwania po znormalizowanym e-mailu:")
+        self.stdout.write(users_by_email(probe).explain())
+
+        attempts = options['attempts']
+        self._time("is_valid() – nowe dane", attempts, lambda i: self._validate(f'{BENCH_PREFIX}new{i}'))
+        self._time("is_valid() – zajęty e-mail", attempts, lambda i: self._validate(f'{BENCH_PREFIX}{i}'))
+        # Wolny adres to typowy przypadek rejestracji – bez indeksu wymaga pełnego skanu.
+        self._time("users_by_email() – wolny", attempts, lambda i: users_by_email(f'{BENCH_PREFIX}free{i}@example.com').exists())
+        self._time("email__iexact – wolny", attempts, lambda i: User.objects.filter(email__iexact=f'{BENCH_PREFIX}free{i}@example.com').exists())
+
+        if not options['keep']:
+            User.objects.filter(username__startswith=BENCH_PREFIX)._raw_delete(User.objects.db)
+
+    def _validate(self, name):
+        serializer = RegisterSerializer(data={
+            'username': name,
+            'email': f'{name}@Example.com',
+            'first_name': 'Bench',
+            'last_name': 'User',
+            'password': 'Bench!Password1',
+            'password2': 'Bench!Password1',
+        })
+        return serializer.is_valid()
+
+    def _time(self, label, attempts, func):
+        started = time.perf_counter()
+        for index in range(attempts):
+            func(index)
+        per_attempt_ms = (time.perf_counter() - started) / attempts * 1000
+        self.stdout.write(f"  {label:<28} {per_attempt_ms:8.3f} ms")
+
+    def _insert(self, start, count, batch_size):
+        # bulk_create nie wysyła post_save, więc nie powstają e-maile aktywacyjne.
+        with transaction.atomic():
+            for offset in range(start, count, batch_size):
+                User.objects.bulk_create(
+                    User(username=f'{BENCH_PREFIX}{i}', email=f'{BENCH_PREFIX}{i}@example.com', password='!')
+                    for i in range(offset, min(offset + batch_size, count))
+                )
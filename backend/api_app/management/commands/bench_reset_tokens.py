@@ -0,0 +1,84 @@
+import secrets
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from django_rest_passwordreset.models import ResetPasswordToken
+
+from api_app.management.commands.prune_reset_tokens import prune_expired_reset_tokens
+from api_app.views.password_reset import reset_token_cutoff
+
+BENCH_USERNAME = 'bench_reset_tokens'
+
+
+class Command(BaseCommand):
+    """
+    Benchmark tabeli tokenów resetowania hasła.
+
+    Wstawia N przeterminowanych tokenów (domyślnie milion) oraz pulę świeżych,
+    wypisuje plany zapytań (EXPLAIN) dla wyszukiwania po kluczu i po dacie
+    utworzenia, mierzy czas wyszukiwania tokenu, a na końcu czas partiowego
+    czyszczenia. Uruchamiaj na bazie testowej – polecenie tworzy i usuwa
+    własnego użytkownika oraz jego tokeny.
+    """
+    help = "Benchmark wyszukiwania i czyszczenia tokenów resetowania hasła przy dużej liczbie przeterminowanych wierszy."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tokens', type=int, default=1_000_000, help="Liczba przeterminowanych tokenów.")
+        parser.add_argument('--fresh', type=int, default=1000, help="Liczba świeżych tokenów.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--lookups', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        # bulk_create nie wysyła post_save, więc nie powstaje e-mail aktywacyjny.
+        User.objects.filter(username=BENCH_USERNAME).delete()
+        User.objects.bulk_create([User(username=BENCH_USERNAME, is_active=False)])
+        user = User.objects.get(username=BENCH_USERNAME)
+
+        started = time.perf_counter()
+        self._insert(user, options['tokens'], options['batch_size'])
+        stale_at = reset_token_cutoff() - timedelta(days=1)
+        ResetPasswordToken.objects.filter(user=user).update(created_at=stale_at)
+        fresh_keys = self._insert(user, options['fresh'], options['batch_size'])
+        self.stdout.write(
+            f"Wstawiono {options['tokens']} przeterminowanych i {options['fresh']} świeżych tokenów "
+            f"w {time.perf_counter() - started:.1f} s."
+        )
+
+        self.stdout.write("EXPLAIN wyszukiwania po kluczu:")
+        self.stdout.write(ResetPasswordToken.objects.filter(key=fresh_keys[0]).explain())
+        self.stdout.write("EXPLAIN wyboru partii do usunięcia:")
+        self.stdout.write(
+            ResetPasswordToken.objects.filter(created_at__lte=reset_token_cutoff())
+            .order_by('created_at').values('pk')[:options['batch_size']].explain()
+        )
+
+        lookups = options['lookups']
+        started = time.perf_counter()
+        for index in range(lookups):
+            ResetPasswordToken.objects.filter(key=fresh_keys[index % len(fresh_keys)]).first()
+        per_lookup_us = (time.perf_counter() - started) / lookups * 1e6
+        self.stdout.write(f"Wyszukiwanie tokenu po kluczu: {per_lookup_us:.1f} µs/zapytanie")
+
+        started = time.perf_counter()
+        deleted = prune_expired_reset_tokens(options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"Usunięto {deleted} tokenów w {elapsed:.1f} s ({deleted / max(elapsed, 1e-9):.0f} wierszy/s).")
+        self.stdout.write(f"Pozostało świeżych tokenów: {ResetPasswordToken.objects.filter(user=user).count()}")
+
+        user.delete()
+
+    def _insert(self, user, count, batch_size):
+        keys = []
+        with transaction.atomic():
+            for offset in range(0, count, batch_size):
+                batch = [
+                    ResetPasswordToken(user=user, key=secrets.token_hex(20))
+                    for _ in range(min(batch_size, count - offset))
+                ]
+                ResetPasswordToken.objects.bulk_create(batch)
+                keys.extend(token.key for token in batch[:10])
+        return keys
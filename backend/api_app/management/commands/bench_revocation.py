@@ -0,0 +1,154 @@
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import override_settings
+from django.utils import timezone
+
+from api_app.models import RevokedToken
+from api_app.revocation import RevocationFilter, revoke
+
+PREFIX = 'bench-revocation-'
+
+
+class Command(BaseCommand):
+    """
+    Benchmark i sprawdzenie filtra unieważnionych refresh tokenów (api_app.revocation).
+
+    Unieważnia --revoked tokenów, a potem dla --probes nieunieważnionych jti mierzy
+    sprawdzenie przez filtr Blooma (bez zapytań) i porównuje z zapytaniem do bazy na
+    każde sprawdzenie. Sprawdza też zachowanie przy fałszywych trafieniach: z filtrem
+    o dużym odsetku błędów (--error-rate) każde trafienie musi trafić do bazy i dać
+    wynik „nieunieważniony”, a unieważnione tokeny muszą być odrzucane zawsze. Na koniec
+    sprawdza, że drugi proces (osobny filtr) widzi unieważnienia z dziennika w cache
+    oraz – po wyczyszczeniu cache – z bazy, a także że z równoległych unieważnień
+    tego samego tokenu (dwie rotacje naraz) tylko jedno się udaje. Kończy się błędem, gdy któreś sprawdzenie
+    nie przejdzie. Uruchamiaj na bazie testowej.
+    """
+    help = "Mierzy koszt sprawdzania unieważnienia tokenów i sprawdza obsługę fałszywych trafień filtra."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--revoked', type=int, default=20_000)
+        parser.add_argument('--probes', type=int, default=20_000)
+        parser.add_argument('--error-rate', type=float, default=0.3,
+                            help="Odsetek fałszywych trafień filtra w teście fałszywych trafień.")
+
+    def handle(self, *args, **options):
+        cache.clear()
+        expires_at = timezone.now() + timedelta(days=1)
+        revoked = [f'{PREFIX}{uuid.uuid4().hex}' for _ in range(options['revoked'])]
+        probes = [f'{PREFIX}{uuid.uuid4().hex}' for _ in range(options['probes'])]
+        RevokedToken.objects.bulk_create(RevokedToken(jti=jti, expires_at=expires_at) for jti in revoked)
+        self.failures = []
+        try:
+            self._measure(revoked, probes)
+            with override_settings(REVOCATION_FILTER_CAPACITY=1, REVOCATION_FILTER_ERROR_RATE=options['error_rate']):
+                self._false_positives(revoked, probes, options['error_rate'])
+            self._sync(expires_at)
+            self._concurrent(expires_at)
+        finally:
+            RevokedToken.objects.filter(jti__startswith=PREFIX).delete()
+            cache.clear()
+        if self.failures:
+            raise CommandError("Nie przeszły sprawdzenia: " + "; ".join(self.failures))
+        self.stdout.write("Wszystkie sprawdzenia unieważniania tokenów przeszły.")
+
+    @contextmanager
+    def _count_queries(self):
+        # Licznik zamiast CaptureQueriesContext – dziennik zapytań Django mieści tylko 9000 wpisów.
+        counter = [0]
+
+        def count(execute, sql, params, many, context):
+            counter[0] += 1
+            return execute(sql, params, many, context)
+
+        with connections[DEFAULT_DB_ALIAS].execute_wrapper(count):
+            yield counter
+
+    def _check(self, ok, label):
+        self.stdout.write(f"  [{'OK' if ok else 'BŁĄD'}] {label}")
+        if not ok:
+            self.failures.append(label)
+
+    def _measure(self, revoked, probes):
+        revocations = RevocationFilter()
+        started = time.perf_counter()
+        revocations.sync(force=True)
+        built = time.perf_counter() - started
+
+        with self._count_queries() as queries:
+            started = time.perf_counter()
+            found = [jti for jti in probes if revocations.is_revoked(jti)]
+            filtered = time.perf_counter() - started
+        queries = queries[0]
+
+        started = time.perf_counter()
+        for jti in probes:
+            RevokedToken.objects.filter(jti=jti).exists()
+        direct = time.perf_counter() - started
+
+        self.stdout.write(f"{len(revoked)} unieważnionych, {len(probes)} sprawdzeń nieunieważnionych jti:")
+        self.stdout.write(f"  budowa filtra z bazy       {built * 1000:9.1f} ms")
+        self.stdout.write(f"  filtr Blooma               {filtered / len(probes) * 1e6:9.1f} µs/sprawdzenie, "
+                          f"{queries} zapytań ({queries / len(probes):.2%} fałszywych trafień)")
+        self.stdout.write(f"  zapytanie na sprawdzenie   {direct / len(probes) * 1e6:9.1f} µs/sprawdzenie")
+        self._check(not found, "nieunieważnione jti nie są odrzucane")
+        self._check(all(revocations.is_revoked(jti) for jti in revoked[:1000]), "unieważnione jti są odrzucane")
+
+    def _false_positives(self, revoked, probes, error_rate):
+        revocations = RevocationFilter()
+        revocations.sync(force=True)
+        hits = [jti for jti in probes if revocations.might_contain(jti)]
+        self.stdout.write(f"Filtr z odsetkiem błędów {error_rate:.0%}: {len(hits)} fałszywych trafień "
+                          f"na {len(probes)} ({len(hits) / len(probes):.1%})")
+        self._check(bool(hits), "filtr daje fałszywe trafienia")
+        with self._count_queries() as queries:
+            rejected = [jti for jti in hits if revocations.is_revoked(jti)]
+        self._check(not rejected, "fałszywe trafienia nie odrzucają tokenów")
+        self._check(queries[0] == len(hits), "każde fałszywe trafienie sprawdza baza (1 zapytanie)")
+        self._check(all(revocations.is_revoked(jti) for jti in revoked[:1000]), "unieważnione jti są nadal odrzucane")
+
+    def _sync(self, expires_at):
+        self.stdout.write("Synchronizacja między procesami:")
+        other = RevocationFilter()
+        other.sync(force=True)
+        jti = f'{PREFIX}{uuid.uuid4().hex}'
+        revoke({'jti': jti, 'exp': int(expires_at.timestamp())})
+        with self._count_queries() as queries:
+            other.sync(force=True)
+            seen = other.might_contain(jti)
+        self._check(seen and not queries[0], "drugi proces pobiera unieważnienie z dziennika w cache, bez bazy")
+
+        cache.clear()
+        other = RevocationFilter()
+        other.sync(force=True)
+        jti = f'{PREFIX}{uuid.uuid4().hex}'
+        revoke({'jti': jti, 'exp': int(expires_at.timestamp())})
+        cache.clear()
+        other.sync(force=True)
+        self._check(other.is_revoked(jti), "po wyczyszczeniu cache filtr buduje się z bazy")
+
+    def _concurrent(self, expires_at, threads=8):
+        token = {'jti': f'{PREFIX}{uuid.uuid4().hex}', 'exp': int(expires_at.timestamp())}
+        barrier = threading.Barrier(threads)
+        results = []
+
+        def rotate():
+            try:
+                barrier.wait()
+                results.append(revoke(token))
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=rotate) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self._check(results.count(True) == 1 and len(results) == threads,
+                    f"z {threads} równoległych unieważnień tego samego tokenu udaje się jedno ({results.count(True)})")
@@ -0,0 +1,83 @@
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Kod wykonywany w świeżym interpreterze: import aplikacji WSGI (django.setup())
+# oraz załadowanie URLconf, czyli to, co dzieje się przy zimnym starcie.
+BOOT_SNIPPET = (
+    "import myproject.wsgi\n"
+    "from django.urls import get_resolver\n"
+    "get_resolver().url_patterns\n"
+)
+
+
+def _parse_importtime(stderr):
+    """
+    Parsuje wyjście `python -X importtime`.
+
+    Zwraca krotkę (suma czasów 'self' w µs, słownik pakiet -> suma czasów 'self' w µs),
+    gdzie pakiet to pierwszy człon nazwy modułu (np. 'rest_framework').
+    """
+    total_self = 0
+    by_package = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _cumulative_us, module = line[len('import time:'):].split('|', 2)
+        package = module.strip().split('.', 1)[0]
+        total_self += int(self_us)
+        by_package[package] = by_package.get(package, 0) + int(self_us)
+    return total_self, by_package
+
+
+class Command(BaseCommand):
+    """
+    Benchmark zimnego startu backendu oparty o `python -X importtime`.
+
+    Uruchamia kilkukrotnie świeży proces Pythona, który importuje aplikację WSGI
+    i ładuje URLconf, mierzy łączny czas importów i czas ścienny, a następnie
+    wypisuje pakiety o największym koszcie. Kończy się błędem, jeżeli mediana
+    czasu importów przekroczy budżet (--budget-ms lub STARTUP_IMPORT_BUDGET_MS).
+    """
+    help = "Mierzy czas zimnego startu (importtime) i kończy się błędem przy regresji."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--top', type=int, default=15, help="Liczba najdroższych pakietów do wypisania.")
+        parser.add_argument(
+            '--budget-ms', type=float,
+            default=getattr(settings, 'STARTUP_IMPORT_BUDGET_MS', None),
+            help="Maksymalna mediana czasu importów w ms.",
+        )
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'myproject.settings')}
+        import_totals, wall_totals = [], []
+        by_package = {}
+        for _ in range(options['runs']):
+            started = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', BOOT_SNIPPET],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            wall_totals.append((time.perf_counter() - started) * 1000)
+            if proc.returncode != 0:
+                raise CommandError(f"Start procesu nie powiódł się:\n{proc.stderr[-2000:]}")
+            total_self, by_package = _parse_importtime(proc.stderr)
+            import_totals.append(total_self / 1000)
+
+        median_import = statistics.median(import_totals)
+        self.stdout.write(f"Importy (mediana z {options['runs']}): {median_import:.1f} ms")
+        self.stdout.write(f"Czas ścienny procesu (mediana): {statistics.median(wall_totals):.1f} ms")
+        self.stdout.write("Najdroższe pakiety (suma czasów 'self', ostatni przebieg):")
+        for package, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:options['top']]:
+            self.stdout.write(f"  {us / 1000:8.1f} ms  {package}")
+
+        budget = options['budget_ms']
+        if budget is not None and median_import > budget:
+            raise CommandError(f"Regresja zimnego startu: {median_import:.1f} ms > budżet {budget:.1f} ms.")
@@ -0,0 +1,62 @@
+import pickle
+import time
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from rest_framework.request import Request
+from rest_framework.throttling import ScopedRateThrottle
+
+from api_app.throttling import ScopedSlidingWindowThrottle
+
+
+class Command(BaseCommand):
+    """
+    Mikro-benchmark throttlingu: ScopedRateThrottle (DRF) vs ScopedSlidingWindowThrottle.
+
+    Dla każdej klasy wykonuje N sprawdzeń allow_request dla jednego użytkownika
+    w podanym zakresie i raportuje średni czas sprawdzenia oraz rozmiar danych
+    przechowywanych w cache dla tego klucza (po serializacji pickle, tak jak
+    zapisują je backendy cache).
+    """
+    help = "Porównuje koszt sprawdzenia limitu i rozmiar stanu w cache dla obu klas throttlingu."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scope', default='user')
+        parser.add_argument('--requests', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        scope = options['scope']
+        request = Request(RequestFactory().get('/api/expenses/'))
+        request.user = SimpleNamespace(pk=987654321, is_authenticated=True)
+        view = SimpleNamespace(throttle_scope=scope)
+
+        self.stdout.write(f"Zakres '{scope}', {options['requests']} sprawdzeń, cache: {settings.CACHES['default']['BACKEND']}")
+        for throttle_class in (ScopedRateThrottle, ScopedSlidingWindowThrottle):
+            allowed = 0
+            started = time.perf_counter()
+            for _ in range(options['requests']):
+                throttle = throttle_class()
+                allowed += throttle.allow_request(request, view)
+            per_check_us = (time.perf_counter() - started) / options['requests'] * 1e6
+
+            stored = self._stored_state(throttle)
+            self.stdout.write(
+                f"  {throttle_class.__name__:<30} {per_check_us:8.1f} µs/sprawdzenie, "
+                f"przepuszczono {allowed}, stan w cache: {stored} B"
+            )
+            self._cleanup(throttle)
+
+    def _stored_state(self, throttle):
+        if isinstance(throttle, ScopedSlidingWindowThrottle):
+            window = int(throttle.timer() // throttle.duration)
+            values = [cache.get(f'{throttle.key}_{w}') for w in (window - 1, window)]
+            return sum(len(pickle.dumps(v)) for v in values if v is not None)
+        return len(pickle.dumps(cache.get(throttle.key)))
+
+    def _cleanup(self, throttle):
+        window = int(throttle.timer() // throttle.duration)
+        cache.delete_many([throttle.key, f'{throttle.key}_{window - 1}', f'{throttle.key}_{window}'])
@@ -0,0 +1,248 @@
+import http.client
+import itertools
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from http.cookies import SimpleCookie
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api_app.models import Category, Expense
+
+BENCH_PREFIX = 'benchworkers'
+PASSWORD = 'Workery!123x'
+
+# Scenariusze na istniejących endpointach: (nazwa, opis, ścieżka GET dla szybkich klientów).
+# W scenariuszu „mieszany” co piąty klient loguje się (skrót hasła, zapis last_login),
+# a pozostali sprawdzają sesję – widać, jak wolne żądania opóźniają szybkie.
+SCENARIOS = [
+    ('csrf', "GET /api/get-csrf-token/ (bez bazy)", '/api/get-csrf-token/'),
+    ('sesja', "GET /api/is-logged-in/ (JWT + 1 zapytanie)", '/api/is-logged-in/'),
+    ('panel', "GET /api/dashboard/ (kategorie, wydatki, podsumowanie)", '/api/dashboard/'),
+    ('mieszany', "GET /api/is-logged-in/ + co piąty klient POST /api/auth/token/", '/api/is-logged-in/'),
+]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    """
+    Macierz porównawcza modeli workerów gunicorna (sync, gthread, uvicorn) z gunicorn.conf.py.
+
+    Dla każdego modelu uruchamia gunicorna na wolnym porcie (z autostrojeniem
+    z gunicorn.conf.py albo z --workers/--threads), a potem przez --duration sekund
+    obciąża go --concurrency klientami z połączeniami keep-alive w każdym ze
+    scenariuszy (SCENARIOS). Wypisuje przepustowość, medianę i p99 czasu odpowiedzi
+    oraz liczbę błędów i odpowiedzi 429.
+
+    Limity zapytań (throttling) są per użytkownik, więc żądania rozkładają się na
+    --users tymczasowych użytkowników; logowania w scenariuszu mieszanym mają różne
+    X-Forwarded-For. Generator obciążenia działa w tym samym hoście – przy małej
+    liczbie CPU konkuruje z serwerem, więc porównuj modele między sobą, a nie wartości
+    bezwzględne. Uruchamiaj na bazie testowej z DEBUG=True (Host: localhost).
+    """
+    help = "Porównuje modele workerów gunicorna (sync, gthread, uvicorn) na istniejących endpointach."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--models', default='sync,gthread,uvicorn')
+        parser.add_argument('--scenarios', default=','.join(name for name, _description, _path in SCENARIOS))
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--workers', type=int, help="Liczba procesów (domyślnie autostrojenie).")
+        parser.add_argument('--threads', type=int, help="Liczba wątków gthread (domyślnie autostrojenie).")
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--expenses', type=int, default=20, help="Wydatków na użytkownika.")
+
+    def handle(self, *args, **options):
+        models = options['models'].split(',')
+        scenarios = [scenario for scenario in SCENARIOS if scenario[0] in options['scenarios'].split(',')]
+        users = self._seed(options['users'], options['expenses'])
+        rows = []
+        try:
+            for model in models:
+                rows.extend(self._run_model(model, scenarios, users, options))
+        finally:
+            self._cleanup()
+
+        self.stdout.write("")
+        self.stdout.write(f"{'scenariusz':<10} {'model':<8} {'procesy×wątki':>13} {'req/s':>8} "
+                          f"{'p50 ms':>8} {'p99 ms':>8} {'błędy':>6} {'429':>6}  żądania")
+        for row in rows:
+            self.stdout.write(
+                f"{row['scenario']:<10} {row['model']:<8} {row['size']:>13} {row['rate']:8.1f} "
+                f"{row['p50']:8.1f} {row['p99']:8.1f} {row['errors']:6d} {row['throttled']:6d}  {row['kind']}"
+            )
+
+    def _seed(self, count, expenses):
+        """Tworzy tymczasowych użytkowników (z jednym skrótem hasła) i ich wydatki."""
+        self._cleanup()
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            User(username=f'{BENCH_PREFIX}_{index}', email=f'{BENCH_PREFIX}_{index}@example.com', password=password)
+            for index in range(count)
+        )
+        users = list(User.objects.filter(username__startswith=f'{BENCH_PREFIX}_'))
+        category = Category.objects.order_by('pk').first()
+        if category is not None:
+            today = timezone.localdate()
+            for user in users:
+                Expense.objects.for_user(user).bulk_create(
+                    Expense(user=user, category=category, amount='12.50', date=today - timedelta(days=day % 28))
+                    for day in range(expenses)
+                )
+        return users
+
+    def _cleanup(self):
+        for user in User.objects.filter(username__startswith=f'{BENCH_PREFIX}_'):
+            expenses = Expense.objects.for_user(user)
+            expenses._raw_delete(expenses.db)
+            user.delete()
+
+    def _run_model(self, model, scenarios, users, options):
+        port = _free_port()
+        env = {
+            **os.environ,
+            'GUNICORN_WORKER_CLASS': model,
+            'GUNICORN_BIND': f'127.0.0.1:{port}',
+            'GUNICORN_ACCESS_LOG': '',
+            # Lokalnie zwykle bez Redis – endpointy z benchmarku działają też z cache per worker.
+            'GUNICORN_ALLOW_LOCAL_CACHE': '1',
+        }
+        if options['workers']:
+            env['GUNICORN_WORKERS'] = str(options['workers'])
+        if options['threads']:
+            env['GUNICORN_THREADS'] = str(options['threads'])
+
+        log = tempfile.TemporaryFile()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py'],
+            cwd=settings.BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+        try:
+            size = self._wait_ready(port, server, log)
+            self.stdout.write(f"Model {model}: {size} (port {port})")
+            csrf = self._csrf_cookie(port)
+            tokens = itertools.cycle([str(RefreshToken.for_user(user).access_token) for user in users])
+            logins = itertools.cycle(users)
+            addresses = itertools.count(1)
+            rows = []
+            for name, description, path in scenarios:
+                self.stdout.write(f"  {name}: {description}")
+
+                def fast(path=path):
+                    return 'szybkie', 'GET', path, {'Host': 'localhost', 'Cookie': f'access_token={next(tokens)}'}, None
+
+                def slow():
+                    user = next(logins)
+                    address = next(addresses)
+                    headers = {
+                        'Host': 'localhost', 'Content-Type': 'application/json',
+                        'Cookie': f'csrftoken={csrf}', 'X-CSRFToken': csrf,
+                        'X-Forwarded-For': f'10.{address >> 16 & 255}.{address >> 8 & 255}.{address & 255}',
+                    }
+                    return 'logowanie', 'POST', '/api/auth/token/', headers, json.dumps(
+                        {'username': user.username, 'password': PASSWORD})
+
+                picks = [slow if name == 'mieszany' and index % 5 == 0 else fast
+                         for index in range(options['concurrency'])]
+                results = self._load(port, picks, options['duration'])
+                for kind in sorted({kind for kind, _latency, _status in results}):
+                    latencies = sorted(latency for item_kind, latency, _status in results if item_kind == kind)
+                    statuses = [status for item_kind, _latency, status in results if item_kind == kind]
+                    rows.append({
+                        'scenario': name, 'model': model, 'size': size, 'kind': kind,
+                        'rate': len(latencies) / options['duration'],
+                        'p50': statistics.median(latencies) * 1000,
+                        'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+                        'errors': sum(status is None or status >= 500 for status in statuses),
+                        'throttled': statuses.count(429),
+                    })
+            return rows
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+            log.close()
+
+    def _wait_ready(self, port, server, log):
+        """Czeka na start gunicorna; zwraca „procesy×wątki” z jego logu."""
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                log.seek(0)
+                raise CommandError(f"Gunicorn nie wystartował:\n{log.read().decode(errors='replace')[-2000:]}")
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+                connection.request('GET', '/api/get-csrf-token/', headers={'Host': 'localhost'})
+                if connection.getresponse().status == 200:
+                    break
+            except OSError:
+                time.sleep(0.2)
+        else:
+            raise CommandError("Gunicorn nie odpowiada po 60 s.")
+        log.seek(0)
+        for line in log.read().decode(errors='replace').splitlines():
+            if 'Model workerów' in line:
+                _prefix, counts = line.split('procesy: ', 1)
+                workers, rest = counts.split(', wątki: ', 1)
+                return f"{workers}×{rest.split(',', 1)[0]}"
+        return '?'
+
+    def _csrf_cookie(self, port):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        connection.request('GET', '/api/get-csrf-token/', headers={'Host': 'localhost'})
+        response = connection.getresponse()
+        response.read()
+        cookie = SimpleCookie(response.getheader('Set-Cookie', ''))
+        return cookie[settings.CSRF_COOKIE_NAME].value
+
+    def _load(self, port, picks, duration):
+        """Uruchamia klienta na każdą funkcję z `picks`; zwraca [(rodzaj, czas s, status albo None)]."""
+        results = []
+        deadline = time.perf_counter() + duration
+
+        def client(pick):
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            while time.perf_counter() < deadline:
+                kind, method, path, headers, body = pick()
+                started = time.perf_counter()
+                # Worker restartowany po max_requests zamyka połączenia keep-alive –
+                # jak przeglądarka ponawiamy wtedy żądanie raz, na nowym połączeniu.
+                for _attempt in range(2):
+                    try:
+                        connection.request(method, path, body=body, headers=headers)
+                        response = connection.getresponse()
+                        response.read()
+                        status = response.status
+                        break
+                    except (OSError, http.client.HTTPException):
+                        status = None
+                        connection.close()
+                results.append((kind, time.perf_counter() - started, status))
+            connection.close()
+
+        threads = [threading.Thread(target=client, args=(pick,)) for pick in picks]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
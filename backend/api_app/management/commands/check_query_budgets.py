@@ -0,0 +1,102 @@
+import difflib
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from api_app.query_budgets import SCENARIOS, measure, normalize_sql, rolled_back, route_names, seed
+
+
+class Command(BaseCommand):
+    """
+    Strażnik liczby zapytań SQL dla każdej trasy z myproject/urls.py.
+
+    Na świeżej testowej bazie SQLite (w pamięci) dane są zasiewane w dwóch
+    rozmiarach, a każdy scenariusz jest wykonywany przy pustym cache w transakcji
+    wycofywanej po żądaniu. Błędem jest: liczba zapytań zależna od rozmiaru danych
+    (N+1 – wypisywany jest diff znormalizowanego SQL), przekroczenie limitu
+    scenariusza, nieoczekiwany status HTTP oraz trasa bez scenariusza. Polecenie
+    kończy się błędem, więc nadaje się do CI. Uruchamiaj z DB_ENGINE=sqlite3
+    (bez sieci, jak środowisko deweloperskie). Scenariusze i pomiar są wspólne
+    z testami (api_app.query_budgets, api_app.tests.test_query_budgets).
+    """
+    help = "Sprawdza, czy liczba zapytań SQL każdego endpointu mieści się w limicie i nie rośnie z danymi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='3,30', help="Dwa (lub więcej) rozmiary danych oddzielone przecinkami.")
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError("check_query_budgets działa na testowej bazie SQLite – ustaw DB_ENGINE=sqlite3.")
+        sizes = sorted({int(size) for size in options['sizes'].split(',')})
+        if len(sizes) < 2:
+            raise CommandError("Podaj co najmniej dwa różne rozmiary danych.")
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        # Oczekiwane odpowiedzi 4xx/5xx (np. 501 strumienia SSE) nie mają zaśmiecać wyniku.
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        try:
+            # Dziennik audytu zapisuje w wątku w tle – poza mierzonym połączeniem i transakcją.
+            with override_settings(ALLOWED_HOSTS=['testserver'], AUDIT_LOG_ENABLED=False):
+                failures = self._check(sizes)
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        if failures:
+            raise CommandError(f"Niespełnione budżety zapytań: {failures}.")
+        self.stdout.write(self.style.SUCCESS("Wszystkie endpointy mieszczą się w budżetach zapytań."))
+
+    def _check(self, sizes):
+        failures = 0
+        covered = {item.route for item in SCENARIOS}
+        for route in route_names():
+            if route not in covered:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"{route}: brak scenariusza w check_query_budgets."))
+
+        results = {item: {} for item in SCENARIOS}
+        for size in sizes:
+            with rolled_back():
+                data = seed(size)
+                for item in SCENARIOS:
+                    results[item][size] = measure(item, data)
+
+        for item, by_size in results.items():
+            counts = [len(queries) for _status, queries in by_size.values()]
+            statuses = {status for status, _queries in by_size.values()}
+            label = f"{item.method.upper():<6} {item.route}"
+            problems = []
+            if statuses != {item.status}:
+                problems.append(f"status {sorted(statuses)} zamiast {item.status}")
+            if len(set(counts)) > 1:
+                problems.append("liczba zapytań zależy od rozmiaru danych")
+            if max(counts) > item.budget:
+                problems.append(f"przekroczony budżet {item.budget}")
+
+            line = f"{label:<55} zapytania {'/'.join(map(str, counts)):<9} budżet {item.budget:>3}"
+            if not problems:
+                self.stdout.write(f"{line}  OK")
+                continue
+            failures += 1
+            self.stdout.write(self.style.ERROR(f"{line}  BŁĄD: {'; '.join(problems)}"))
+            self._explain(by_size[sizes[0]][1], by_size[sizes[-1]][1], sizes)
+        return failures
+
+    def _explain(self, small, large, sizes):
+        if len(small) != len(large):
+            diff = difflib.unified_diff(
+                [normalize_sql(query['sql']) for query in small],
+                [normalize_sql(query['sql']) for query in large],
+                fromfile=f'rozmiar {sizes[0]}', tofile=f'rozmiar {sizes[-1]}', lineterm='',
+            )
+            for line in diff:
+                self.stdout.write(f"    {line}")
+        else:
+            for query in large:
+                self.stdout.write(f"    {normalize_sql(query['sql'])}")
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api_app.sharding import orphaned_references, repair_orphans, shard_aliases
+
+
+class Command(BaseCommand):
+    """
+    Sprawdza odwołania modeli dzielonych (wydatki, limity, sumy…) do użytkowników i kategorii.
+
+    Z shardami te klucze obce nie mają ograniczeń w bazie, a usunięcie użytkownika
+    lub kategorii sprzątają sygnały (bez shardingu pilnuje tego baza). Polecenie wypisuje odwołania do
+    nieistniejących wierszy; z `--fix` naprawia je jak sygnały (SET_NULL albo
+    CASCADE), bez niego kończy się błędem (nadaje się do crona z alertem).
+    """
+    help = "Wykrywa i opcjonalnie naprawia osierocone wiersze modeli dzielonych."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Napraw osierocone wiersze.")
+
+    def handle(self, *args, **options):
+        total = 0
+        for alias in shard_aliases():
+            orphans = orphaned_references(alias)
+            for field, ids in orphans:
+                label = f"{field.model._meta.label}.{field.name}"
+                sample = ', '.join(str(pk) for pk in sorted(ids)[:10])
+                if options['fix']:
+                    rows = repair_orphans(alias, field, ids)
+                    self.stdout.write(f"  {alias} {label}: {len(ids)} brakujących id ({sample}), naprawiono wierszy: {rows}")
+                else:
+                    self.stdout.write(f"  {alias} {label}: {len(ids)} brakujących id ({sample})")
+            self.stdout.write(f"{alias}: osieroconych odwołań: {sum(len(ids) for _field, ids in orphans)}.")
+            total += sum(len(ids) for _field, ids in orphans)
+
+        if total and not options['fix']:
+            raise CommandError(f"Osierocone odwołania: {total} (uruchom z --fix).")
@@ -0,0 +1,105 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Kod uruchamiany w świeżym procesie: import handlera (zimny start kontenera),
+# a następnie odtwarzanie zdarzeń. Pierwsze wywołanie w procesie jest "zimne".
+RUNNER = r'''
+import json, sys, time
+config = json.load(sys.stdin)
+started = time.perf_counter()
+import myproject.lambda_handler as lh
+import_ms = (time.perf_counter() - started) * 1000
+
+cookie = None
+if config['username']:
+    from django.contrib.auth.models import User
+    from django.conf import settings
+    from rest_framework_simplejwt.tokens import AccessToken
+    token = AccessToken.for_user(User.objects.get(username=config['username']))
+    cookie = f"{settings.JWT_AUTH_COOKIE}={token}"
+
+results = {'import_ms': import_ms, 'init_ms': lh.INIT_DURATION_MS, 'events': []}
+for name, event in config['events']:
+    if cookie:
+        if event.get('version') == '2.0':
+            event.setdefault('cookies', []).append(cookie)
+        else:
+            event.setdefault('headers', {})['Cookie'] = cookie
+    timings, statuses, cold_flags = [], [], []
+    for _ in range(config['warm'] + 1):
+        t0 = time.perf_counter()
+        response = lh.handler(event, None)
+        timings.append((time.perf_counter() - t0) * 1000)
+        statuses.append(response['statusCode'])
+        cold_flags.append(response['headers'].get('X-Cold-Start') == '1')
+    results['events'].append({'name': name, 'timings': timings, 'statuses': statuses, 'cold': cold_flags})
+print(json.dumps(results))
+'''
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    """
+    Lokalny harness dla myproject.lambda_handler.
+
+    Odtwarza zdarzenia API Gateway (pliki JSON, format 1.0 lub 2.0) bez usług
+    chmurowych. Każdy przebieg "zimny" to nowy proces Pythona: mierzony jest
+    import handlera (inicjalizacja Django), pierwsze wywołanie oraz kolejne
+    ciepłe wywołania w tym samym procesie.
+    """
+    help = "Odtwarza zdarzenia API Gateway przez handler Lambda i raportuje czasy zimnego i ciepłego startu."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'events', nargs='*',
+            help="Pliki zdarzeń JSON (domyślnie wszystkie z katalogu lambda_events/).",
+        )
+        parser.add_argument('--cold-runs', type=int, default=3, help="Liczba świeżych procesów (zimnych startów).")
+        parser.add_argument('--warm', type=int, default=20, help="Liczba ciepłych wywołań na zdarzenie.")
+        parser.add_argument('--username', help="Dodaje do zdarzeń ciasteczko JWT wskazanego użytkownika.")
+
+    def handle(self, *args, **options):
+        paths = [Path(p) for p in options['events']] or sorted((settings.BASE_DIR / 'lambda_events').glob('*.json'))
+        if not paths:
+            raise CommandError("Brak plików zdarzeń.")
+        events = [(path.stem, json.loads(path.read_text(encoding='utf-8'))) for path in paths]
+        config = json.dumps({'events': events, 'warm': options['warm'], 'username': options['username']})
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'myproject.settings')}
+
+        runs = []
+        for _ in range(options['cold_runs']):
+            proc = subprocess.run(
+                [sys.executable, '-c', RUNNER], input=config,
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                raise CommandError(f"Wywołanie handlera nie powiodło się:\n{proc.stderr[-2000:]}")
+            runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+        init = [r['init_ms'] for r in runs]
+        imports = [r['import_ms'] for r in runs]
+        self.stdout.write(f"Zimne starty: {len(runs)}")
+        self.stdout.write(f"  import handlera (mediana): {statistics.median(imports):.1f} ms")
+        self.stdout.write(f"  w tym inicjalizacja Django i rozgrzewka: {statistics.median(init):.1f} ms")
+        self.stdout.write(f"{'zdarzenie':<28}{'status':>8}{'pierwsze':>12}{'ciepłe p50':>12}{'ciepłe p95':>12}")
+        for index, (name, _event) in enumerate(events):
+            per_event = [r['events'][index] for r in runs]
+            first = [e['timings'][0] for e in per_event]
+            warm = [t for e in per_event for t in e['timings'][1:]]
+            status = per_event[0]['statuses'][-1]
+            warm_p50 = f"{_percentile(warm, 50):.2f}" if warm else '-'
+            warm_p95 = f"{_percentile(warm, 95):.2f}" if warm else '-'
+            self.stdout.write(
+                f"{name:<28}{status:>8}{statistics.median(first):>12.2f}{warm_p50:>12}{warm_p95:>12}"
+            )
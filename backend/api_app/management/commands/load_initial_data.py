@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from django.contrib.auth.models import Group, User
+from django.core import serializers
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api_app.models import Category, Expense
+
+FIXTURE_PATH = Path(__file__).resolve().parents[2] / 'fixtures' / 'initial_data.json'
+
+
+def _already_present(obj):
+    """
+    Zwraca True, jeśli obiekt z fixture istnieje już w bazie.
+
+    Kategorie, grupy i użytkownicy są porównywani po nazwie (klucz naturalny),
+    pozostałe modele po kluczu głównym (wydatki w shardzie właściciela).
+    """
+    if isinstance(obj, Category):
+        return Category.objects.filter(name=obj.name).exists()
+    if isinstance(obj, Group):
+        return Group.objects.filter(name=obj.name).exists()
+    if isinstance(obj, User):
+        return User.objects.filter(username=obj.username).exists()
+    if isinstance(obj, Expense):
+        return Expense.objects.for_user(obj.user_id).filter(pk=obj.pk).exists()
+    return type(obj).objects.filter(pk=obj.pk).exists()
+
+
+class Command(BaseCommand):
+    """
+    Idempotentne ładowanie danych początkowych (initial_data.json).
+
+    W przeciwieństwie do `loaddata` nie nadpisuje istniejących rekordów –
+    obiekty już obecne w bazie są pomijane, więc polecenie można bezpiecznie
+    uruchamiać przy każdym wdrożeniu.
+    """
+    help = "Ładuje initial_data.json, pomijając obiekty już obecne w bazie."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fixture', default=str(FIXTURE_PATH), help="Ścieżka do pliku fixture (JSON).")
+
+    def handle(self, *args, **options):
+        loaded = skipped = 0
+        seen = set()
+        with open(options['fixture'], encoding='utf-8') as fh, transaction.atomic():
+            for deserialized in serializers.deserialize('json', fh):
+                obj = deserialized.object
+                key = (type(obj), obj.pk)
+                # Obiekt powtórzony w fixture (np. grupa z uprawnieniami) aktualizuje
+                # wcześniej wczytany rekord zamiast być pomijany.
+                if key not in seen and _already_present(obj):
+                    skipped += 1
+                    continue
+                seen.add(key)
+                deserialized.save()
+                loaded += 1
+        self.stdout.write(f"Załadowano obiektów: {loaded}, pominięto istniejących: {skipped}.")
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api_app.archive import archive_cutoff
+from api_app.partitions import drop_archived_partitions, ensure_future_partitions
+from api_app.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    """
+    Utrzymanie partycji tabeli wydatków (MySQL; uruchamiaj np. z crona raz w tygodniu).
+
+    W każdym shardzie tworzy partycje miesięczne na --months-ahead miesięcy naprzód
+    i usuwa puste partycje sprzed horyzontu archiwum (po `archive_expenses`).
+    """
+    help = "Tworzy przyszłe partycje miesięczne tabeli wydatków i usuwa puste, zarchiwizowane."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=settings.EXPENSE_PARTITION_MONTHS_AHEAD)
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff()
+        for alias in shard_aliases():
+            if connections[alias].vendor != 'mysql':
+                self.stdout.write(f"{alias}: partycjonowanie dostępne tylko w MySQL – pomijam.")
+                continue
+            created = ensure_future_partitions(alias, options['months_ahead'], history_before=cutoff)
+            dropped = drop_archived_partitions(alias, cutoff)
+            self.stdout.write(
+                f"{alias}: utworzono partycje: {', '.join(created) or '-'}; "
+                f"usunięto puste: {', '.join(dropped) or '-'}."
+            )
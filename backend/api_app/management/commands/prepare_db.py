@@ -0,0 +1,58 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+from api_app.sharding import sharding_enabled, shard_aliases
+
+
+class Command(BaseCommand):
+    """
+    Lekka ścieżka startowa bazy danych dla kontenera `migrator`.
+
+    - Nigdy nie uruchamia `makemigrations` – migracje są częścią repozytorium.
+    - `migrate` jest wywoływane tylko wtedy, gdy istnieją niezastosowane migracje
+      (pominięcie go oszczędza sygnały post_migrate i tworzenie uprawnień).
+    - Przy włączonym shardingu (EXPENSE_SHARDS) migruje również każdy shard.
+    - Po migracjach tworzy z wyprzedzeniem partycje tabeli wydatków (MySQL).
+    - Z flagą --check-only jedynie sprawdza stan migracji i kończy się błędem,
+      jeżeli baza wymaga migracji.
+    - Na końcu ładuje dane początkowe idempotentnie (load_initial_data).
+    """
+    help = "Stosuje brakujące migracje (lub tylko je sprawdza) i idempotentnie ładuje dane początkowe."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--check-only', action='store_true', help="Tylko sprawdź, czy są niezastosowane migracje.")
+        parser.add_argument('--no-fixtures', action='store_true', help="Nie ładuj initial_data.json.")
+
+    def handle(self, *args, **options):
+        databases = [options['database']]
+        if options['database'] == DEFAULT_DB_ALIAS and sharding_enabled():
+            databases += shard_aliases()
+        plans = {database: self._migration_plan(database) for database in databases}
+
+        if options['check_only']:
+            pending = [
+                f"{database}: {m.app_label}.{m.name}"
+                for database, plan in plans.items() for m, _ in plan
+            ]
+            if pending:
+                raise CommandError(f"Niezastosowane migracje: {', '.join(pending)}")
+            self.stdout.write("Baza danych jest aktualna.")
+            return
+
+        for database, plan in plans.items():
+            if plan:
+                self.stdout.write(f"Stosuję migracje ({len(plan)}) w bazie '{database}'…")
+                call_command('migrate', database=database, interactive=False, verbosity=options['verbosity'])
+            else:
+                self.stdout.write(f"Brak niezastosowanych migracji w bazie '{database}' – pomijam migrate.")
+        call_command('maintain_expense_partitions', verbosity=options['verbosity'])
+
+        if not options['no_fixtures']:
+            call_command('load_initial_data', verbosity=options['verbosity'])
+
+    def _migration_plan(self, database):
+        executor = MigrationExecutor(connections[database])
+        return executor.migration_plan(executor.loader.graph.leaf_nodes())
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api_app.models import IdempotencyKey
+
+
+def prune_expired_idempotency_keys(batch_size=5000, pause=0.0):
+    """
+    Usuwa partiami klucze Idempotency-Key starsze niż IDEMPOTENCY_KEY_TTL.
+
+    Po wygaśnięciu ponowienie z tym samym kluczem jest traktowane jak nowe żądanie,
+    więc wiersz jest zbędny. Zwraca liczbę usuniętych wpisów.
+    """
+    cutoff = timezone.now()
+    deleted = 0
+    while True:
+        pks = list(
+            IdempotencyKey.objects.filter(expires_at__lte=cutoff)
+            .order_by('expires_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return deleted
+        IdempotencyKey.objects.filter(pk__in=pks).delete()
+        deleted += len(pks)
+        if pause:
+            time.sleep(pause)
+
+
+class Command(BaseCommand):
+    """
+    Okresowe czyszczenie kluczy Idempotency-Key (uruchamiaj np. z crona co godzinę).
+    """
+    help = "Usuwa partiami wygasłe wpisy IdempotencyKey."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--pause', type=float, default=0.0, help="Przerwa (s) między partiami.")
+
+    def handle(self, *args, **options):
+        deleted = prune_expired_idempotency_keys(options['batch_size'], options['pause'])
+        self.stdout.write(f"Usunięto wygasłych kluczy idempotencji: {deleted}.")
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from django_rest_passwordreset.models import ResetPasswordToken
+
+from api_app.views.password_reset import reset_token_cutoff
+
+
+def prune_expired_reset_tokens(batch_size=5000, pause=0.0):
+    """
+    Usuwa przeterminowane tokeny resetowania hasła partiami po kluczu głównym.
+
+    Każda partia to osobne, krótkie zapytanie DELETE, więc czyszczenie dużej
+    tabeli nie blokuje jej na długo. Zwraca liczbę usuniętych tokenów.
+    """
+    cutoff = reset_token_cutoff()
+    deleted = 0
+    while True:
+        ids = list(
+            ResetPasswordToken.objects.filter(created_at__lte=cutoff)
+            .order_by('created_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        ResetPasswordToken.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
+        if pause:
+            time.sleep(pause)
+
+
+class Command(BaseCommand):
+    """
+    Okresowe czyszczenie tokenów resetowania hasła (uruchamiaj np. z crona co godzinę).
+    """
+    help = "Usuwa partiami przeterminowane tokeny django_rest_passwordreset."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--pause', type=float, default=0.0, help="Przerwa (s) między partiami.")
+
+    def handle(self, *args, **options):
+        deleted = prune_expired_reset_tokens(options['batch_size'], options['pause'])
+        self.stdout.write(f"Usunięto przeterminowanych tokenów: {deleted}.")
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api_app.models import RevokedToken
+
+
+def prune_expired_revoked_tokens(batch_size=5000, pause=0.0):
+    """
+    Usuwa partiami wpisy unieważnionych tokenów, które już wygasły.
+
+    Wygasły refresh token i tak nie przejdzie weryfikacji podpisu, więc jego wpis
+    jest zbędny. Zwraca liczbę usuniętych wpisów.
+    """
+    cutoff = timezone.now()
+    deleted = 0
+    while True:
+        jtis = list(
+            RevokedToken.objects.filter(expires_at__lte=cutoff)
+            .order_by('expires_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not jtis:
+            return deleted
+        RevokedToken.objects.filter(pk__in=jtis).delete()
+        deleted += len(jtis)
+        if pause:
+            time.sleep(pause)
+
+
+class Command(BaseCommand):
+    """
+    Okresowe czyszczenie unieważnionych refresh tokenów (uruchamiaj np. z crona co godzinę).
+    """
+    help = "Usuwa partiami wygasłe wpisy RevokedToken."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--pause', type=float, default=0.0, help="Przerwa (s) między partiami.")
+
+    def handle(self, *args, **options):
+        deleted = prune_expired_revoked_tokens(options['batch_size'], options['pause'])
+        self.stdout.write(f"Usunięto wygasłych unieważnionych tokenów: {deleted}.")
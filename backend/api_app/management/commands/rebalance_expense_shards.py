@@ -0,0 +1,78 @@
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from api_app.models import UserShard
+from api_app.sharding import move_user, shard_aliases, shard_for_user, sharding_enabled
+
+
+class Command(BaseCommand):
+    """
+    Przenoszenie użytkowników między shardami wydatków (api_app.sharding).
+
+    Tryby:
+      --user ID --to ALIAS   przenosi jednego użytkownika,
+      --import-from ALIAS    przenosi dane wszystkich użytkowników z bazy spoza mapy
+                             (np. 'default' przy włączaniu shardingu na istniejącej bazie),
+      bez opcji              wyrównuje liczbę użytkowników między shardami (np. po dodaniu
+                             nowego shardu), przenosząc nadmiarowych użytkowników
+                             z najbardziej obciążonych shardów do najmniej obciążonych.
+    Z --dry-run tylko wypisuje plan.
+    """
+    help = "Przenosi użytkowników między shardami wydatków lub wyrównuje ich rozkład."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int)
+        parser.add_argument('--to')
+        parser.add_argument('--import-from')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if not sharding_enabled():
+            raise CommandError("Sharding jest wyłączony – ustaw EXPENSE_SHARDS.")
+        aliases = shard_aliases()
+        if options['to'] and options['to'] not in aliases:
+            raise CommandError(f"Nieznany shard '{options['to']}'. Dostępne: {', '.join(aliases)}")
+
+        if options['user']:
+            if not options['to']:
+                raise CommandError("Podaj shard docelowy (--to).")
+            plan = [(options['user'], None, options['to'])]
+        elif options['import_from']:
+            plan = [
+                (user_id, options['import_from'], shard_for_user(user_id))
+                for user_id in User.objects.using(DEFAULT_DB_ALIAS).values_list('pk', flat=True).iterator()
+            ]
+        else:
+            plan = self._balance_plan(aliases)
+
+        moved_rows = 0
+        for user_id, source, target in plan:
+            self.stdout.write(f"Użytkownik {user_id}: {source or shard_for_user(user_id)} -> {target}")
+            if not options['dry_run']:
+                moved_rows += move_user(user_id, target, source=source)
+        self.stdout.write(f"Użytkowników: {len(plan)}, przeniesionych wierszy: {moved_rows}.")
+
+    def _balance_plan(self, aliases):
+        """Plan przenosin wyrównujący liczbę użytkowników w shardach (różnica najwyżej 1)."""
+        assignments = {alias: [] for alias in aliases}
+        for user_id, alias in UserShard.objects.using(DEFAULT_DB_ALIAS).filter(alias__in=aliases).values_list('user_id', 'alias'):
+            assignments[alias].append(user_id)
+        counts = Counter({alias: len(users) for alias, users in assignments.items()})
+        target_size = -(-sum(counts.values()) // len(aliases))
+
+        surplus = []
+        for alias, users in assignments.items():
+            extra = counts[alias] - target_size
+            if extra > 0:
+                surplus += users[-extra:]
+                counts[alias] -= extra
+
+        plan = []
+        for user_id in surplus:
+            target = min(aliases, key=lambda alias: counts[alias])
+            counts[target] += 1
+            plan.append((user_id, None, target))
+        return plan
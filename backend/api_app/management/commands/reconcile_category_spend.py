@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api_app.budgets import reconcile_batch
+from api_app.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    """
+    Sprawdza bieżące sumy limitów (MonthlyCategorySpend) z SUM() wydatków.
+
+    Sumy są porównywane partiami po kluczu głównym – jedno zapytanie grupujące
+    na tabelę wydatków i archiwum na partię. Rozbieżności są wypisywane; z `--fix`
+    są poprawiane, bez niego polecenie kończy się błędem (nadaje się do crona
+    z alertem). Poziom powiadomień nie jest zmieniany – ocenia go kolejny zapis.
+    """
+    help = "Porównuje bieżące sumy limitów kategorii z sumami wydatków i opcjonalnie je naprawia."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--fix', action='store_true', help="Popraw rozbieżne sumy.")
+        parser.add_argument('--pause', type=float, default=0.0, help="Przerwa (s) między partiami.")
+
+    def handle(self, *args, **options):
+        total_mismatches = 0
+        for alias in shard_aliases():
+            mismatched = 0
+            last_pk = 0
+            while True:
+                last_pk, mismatches = reconcile_batch(alias, last_pk, options['batch_size'], options['fix'])
+                if last_pk is None:
+                    break
+                mismatched += len(mismatches)
+                for spend, expected in mismatches:
+                    self.stdout.write(
+                        f"  {alias} użytkownik {spend.user_id}, kategoria {spend.category_id}, "
+                        f"{spend.month:%Y-%m}: suma {spend.total}, wydatki {expected}"
+                    )
+                if options['pause']:
+                    time.sleep(options['pause'])
+            self.stdout.write(f"{alias}: rozbieżnych sum: {mismatched}{' (poprawiono)' if options['fix'] else ''}.")
+            total_mismatches += mismatched
+
+        if total_mismatches and not options['fix']:
+            raise CommandError(f"Rozbieżne sumy limitów: {total_mismatches} (uruchom z --fix).")
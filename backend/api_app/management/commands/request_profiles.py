@@ -0,0 +1,66 @@
+import json
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api_app.profiling import list_captures, load_capture
+
+
+class Command(BaseCommand):
+    """
+    Przegląd profili żądań zapisanych przez ProfilingMiddleware.
+
+    `list` wypisuje zapisane profile (najnowsze na końcu). `dump ID` wypisuje
+    stosy w formacie collapsed (wejście dla flamegraph.pl / speedscope),
+    oś czasu SQL (`--format sql`) albo cały profil jako JSON (`--format json`).
+    """
+    help = "Wyświetla i zrzuca profile żądań z bufora na dysku."
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['list', 'dump'])
+        parser.add_argument('capture_id', nargs='?', help="Identyfikator profilu (dla dump).")
+        parser.add_argument('--format', choices=['collapsed', 'sql', 'json'], default='collapsed')
+        parser.add_argument('--output', help="Plik wynikowy (domyślnie standardowe wyjście).")
+
+    def handle(self, *args, **options):
+        if options['action'] == 'list':
+            self._list()
+            return
+
+        if not options['capture_id']:
+            raise CommandError("Podaj identyfikator profilu (patrz: request_profiles list).")
+        capture = load_capture(options['capture_id'])
+        if capture is None:
+            raise CommandError(f"Nie ma profilu {options['capture_id']}.")
+
+        if options['format'] == 'collapsed':
+            output = capture['collapsed'] + '\n'
+        elif options['format'] == 'sql':
+            output = ''.join(
+                f"{query['start_ms']:10.3f} ms  +{query['duration_ms']:8.3f} ms  [{query['alias']}] {query['sql']}\n"
+                for query in capture['sql']
+            )
+        else:
+            output = json.dumps(capture, indent=2, ensure_ascii=False) + '\n'
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output)
+            self.stdout.write(f"Zapisano {options['output']}.")
+        else:
+            self.stdout.write(output, ending='')
+
+    def _list(self):
+        captures = list_captures()
+        if not captures:
+            self.stdout.write("Brak zapisanych profili.")
+            return
+        for capture in captures:
+            sql_ms = sum(query['duration_ms'] for query in capture['sql'])
+            self.stdout.write(
+                f"{capture['id']}  {datetime.fromtimestamp(capture['started']):%Y-%m-%d %H:%M:%S}  "
+                f"{capture['method']:<6} {capture['path']:<32} {capture['status']}  "
+                f"{capture['duration_ms']:9.1f} ms  próbek {capture['samples']:>5}  "
+                f"SQL {len(capture['sql']):>3} ({sql_ms:.1f} ms)"
+                f"{'  [nagłówek]' if capture['requested'] else ''}"
+            )
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api_app.recurring import materialize_batch
+from api_app.sharding import shard_aliases
+
+
+class Command(BaseCommand):
+    """
+    Generuje wydatki z reguł cyklicznych (uruchamiaj np. z crona co godzinę).
+
+    W każdym shardzie przetwarza partiami reguły z next_run <= dziś, nadrabiając
+    wszystkie zaległe daty (np. po przestoju). Każda partia to osobna, krótka
+    transakcja z SKIP LOCKED, więc można uruchomić kilka procesów równolegle.
+    `--max-seconds` ogranicza czas działania: po jego upływie nie są pobierane
+    kolejne partie (pozostałe reguły przetworzy następne uruchomienie).
+    """
+    help = "Generuje zaległe wydatki z reguł wydatków cyklicznych."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--max-seconds', type=float, help="Limit czasu działania (s).")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        deadline = time.monotonic() + options['max_seconds'] if options['max_seconds'] else None
+        for alias in shard_aliases():
+            rules = expenses = 0
+            while deadline is None or time.monotonic() < deadline:
+                batch_rules, batch_expenses = materialize_batch(alias, today, options['batch_size'])
+                if not batch_rules:
+                    break
+                rules += batch_rules
+                expenses += batch_expenses
+            self.stdout.write(f"{alias}: przetworzono reguł: {rules}, wygenerowano wydatków: {expenses}.")
@@ -0,0 +1,76 @@
+import logging
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api_app.catalogue import get_category_catalogue
+from api_app.events import get_broker
+from api_app.models import BudgetAlert
+from api_app.sharding import shard_aliases
+from api_app.signals import send_custom_email
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Wysyła powiadomienia o przekroczeniu limitów z kolejki BudgetAlert
+    (uruchamiaj np. z crona co minutę).
+
+    Dla każdego wpisu wysyła e-mail i publikuje zdarzenie `budget` w strumieniu
+    zmian użytkownika (api_app.events), po czym usuwa wpis z kolejki. Partie są
+    pobierane z SKIP LOCKED, więc równoległe uruchomienia nie wysyłają tych samych
+    powiadomień; błąd wysyłki e-maila wycofuje partię do następnego uruchomienia.
+    """
+    help = "Wysyła zaległe powiadomienia o przekroczeniu limitów wydatków."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        names = {category['id']: category['name'] for category in get_category_catalogue()}
+        for alias in shard_aliases():
+            sent = 0
+            while count := self._send_batch(alias, options['batch_size'], names):
+                sent += count
+            self.stdout.write(f"{alias}: wysłano powiadomień: {sent}.")
+
+    def _send_batch(self, alias, batch_size, names):
+        with transaction.atomic(using=alias):
+            alerts = list(
+                BudgetAlert.objects.using(alias)
+                .select_for_update(skip_locked=True)
+                .order_by('pk')[:batch_size]
+            )
+            if not alerts:
+                return 0
+            users = User.objects.in_bulk({alert.user_id for alert in alerts})
+            for alert in alerts:
+                user = users.get(alert.user_id)
+                if user is None:
+                    continue
+                name = names.get(alert.category_id, 'Brak kategorii')
+                send_custom_email(
+                    "Limit wydatków",
+                    f"Wydatki w kategorii {name} w miesiącu {alert.month:%m.%Y} osiągnęły "
+                    f"{alert.threshold}% limitu: {alert.total} z {alert.limit} zł.",
+                    user.email,
+                )
+                self._publish(alert)
+            BudgetAlert.objects.using(alias).filter(pk__in=[alert.pk for alert in alerts]).delete()
+        return len(alerts)
+
+    @staticmethod
+    def _publish(alert):
+        try:
+            get_broker().publish(alert.user_id, 'budget', {
+                'category': alert.category_id,
+                'month': f'{alert.month:%Y-%m}',
+                'threshold': alert.threshold,
+                'total': str(alert.total),
+                'limit': str(alert.limit),
+            })
+        except Exception:
+            # E-mail już wysłano – niedostępny broker nie może cofnąć partii.
+            logger.exception("Nie udało się opublikować zdarzenia limitu.")
@@ -0,0 +1,272 @@
+import random
+import sys
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.handlers.exception import convert_exception_to_response
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.module_loading import import_string
+
+from . import profiling
+from .checks import cache_is_process_local
+from .compression import negotiate_encoding, stream_compressor
+from .db_routers import replica_aliases, track_request
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+REPLICA_PIN_COOKIE = 'db_primary_pin'
+REPLICA_PIN_CACHE_KEY = 'db_primary_pin:{}'
+COMPRESSIBLE_CONTENT_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml')
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Kompresja odpowiedzi: zstd, brotli (jeśli dostępne) lub gzip wg Accept-Encoding.
+
+    - Odpowiedzi mniejsze niż COMPRESSION_MIN_SIZE bajtów, już zakodowane, o typach
+      nienadających się do kompresji, z Cache-Control: no-transform oraz ścieżki
+      z COMPRESSION_EXCLUDE_PATHS (odpowiedzi z sekretami – atak BREACH) są pomijane.
+    - StreamingHttpResponse (także asynchroniczne) kompresowane są fragment po
+      fragmencie: każdy fragment jest od razu wypychany (flush), więc nic nie jest
+      buforowane. Strumienie text/event-stream nie są kompresowane.
+    - Silne ETagi są osłabiane, bo treść po kompresji nie jest bajtowo identyczna.
+    """
+
+    def process_response(self, request, response):
+        if not self._should_compress(request, response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        compressor = stream_compressor(encoding)
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self._compress_async_stream(compressor, response.streaming_content)
+            else:
+                response.streaming_content = self._compress_stream(compressor, response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed = compressor.compress(response.content) + compressor.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def _should_compress(self, request, response):
+        if response.has_header('Content-Encoding') or request.path_info in settings.COMPRESSION_EXCLUDE_PATHS:
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type == 'text/event-stream' or not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES):
+            return False
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return False
+        if response.streaming:
+            length = response.get('Content-Length')
+            return length is None or int(length) >= settings.COMPRESSION_MIN_SIZE
+        return len(response.content) >= settings.COMPRESSION_MIN_SIZE
+
+    @staticmethod
+    def _compress_stream(compressor, chunks):
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+
+    @staticmethod
+    async def _compress_async_stream(compressor, chunks):
+        async for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+
+
+class NonApiMiddleware:
+    """
+    Uruchamia middleware z settings.NON_API_MIDDLEWARE tylko dla ścieżek spoza API.
+
+    Endpointy pod API_PATH_PREFIX zwracają wyłącznie JSON, a użytkownika uwierzytelnia
+    DRF (CookieJWTAuthentication), więc sesje, wiadomości, uwierzytelnianie sesyjne
+    i nagłówki CSP są potrzebne tylko pozostałym ścieżkom (np. panelowi admina).
+    Dla nich budowany jest osobny łańcuch w tej samej kolejności, w jakiej Django
+    buduje MIDDLEWARE. Obsługiwane są tylko middleware działające przez
+    process_request/process_response (__call__) – haki process_view,
+    process_exception i process_template_response wymagałyby integracji z handlerem.
+    Pod ASGI oba łańcuchy działają asynchronicznie (bez przełączania na wątek).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        handler = convert_exception_to_response(get_response)
+        for middleware_path in reversed(settings.NON_API_MIDDLEWARE):
+            middleware = import_string(middleware_path)(handler)
+            for hook in ('process_view', 'process_exception', 'process_template_response'):
+                if hasattr(middleware, hook):
+                    raise ImproperlyConfigured(
+                        f"{middleware_path} używa {hook} i nie może być w NON_API_MIDDLEWARE."
+                    )
+            handler = convert_exception_to_response(middleware)
+        self.non_api_handler = handler
+
+    def __call__(self, request):
+        if request.path_info.startswith(settings.API_PATH_PREFIX):
+            return self.get_response(request)
+        return self.non_api_handler(request)
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Zapewnia "read-your-writes" przy odczytach z replik.
+
+    Żądania modyfikujące dane oraz żądania użytkownika, który zapisywał dane w ciągu
+    ostatnich REPLICA_STICKY_SECONDS sekund, czytają z bazy głównej. Po żądaniu,
+    które zapisało dane, użytkownik (id z tokena dostępu w ciasteczku, bez zapytania
+    do bazy) jest przypinany do bazy głównej wpisem we współdzielonym cache – pin
+    obowiązuje na wszystkich jego urządzeniach i kartach, a nie tylko w przeglądarce,
+    która zapisała. Żądania bez ważnego tokena (logowanie, rejestracja) oraz cache
+    w pamięci procesu (pin nie dotarłby do innych workerów) przypinają klienta
+    krótkotrwałym ciasteczkiem. Bez skonfigurowanych replik middleware nic nie robi.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = bool(replica_aliases())
+        self.shared_pin = not cache_is_process_local()
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        pin_key = self._pin_key(request)
+        pinned = self._pinned(request) or (pin_key is not None and cache.get(pin_key) is not None)
+        with track_request(pinned) as wrote:
+            response = self.get_response(request)
+            if wrote():
+                if pin_key is not None:
+                    cache.set(pin_key, 1, timeout=settings.REPLICA_STICKY_SECONDS)
+                else:
+                    self._stick(response)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        pin_key = self._pin_key(request)
+        pinned = self._pinned(request) or (pin_key is not None and await cache.aget(pin_key) is not None)
+        with track_request(pinned) as wrote:
+            response = await self.get_response(request)
+            if wrote():
+                if pin_key is not None:
+                    await cache.aset(pin_key, 1, timeout=settings.REPLICA_STICKY_SECONDS)
+                else:
+                    self._stick(response)
+        return response
+
+    def _pin_key(self, request):
+        """Klucz pinu użytkownika w cache albo None (pin ciasteczkiem)."""
+        if not self.shared_pin:
+            return None
+        raw_token = request.COOKIES.get(settings.JWT_AUTH_COOKIE)
+        if raw_token is None:
+            return None
+        # Import na żądanie – middleware jest ładowany przy starcie każdego workera.
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+        from rest_framework_simplejwt.exceptions import InvalidToken
+        from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+        try:
+            token = JWTAuthentication().get_validated_token(raw_token)
+        except InvalidToken:
+            return None
+        user_id = token.get(jwt_settings.USER_ID_CLAIM)
+        return None if user_id is None else REPLICA_PIN_CACHE_KEY.format(user_id)
+
+    @staticmethod
+    def _pinned(request):
+        return request.method not in SAFE_METHODS or REPLICA_PIN_COOKIE in request.COOKIES
+
+    @staticmethod
+    def _stick(response):
+        response.set_cookie(
+            REPLICA_PIN_COOKIE, '1',
+            max_age=settings.REPLICA_STICKY_SECONDS,
+            httponly=True,
+            secure=settings.SESSION_COOKIE_SECURE,
+            samesite='Strict'
+        )
+
+
+class ProfilingMiddleware:
+    """
+    Opcjonalne profilowanie żądań (api_app.profiling).
+
+    Profilowany jest losowy ułamek PROFILING_SAMPLE_RATE żądań do API oraz każde
+    żądanie z nagłówkiem PROFILING_HEADER wysłane przez moderatora lub staff;
+    takie żądanie dostaje w odpowiedzi nagłówek X-Profile-Id z identyfikatorem
+    profilu. Profil obejmuje middleware leżące niżej w MIDDLEWARE i widok, ale nie
+    generowanie treści StreamingHttpResponse. Pod ASGI żądania przechodzą bez
+    profilowania – próbkowanie stosu dotyczy jednego wątku.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.get_response(request)
+
+        requested = settings.PROFILING_HEADER in request.headers and profiling.can_profile(request)
+        sampled = (
+            settings.PROFILING_SAMPLE_RATE > 0
+            and request.path_info.startswith(settings.API_PATH_PREFIX)
+            and random.random() < settings.PROFILING_SAMPLE_RATE
+        )
+        if not (requested or sampled):
+            return self.get_response(request)
+
+        capture, response = self._profile(request)
+        user = getattr(request, 'user', None)
+        capture_id = profiling.save_capture(capture.as_dict(
+            method=request.method,
+            path=request.path,
+            status=response.status_code,
+            user_id=user.pk if user is not None and user.is_authenticated else None,
+            requested=requested,
+        ))
+        if requested:
+            response['X-Profile-Id'] = capture_id
+        return response
+
+    def _profile(self, request):
+        # Ramki od tej metody w górę (serwer WSGI) nie trafiają do profilu.
+        with profiling.Capture(settings.PROFILING_INTERVAL_MS / 1000, sys._getframe().f_code) as capture:
+            response = self.get_response(request)
+        return capture, response
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-19 08:26
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='expense',
+            name='expense_date_not_future',
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+INDEX = models.Index(fields=['created_at'], name='pwreset_token_created_at_idx')
+
+
+def add_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model('django_rest_passwordreset', 'ResetPasswordToken'), INDEX)
+
+
+def remove_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('django_rest_passwordreset', 'ResetPasswordToken'), INDEX)
+
+
+class Migration(migrations.Migration):
+    """
+    Indeks na created_at tabeli tokenów django_rest_passwordreset.
+
+    Model pochodzi z zewnętrznej aplikacji, więc indeks tworzymy przez schema_editor,
+    poza stanem migracji tamtej aplikacji. Dzięki niemu okresowe usuwanie
+    przeterminowanych tokenów (prune_reset_tokens) jest skanem zakresu, a nie pełnym
+    skanem tabeli. Wyszukiwanie po kluczu korzysta z istniejącego indeksu UNIQUE
+    na kolumnie key, a po użytkowniku – z indeksu klucza obcego.
+    """
+
+    dependencies = [
+        ('api_app', '0002_remove_expense_date_not_future'),
+        ('django_rest_passwordreset', '0004_alter_resetpasswordtoken_user_agent'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations, models
+
+from api_app.emails import NormalizedEmail
+
+CONSTRAINT = models.UniqueConstraint(NormalizedEmail('email'), name='auth_user_email_normalized_uniq')
+
+
+def add_constraint(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    duplicates = list(
+        User.objects.using(schema_editor.connection.alias)
+        .annotate(email_key=NormalizedEmail('email'))
+        .exclude(email_key=None)
+        .values('email_key')
+        .annotate(count=models.Count('id'))
+        .filter(count__gt=1)
+        .values_list('email_key', flat=True)[:20]
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Nie można utworzyć unikalnego indeksu e-mail – zduplikowane adresy (bez rozróżniania wielkości liter): "
+            + ", ".join(duplicates)
+        )
+    schema_editor.add_constraint(User, CONSTRAINT)
+
+
+def remove_constraint(apps, schema_editor):
+    schema_editor.remove_constraint(apps.get_model('auth', 'User'), CONSTRAINT)
+
+
+class Migration(migrations.Migration):
+    """
+    Unikalny indeks funkcyjny na znormalizowanym adresie e-mail w auth_user.
+
+    Model User pochodzi z django.contrib.auth, więc indeks tworzymy przez
+    schema_editor, poza stanem migracji tamtej aplikacji. Wymaga MySQL 8.0.13+
+    (indeksy funkcyjne) lub SQLite.
+    """
+
+    dependencies = [
+        ('api_app', '0003_reset_token_created_at_index'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_constraint, remove_constraint),
+    ]
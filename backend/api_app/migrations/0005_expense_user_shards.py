@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-19 08:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0004_auth_user_normalized_email_index'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserShard',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='expense_shard', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('alias', models.CharField(max_length=64)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='category',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='expenses', to='api_app.category'),
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='expenses', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.1.7 on 2026-10-19 08:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def partition_expense_table(apps, schema_editor):
+    """
+    MySQL: partycjonowanie tabeli wydatków RANGE COLUMNS(date).
+
+    Kolumna partycjonowania musi należeć do klucza głównego, więc klucz główny
+    staje się (id, date); id pozostaje unikalne dzięki autoinkrementacji.
+    Partycjonowanie jest możliwe, bo wydatki nie mają już kluczy obcych (0005).
+    Partycje miesięczne tworzy polecenie `maintain_expense_partitions`.
+    """
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    table = schema_editor.quote_name('api_app_expense')
+    schema_editor.execute(f'ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id, date)')
+    schema_editor.execute(
+        f'ALTER TABLE {table} PARTITION BY RANGE COLUMNS(date) '
+        f'(PARTITION p_future VALUES LESS THAN (MAXVALUE))'
+    )
+
+
+def unpartition_expense_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    table = schema_editor.quote_name('api_app_expense')
+    schema_editor.execute(f'ALTER TABLE {table} REMOVE PARTITIONING')
+    schema_editor.execute(f'ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id)')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0005_expense_user_shards'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedExpense',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('date', models.DateField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MonthlyExpenseTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('total', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('count', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='expenses', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'date'], name='expense_user_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedexpense',
+            name='category',
+            field=models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api_app.category'),
+        ),
+        migrations.AddField(
+            model_name='archivedexpense',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='archived_expenses', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='monthlyexpensetotal',
+            name='category',
+            field=models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api_app.category'),
+        ),
+        migrations.AddField(
+            model_name='monthlyexpensetotal',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivedexpense',
+            index=models.Index(fields=['user', 'date'], name='archived_expense_user_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlyexpensetotal',
+            constraint=models.UniqueConstraint(fields=('user', 'month', 'category'), name='monthly_total_user_month_category'),
+        ),
+        migrations.RunPython(
+            partition_expense_table,
+            unpartition_expense_table,
+            hints={'model_name': 'expense'},
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.7 on 2026-10-19 09:10
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0007_category_budgets'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringExpense',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, validators=[django.core.validators.MinValueValidator(0.01, message='Kwota musi być większa niż 0.')])),
+                ('interval', models.CharField(choices=[('day', 'Dzień'), ('week', 'Tydzień'), ('month', 'Miesiąc'), ('year', 'Rok')], max_length=5)),
+                ('interval_count', models.PositiveSmallIntegerField(default=1)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('next_run', models.DateField(null=True)),
+                ('category', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api_app.category')),
+                ('user', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='recurring_rule',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api_app.recurringexpense'),
+        ),
+        migrations.AddConstraint(
+            model_name='expense',
+            constraint=models.UniqueConstraint(fields=('recurring_rule', 'date'), name='expense_recurring_rule_date'),
+        ),
+        migrations.AddIndex(
+            model_name='recurringexpense',
+            index=models.Index(fields=['user'], name='recurring_expense_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recurringexpense',
+            index=models.Index(fields=['next_run'], name='recurring_expense_next_run_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-19 09:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0008_recurring_expenses'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModeratorAuditEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor_username', models.CharField(max_length=150)),
+                ('action', models.CharField(choices=[('list', 'Lista użytkowników'), ('view', 'Podgląd użytkownika'), ('delete', 'Usunięcie użytkownika')], max_length=6)),
+                ('target_username', models.CharField(blank=True, max_length=150)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('ip_address', models.GenericIPAddressField(null=True)),
+                ('actor', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('target', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='moderator_audit_created_idx'), models.Index(fields=['actor', 'created_at'], name='moderator_audit_actor_idx')],
+            },
+        ),
+    ]
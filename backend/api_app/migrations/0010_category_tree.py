@@ -0,0 +1,47 @@
+# Generated by Django 5.1.7 on 2026-10-19 09:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def add_closure_self_rows(apps, schema_editor):
+    """Istniejące kategorie są kategoriami głównymi – domknięcie to tylko wiersze (k, k, 0)."""
+    Category = apps.get_model('api_app', 'Category')
+    CategoryClosure = apps.get_model('api_app', 'CategoryClosure')
+    alias = schema_editor.connection.alias
+    CategoryClosure.objects.using(alias).bulk_create(
+        CategoryClosure(ancestor_id=pk, descendant_id=pk, depth=0)
+        for pk in Category.objects.using(alias).values_list('pk', flat=True)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0009_moderator_audit_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='children', to='api_app.category'),
+        ),
+        migrations.CreateModel(
+            name='CategoryClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api_app.category')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api_app.category')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='category_closure_ancestor_descendant')],
+            },
+        ),
+        migrations.RunPython(
+            add_closure_self_rows,
+            migrations.RunPython.noop,
+            hints={'model_name': 'categoryclosure'},
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 5.1.7 on 2026-10-19 10:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+from api_app.models import user_sharded_fk
+
+SHARDED_MODELS = [
+    'ArchivedExpense', 'BudgetAlert', 'CategoryBudget', 'Expense',
+    'MonthlyCategorySpend', 'MonthlyExpenseTotal', 'RecurringExpense',
+]
+
+
+def remove_orphans(apps, schema_editor):
+    """
+    Przed dodaniem ograniczeń usuwa odwołania do nieistniejących użytkowników i kategorii
+    (mogły powstać, gdy klucze obce były bez ograniczeń): SET_NULL dla pól z null=True,
+    inaczej usunięcie wiersza. Z shardami ograniczeń nie ma, więc nic nie robi.
+    """
+    if settings.EXPENSE_SHARDS:
+        return
+    alias = schema_editor.connection.alias
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Category = apps.get_model('api_app', 'Category')
+    for name in SHARDED_MODELS:
+        model = apps.get_model('api_app', name)
+        rows = model._base_manager.using(alias)
+        rows.exclude(user_id__in=User._base_manager.using(alias).values('pk')).delete()
+        orphaned = rows.filter(category__isnull=False).exclude(
+            category_id__in=Category._base_manager.using(alias).values('pk')
+        )
+        if model._meta.get_field('category').null:
+            orphaned.update(category=None)
+        else:
+            orphaned.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_app', '0012_idempotency_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_orphans, migrations.RunPython.noop, elidable=True),
+        migrations.AlterField(
+            model_name='archivedexpense',
+            name='category',
+            field=models.ForeignKey(db_index=False, null=True, related_name='+', to='api_app.category', **user_sharded_fk(models.SET_NULL)),
+        ),
+        migrations.AlterField(
+            model_name='archivedexpense',
+            name='user',
+            field=models.ForeignKey(db_index=False, related_name='archived_expenses', to=settings.AUTH_USER_MODEL, **user_sharded_fk(models.CASCADE)),
+        ),
+        migrations.AlterField(
+            model_name='budgetalert',
+            name='category',
+            field=models.ForeignKey(db_index=False, related_name='+', to='api_app.category', **user_sharded_fk(models.CASCADE)),
+        ),
+        migrations.AlterField(
+            model_name='budgetalert',
+            name='user',
+            field=models.ForeignKey(db_index=False, related_name='+', to=settings.AUTH_USER_MODEL, **user_sharded_fk(models.CASCADE)),
+        ),
+        migrations.AlterField(
+            model_name='categorybudget',
+            name='category',
+            field=models.ForeignKey(db_index=False, related_name='+', to='api_app.category', **user_sharded_fk(models.CASCADE)),
+        ),
+        migrations.AlterField(
+            model_name='categorybudget',
+            name='user',
+            field=models.ForeignKey(db_index=False, related_name='+', to=settings.AUTH_USER_MODEL, **user_sharded_fk(models.CASCADE)),
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='category',
+            field=models.ForeignKey(null=True, related_name='expenses', to='api_app.category', **user_sharded_fk(models.SET_NULL)),
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='user',
+            field=models.ForeignKey(db_index=False, related_name='expenses', to=settings.AUTH_USER_MODEL, **user_sharded_fk(models.CASCADE)),
+        ),
+        migrations.AlterField(
+            model_name='monthlycategoryspend',
+            name='category',
+            field=models.ForeignKey(db_index=False, related_name='+', to='api_app.category', **user_sharded_fk(models.CASCADE)),
+        ),
+        migrations.AlterField(
+            model_name='monthlycategoryspend',
+            name='user',
+            field=models.ForeignKey(db_index=False, related_name='+', to=settings.AUTH_USER_MODEL, **user_sharded_fk(models.CASCADE)),
+        ),
+        migrations.AlterField(
+            model_name='monthlyexpensetotal',
+            name='category',
+            field=models.ForeignKey(db_index=False, null=True, related_name='+', to='api_app.category', **user_sharded_fk(models.SET_NULL)),
+        ),
+        migrations.AlterField(
+            model_name='monthlyexpensetotal',
+            name='user',
+            field=models.ForeignKey(db_index=False, related_name='+', to=settings.AUTH_USER_MODEL, **user_sharded_fk(models.CASCADE)),
+        ),
+        migrations.AlterField(
+            model_name='recurringexpense',
+            name='category',
+            field=models.ForeignKey(db_index=False, null=True, related_name='+', to='api_app.category', **user_sharded_fk(models.SET_NULL)),
+        ),
+        migrations.AlterField(
+            model_name='recurringexpense',
+            name='user',
+            field=models.ForeignKey(db_index=False, related_name='+', to=settings.AUTH_USER_MODEL, **user_sharded_fk(models.CASCADE)),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import IntegrityError, NotSupportedError, models, router, transaction
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
@@ -6,12 +7,21 @@ from django.utils import timezone
 
 User = get_user_model()
 
+CATEGORY_CYCLE_MESSAGE = "Kategoria nie może być podkategorią samej siebie ani swojej podkategorii."
+
 class Category(models.Model):
     """
     Reprezentuje kategorię wydatków.
 
     Atrybuty:
     - name: Nazwa kategorii (maks. 100 znaków), unikalna.
+    - parent: Kategoria nadrzędna (None – kategoria główna), np. Jedzenie → Restauracje.
+      Kategorii z podkategoriami nie można usunąć.
+
+    Drzewo kategorii jest odwzorowane w tabeli domknięcia CategoryClosure, aktualizowanej
+    sygnałem post_save w tej samej transakcji co zapis kategorii (api_app.category_tree).
+    Cykl zgłaszają clean() (formularze) i CategorySerializer jako błąd walidacji, a save()
+    – sprawdzając zablokowane wiersze domknięcia w transakcji zapisu – jako IntegrityError.
     """
     name = models.CharField(
         max_length=100,
@@ -20,28 +30,123 @@ class Category(models.Model):
             MinValueValidator(1, message="Nazwa nie może być pusta."),
         ]
     )
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='children'
+    )
+
+    def is_ancestor_of(self, category_id):
+        """Czy kategoria `category_id` leży w poddrzewie tej kategorii (także ona sama)."""
+        return self.pk is not None and CategoryClosure.objects.filter(
+            ancestor_id=self.pk, descendant_id=category_id
+        ).exists()
+
+    def clean(self):
+        if self.parent_id is not None and self.is_ancestor_of(self.parent_id):
+            raise ValidationError({'parent': CATEGORY_CYCLE_MESSAGE})
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(Category, instance=self)
+        with transaction.atomic(using=using):
+            if self.pk is not None and self.parent_id is not None:
+                # Blokada ścieżek do nowego rodzica i poddrzewa kategorii: równoległe
+                # przeniesienie A pod B i B pod A czeka na siebie (oba blokują wiersze
+                # (A, A) i (B, B)), więc drugie widzi już zapis pierwszego.
+                locked = set(
+                    CategoryClosure.objects.using(using).select_for_update()
+                    .filter(models.Q(descendant_id=self.parent_id) | models.Q(ancestor_id=self.pk))
+                    .values_list('ancestor_id', 'descendant_id')
+                )
+                if (self.pk, self.parent_id) in locked:
+                    raise IntegrityError(CATEGORY_CYCLE_MESSAGE)
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
 
+class CategoryClosure(models.Model):
+    """
+    Tabela domknięcia drzewa kategorii: para (przodek, potomek) dla każdej ścieżki w drzewie.
+
+    Atrybuty:
+    - ancestor, descendant: Przodek i potomek; każda kategoria jest też swoim przodkiem (depth=0).
+    - depth: Odległość w drzewie (1 – bezpośrednia podkategoria).
+
+    Poddrzewo kategorii to wiersze z ancestor=kategoria, ścieżka do korzenia – wiersze
+    z descendant=kategoria; oba odczyty to jedno zapytanie bez rekurencji.
+    """
+    # Indeksem po ancestor jest ograniczenie unikalności (ancestor, descendant).
+    ancestor = models.ForeignKey(Category, on_delete=models.CASCADE, db_index=False, related_name='+')
+    descendant = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='category_closure_ancestor_descendant'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} -> {self.descendant_id} ({self.depth})"
+
+
+def user_sharded_fk(on_delete):
+    """
+    Argumenty klucza obcego modelu dzielonego (api_app.sharding.USER_SHARDED_MODELS)
+    do użytkownika lub kategorii.
+
+    Bez shardingu to zwykły klucz obcy z ograniczeniem w bazie i podanym on_delete.
+    Z EXPENSE_SHARDS użytkownicy i kategorie leżą w innej bazie niż wiersze shardu,
+    więc ograniczenia nie ma, a usunięcie użytkownika i kategorii obsługują sygnały
+    (api_app.sharding.delete_user_data, clear_category). Migracja 0013 używa tej
+    samej funkcji, więc stan migracji zgadza się z modelami w obu konfiguracjach.
+    """
+    if settings.EXPENSE_SHARDS:
+        return {'on_delete': models.DO_NOTHING, 'db_constraint': False}
+    return {'on_delete': on_delete}
+
+
+class UserShardedManager(models.Manager):
+    def for_user(self, user):
+        """
+        Zwraca wiersze użytkownika (obiekt User lub id) z jego shardu.
+
+        Identyfikator użytkownika jest przekazywany routerowi jako wskazówka
+        (api_app.db_routers.UserShardRouter), więc odczyty i create() trafiają
+        do właściwej bazy danych.
+        """
+        user_id = getattr(user, 'pk', user)
+        return self.db_manager(hints={'user_id': user_id}).filter(user_id=user_id)
+
+
 class Expense(models.Model):
     """
     Reprezentuje pojedynczy wydatek użytkownika.
     Atrybuty:
     - user: Użytkownik, do którego należy wydatek.
     - category: Kategoria wydatku; przy usunięciu kategorii ustawiana na NULL.
+
+    Wydatki mogą być przechowywane w osobnych bazach (shardach) niż użytkownicy
+    i kategorie; wtedy klucze obce nie mają ograniczeń w bazie, a usuwanie
+    użytkownika i kategorii obsługują sygnały (user_sharded_fk, api_app.sharding).
+    Zapytania należy zaczynać od Expense.objects.for_user(...).
     - amount: Kwota wydatku (maks. 10 cyfr, 2 miejsca po przecinku).
     - date: Data wystąpienia wydatku.
+    - recurring_rule: Reguła cykliczna, z której powstał wydatek (None – wydatek dodany ręcznie);
+      para (reguła, data) jest unikalna, więc ponowne przetworzenie reguły nie dubluje wydatków.
     """
     user = models.ForeignKey(
         User,
-        on_delete=models.CASCADE,
+        **user_sharded_fk(models.CASCADE),
+        db_index=False,
         related_name='expenses'
     )
     category = models.ForeignKey(
         Category,
-        on_delete=models.SET_NULL,
+        **user_sharded_fk(models.SET_NULL),
         null=True,
         related_name='expenses'
     )
@@ -53,11 +158,30 @@ class Expense(models.Model):
         ]
     )
     date = models.DateField()
+    recurring_rule = models.ForeignKey(
+        'RecurringExpense',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+
+    objects = UserShardedManager()
 
     class Meta:
+        # Data "nie z przyszłości" jest walidowana w clean() i w serializerze.
+        # Ograniczenie CHECK z datą wyliczaną przy imporcie zmieniało stan
+        # migracji każdego dnia i wymuszało makemigrations przy każdym starcie.
         constraints = [
             models.CheckConstraint(check=models.Q(amount__gt=0), name='expense_amount_positive'),
-            models.CheckConstraint(check=models.Q(date__lte=timezone.now().date()), name='expense_date_not_future'),
+            models.UniqueConstraint(fields=['recurring_rule', 'date'], name='expense_recurring_rule_date'),
+        ]
+        # Jeden indeks (user, date) obsługuje listę, podsumowanie miesiąca i wyszukiwanie
+        # po użytkowniku, dlatego klucz obcy user nie ma osobnego indeksu.
+        indexes = [
+            models.Index(fields=['user', 'date'], name='expense_user_date_idx'),
         ]
 
     def clean(self):
@@ -68,4 +192,394 @@ class Expense(models.Model):
             raise ValidationError({'date': "Data nie może być w przyszłości."})
 
     def __str__(self):
-        return f"{self.amount} - {self.date}"
\ No newline at end of file
+        return f"{self.amount} - {self.date}"
+
+
+class ArchivedExpense(models.Model):
+    """
+    Wydatek przeniesiony z tabeli Expense do archiwum (polecenie `archive_expenses`).
+
+    Zachowuje identyfikator oryginalnego wydatku. Tabela jest zwarta – bez walidatorów
+    i z jednym indeksem (user, date) – i czytana tylko przy pełnej liście wydatków.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        User,
+        **user_sharded_fk(models.CASCADE),
+        db_index=False,
+        related_name='archived_expenses'
+    )
+    category = models.ForeignKey(
+        Category,
+        **user_sharded_fk(models.SET_NULL),
+        db_index=False,
+        null=True,
+        related_name='+'
+    )
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    date = models.DateField()
+
+    objects = UserShardedManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date'], name='archived_expense_user_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.amount} - {self.date}"
+
+
+class MonthlyExpenseTotal(models.Model):
+    """
+    Suma i liczba zarchiwizowanych wydatków użytkownika w danej kategorii i miesiącu.
+
+    Atrybuty:
+    - month: Pierwszy dzień miesiąca.
+    - total: Suma kwot wydatków.
+    - count: Liczba wydatków.
+    """
+    user = models.ForeignKey(
+        User,
+        **user_sharded_fk(models.CASCADE),
+        db_index=False,
+        related_name='+'
+    )
+    category = models.ForeignKey(
+        Category,
+        **user_sharded_fk(models.SET_NULL),
+        db_index=False,
+        null=True,
+        related_name='+'
+    )
+    month = models.DateField()
+    total = models.DecimalField(max_digits=14, decimal_places=2)
+    count = models.PositiveIntegerField()
+
+    objects = UserShardedManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month', 'category'], name='monthly_total_user_month_category'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m}: {self.total}"
+
+
+class RecurringExpense(models.Model):
+    """
+    Reguła wydatku cyklicznego (np. czynsz, abonament).
+
+    Atrybuty:
+    - category, amount: Szablon generowanych wydatków.
+    - interval, interval_count: Co ile dni, tygodni, miesięcy lub lat powstaje wydatek.
+    - start_date: Data pierwszego wydatku; wyznacza też dzień miesiąca kolejnych
+      (31 stycznia -> 28/29 lutego -> 31 marca).
+    - end_date: Data, po której reguła nie generuje już wydatków (opcjonalna).
+    - next_run: Data następnego wydatku do wygenerowania (None – reguła zakończona).
+
+    Wydatki generuje polecenie `run_recurring_expenses` (api_app.recurring).
+    """
+    DAY = 'day'
+    WEEK = 'week'
+    MONTH = 'month'
+    YEAR = 'year'
+    INTERVAL_CHOICES = [
+        (DAY, 'Dzień'),
+        (WEEK, 'Tydzień'),
+        (MONTH, 'Miesiąc'),
+        (YEAR, 'Rok'),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        **user_sharded_fk(models.CASCADE),
+        db_index=False,
+        related_name='+'
+    )
+    category = models.ForeignKey(
+        Category,
+        **user_sharded_fk(models.SET_NULL),
+        db_index=False,
+        null=True,
+        related_name='+'
+    )
+    amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[
+            MinValueValidator(0.01, message="Kwota musi być większa niż 0."),
+        ]
+    )
+    interval = models.CharField(max_length=5, choices=INTERVAL_CHOICES)
+    interval_count = models.PositiveSmallIntegerField(default=1)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    next_run = models.DateField(null=True)
+
+    objects = UserShardedManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user'], name='recurring_expense_user_idx'),
+            # Wyszukiwanie reguł do przetworzenia (next_run <= dziś) przez planistę.
+            models.Index(fields=['next_run'], name='recurring_expense_next_run_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.amount} co {self.interval_count} {self.interval}"
+
+
+class CategoryBudget(models.Model):
+    """
+    Miesięczny limit wydatków użytkownika w kategorii.
+
+    Atrybuty:
+    - limit: Kwota limitu na jeden miesiąc kalendarzowy.
+
+    Przekroczenie progów limitu (CATEGORY_BUDGET_THRESHOLDS) jest sprawdzane przy
+    zapisie wydatku na podstawie MonthlyCategorySpend (api_app.budgets).
+    """
+    user = models.ForeignKey(
+        User,
+        **user_sharded_fk(models.CASCADE),
+        db_index=False,
+        related_name='+'
+    )
+    category = models.ForeignKey(
+        Category,
+        **user_sharded_fk(models.CASCADE),
+        db_index=False,
+        related_name='+'
+    )
+    limit = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        validators=[
+            MinValueValidator(0.01, message="Limit musi być większy niż 0."),
+        ]
+    )
+
+    objects = UserShardedManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'category'], name='category_budget_user_category'),
+        ]
+
+    def __str__(self):
+        return f"{self.category_id}: {self.limit}"
+
+
+class MonthlyCategorySpend(models.Model):
+    """
+    Bieżąca suma wydatków użytkownika w kategorii z limitem w danym miesiącu.
+
+    Aktualizowana o różnicę przy każdym zapisie i usunięciu wydatku w widokach
+    (api_app.budgets), więc sprawdzenie progów nie wymaga SUM() po wydatkach.
+    Zgodność z wydatkami sprawdza polecenie `reconcile_category_spend`.
+
+    Atrybuty:
+    - month: Pierwszy dzień miesiąca.
+    - total: Suma kwot wydatków.
+    - alert_level: Liczba progów limitu, o których przekroczeniu już powiadomiono.
+    """
+    user = models.ForeignKey(
+        User,
+        **user_sharded_fk(models.CASCADE),
+        db_index=False,
+        related_name='+'
+    )
+    category = models.ForeignKey(
+        Category,
+        **user_sharded_fk(models.CASCADE),
+        db_index=False,
+        related_name='+'
+    )
+    month = models.DateField()
+    total = models.DecimalField(max_digits=14, decimal_places=2)
+    alert_level = models.PositiveSmallIntegerField(default=0)
+
+    objects = UserShardedManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'category', 'month'], name='category_spend_user_category_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.category_id}: {self.total}"
+
+
+class BudgetAlert(models.Model):
+    """
+    Kolejka powiadomień o przekroczeniu progu limitu (outbox).
+
+    Wpis powstaje w tej samej transakcji co zapis wydatku; powiadomienia wysyła
+    i usuwa z kolejki polecenie `send_budget_alerts`.
+
+    Atrybuty:
+    - threshold: Przekroczony próg w procentach limitu.
+    - total, limit: Suma wydatków i limit w chwili przekroczenia.
+    """
+    user = models.ForeignKey(
+        User,
+        **user_sharded_fk(models.CASCADE),
+        db_index=False,
+        related_name='+'
+    )
+    category = models.ForeignKey(
+        Category,
+        **user_sharded_fk(models.CASCADE),
+        db_index=False,
+        related_name='+'
+    )
+    month = models.DateField()
+    threshold = models.PositiveSmallIntegerField()
+    total = models.DecimalField(max_digits=14, decimal_places=2)
+    limit = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = UserShardedManager()
+
+    def __str__(self):
+        return f"{self.user_id} {self.month:%Y-%m} {self.category_id}: {self.threshold}%"
+
+
+class UserShard(models.Model):
+    """
+    Przypisanie użytkownika do shardu z danymi wydatków (alias bazy danych).
+
+    Przechowywane w bazie głównej; wpis powstaje przy pierwszym dostępie do danych
+    użytkownika i zmienia się tylko przy przenoszeniu użytkownika między shardami
+    (polecenie `rebalance_expense_shards`).
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='expense_shard'
+    )
+    alias = models.CharField(max_length=64)
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.alias}"
+
+
+class AppendOnlyQuerySet(models.QuerySet):
+    """QuerySet bez masowej zmiany i usuwania wierszy (tabele tylko do dopisywania)."""
+
+    def update(self, **kwargs):
+        raise NotSupportedError(f"{self.model.__name__} jest tylko do dopisywania.")
+
+    def delete(self):
+        raise NotSupportedError(f"{self.model.__name__} jest tylko do dopisywania.")
+
+
+class ModeratorAuditEvent(models.Model):
+    """
+    Wpis dziennika działań moderatorów (tylko do dopisywania).
+
+    Atrybuty:
+    - created_at: Czas żądania (nie zapisu – wpisy trafiają do bazy partiami, zob. api_app.audit).
+    - actor, actor_username: Użytkownik wykonujący żądanie; nazwa jest kopiowana,
+      aby wpis pozostał czytelny po usunięciu konta.
+    - action: Lista użytkowników, podgląd albo usunięcie użytkownika.
+    - target, target_username: Użytkownik, którego dotyczy żądanie (None dla listy).
+    - status_code: Status HTTP odpowiedzi (również odmowy 403/404).
+    - ip_address: Adres klienta (REMOTE_ADDR).
+
+    Klucze obce nie mają ograniczeń ani kaskady – usunięcie użytkownika nie usuwa wpisów.
+    """
+    LIST = 'list'
+    VIEW = 'view'
+    DELETE = 'delete'
+    ACTION_CHOICES = [
+        (LIST, 'Lista użytkowników'),
+        (VIEW, 'Podgląd użytkownika'),
+        (DELETE, 'Usunięcie użytkownika'),
+    ]
+
+    created_at = models.DateTimeField(default=timezone.now)
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name='+'
+    )
+    actor_username = models.CharField(max_length=150)
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES)
+    target = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        null=True,
+        related_name='+'
+    )
+    target_username = models.CharField(max_length=150, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    ip_address = models.GenericIPAddressField(null=True)
+
+    objects = AppendOnlyQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='moderator_audit_created_idx'),
+            models.Index(fields=['actor', 'created_at'], name='moderator_audit_actor_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise NotSupportedError("ModeratorAuditEvent jest tylko do dopisywania.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise NotSupportedError("ModeratorAuditEvent jest tylko do dopisywania.")
+
+    def __str__(self):
+        return f"{self.created_at:%Y-%m-%d %H:%M:%S} {self.actor_username} {self.action} {self.target_id}"
+
+
+class RevokedToken(models.Model):
+    """
+    Unieważniony refresh token JWT (po rotacji albo wylogowaniu).
+
+    Wiersz jest potrzebny tylko do wygaśnięcia tokenu – później podpis i tak go
+    odrzuci, więc `prune_revoked_tokens` usuwa wiersze z przeszłym `expires_at`.
+    Sprawdzanie poprzedza filtr Blooma w pamięci procesu (api_app.revocation).
+    """
+    jti = models.CharField(max_length=255, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.jti} (do {self.expires_at:%Y-%m-%d %H:%M})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Klucz Idempotency-Key użytkownika i zapisana odpowiedź na pierwsze żądanie z nim.
+
+    Unikalność (user, key_hash) rozstrzyga w bazie, które z równoległych żądań
+    wykonuje zapis – niezależnie od cache i liczby procesów (api_app.idempotency).
+    Wiersz bez `status_code` oznacza żądanie w trakcie obsługi; po `locked_until`
+    może je przejąć ponowienie. `prune_idempotency_keys` usuwa wiersze
+    z przeszłym `expires_at`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    key_hash = models.CharField(max_length=64)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.TextField(blank=True)
+    locked_until = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key_hash'], name='idempotency_key_user_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key_hash[:12]} ({self.status_code or 'w trakcie'})"
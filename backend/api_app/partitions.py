@@ -0,0 +1,103 @@
+"""
+Partycjonowanie tabeli wydatków po dacie (tylko MySQL).
+
+Migracja 0006 zamienia tabelę Expense na partycjonowaną RANGE COLUMNS(date) z jedną
+partycją p_future. Funkcje z tego modułu (polecenie `maintain_expense_partitions`)
+dzielą p_future na partycje miesięczne pYYYYMM z wyprzedzeniem, a dane sprzed horyzontu
+archiwum trafiają do jednej partycji p_history. Puste partycje sprzed horyzontu
+(po archiwizacji) są usuwane przez DROP PARTITION, co nie wymaga skanowania tabeli.
+Dla innych baz danych funkcje nic nie robią.
+"""
+
+from datetime import date
+
+from django.db import connections
+from django.utils import timezone
+
+from .archive import add_months
+from .models import Expense
+
+FUTURE_PARTITION = 'p_future'
+HISTORY_PARTITION = 'p_history'
+
+
+def partition_name(month):
+    return f'p{month:%Y%m}'
+
+
+def existing_partitions(connection):
+    """Zwraca listę (nazwa, górna_granica) partycji tabeli Expense; granica None = MAXVALUE."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT PARTITION_NAME, PARTITION_DESCRIPTION
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+            """,
+            [Expense._meta.db_table],
+        )
+        return [
+            (name, None if bound == 'MAXVALUE' else date.fromisoformat(bound.strip("'")))
+            for name, bound in cursor.fetchall()
+        ]
+
+
+def ensure_future_partitions(alias, months_ahead, history_before):
+    """
+    Tworzy partycje miesięczne do `months_ahead` miesięcy naprzód.
+
+    Przy pierwszym podziale wiersze sprzed `history_before` trafiają do p_history.
+    Zwraca nazwy utworzonych partycji.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'mysql':
+        return []
+    partitions = existing_partitions(connection)
+    if not partitions:
+        return []
+
+    bounds = [bound for _name, bound in partitions if bound is not None]
+    first_month = max(bounds) if bounds else history_before
+    last_month = add_months(timezone.localdate(), months_ahead)
+    months = []
+    month = first_month
+    while month <= last_month:
+        months.append(month)
+        month = add_months(month, 1)
+    if not months:
+        return []
+
+    definitions = []
+    if not bounds:
+        definitions.append(f"PARTITION {HISTORY_PARTITION} VALUES LESS THAN ('{history_before.isoformat()}')")
+    definitions += [
+        f"PARTITION {partition_name(month)} VALUES LESS THAN ('{add_months(month, 1).isoformat()}')"
+        for month in months
+    ]
+    definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"ALTER TABLE {connection.ops.quote_name(Expense._meta.db_table)} "
+            f"REORGANIZE PARTITION {FUTURE_PARTITION} INTO ({', '.join(definitions)})"
+        )
+    return [partition_name(month) for month in months]
+
+
+def drop_archived_partitions(alias, cutoff):
+    """Usuwa puste partycje, których wszystkie daty są sprzed `cutoff`. Zwraca ich nazwy."""
+    connection = connections[alias]
+    if connection.vendor != 'mysql':
+        return []
+    table = connection.ops.quote_name(Expense._meta.db_table)
+    dropped = []
+    with connection.cursor() as cursor:
+        for name, bound in existing_partitions(connection):
+            if bound is None or bound > cutoff:
+                continue
+            cursor.execute(f"SELECT 1 FROM {table} PARTITION ({name}) LIMIT 1")
+            if cursor.fetchone() is None:
+                dropped.append(name)
+        if dropped:
+            cursor.execute(f"ALTER TABLE {table} DROP PARTITION {', '.join(dropped)}")
+    return dropped
@@ -14,4 +14,10 @@ class IsModerator(BasePermission):
             request.user
             and request.user.is_authenticated
             and request.user.groups.filter(name='Moderator').exists()
-        )
\ No newline at end of file
+        )
+class IsSuperuser(BasePermission):
+    """
+    Pozwala na dostęp tylko superużytkownikom (np. dziennik działań moderatorów).
+    """
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.is_superuser)
@@ -0,0 +1,185 @@
+"""
+Profilowanie pojedynczych żądań w produkcji (api_app.middleware.ProfilingMiddleware).
+
+Capture łączy dwa lekkie pomiary:
+  - próbkowanie stosu wątku żądania co PROFILING_INTERVAL_MS ms z osobnego wątku
+    (bez sys.setprofile – narzut nie zależy od liczby wywołań funkcji),
+  - oś czasu zapytań SQL (execute_wrapper na wszystkich bazach; bez parametrów).
+
+Wynik trafia do ograniczonego bufora pierścieniowego na dysku (PROFILING_DIR,
+najwyżej PROFILING_MAX_CAPTURES plików – najstarsze są usuwane). Stosy są zapisane
+w formacie "collapsed" (ramka;ramka;ramka liczba_próbek), który przyjmują
+flamegraph.pl i speedscope. Przegląda je polecenie `request_profiles`.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}".replace(';', ',')
+
+
+class SamplingProfiler:
+    """
+    Próbkuje stos wątku `thread_id` co `interval` sekund.
+
+    Ramki powyżej `root_code` (serwer WSGI i sam profiler) są pomijane.
+    """
+
+    def __init__(self, thread_id, interval, root_code=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root_code = root_code
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame.f_code is not self.root_code:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+class SqlTimeline:
+    """execute_wrapper zapisujący początek, czas trwania i treść zapytań (bez parametrów)."""
+
+    def __init__(self, started):
+        self.started = started
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'start_ms': round((start - self.started) * 1000, 3),
+                'duration_ms': round((time.perf_counter() - start) * 1000, 3),
+                'alias': context['connection'].alias,
+                'many': many,
+                'sql': sql,
+            })
+
+
+class Capture:
+    """Profil bloku kodu wykonywanego w bieżącym wątku (stosy + oś czasu SQL)."""
+
+    def __init__(self, interval, root_code=None):
+        self.interval = interval
+        self.root_code = root_code
+
+    def __enter__(self):
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.timeline = SqlTimeline(self.started)
+        self.profiler = SamplingProfiler(threading.get_ident(), self.interval, self.root_code)
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self.timeline))
+        self._stack.enter_context(self.profiler)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        self.duration = time.perf_counter() - self.started
+
+    def collapsed(self):
+        return '\n'.join(f'{stack} {count}' for stack, count in self.profiler.stacks.most_common())
+
+    def as_dict(self, **metadata):
+        return {
+            **metadata,
+            'started': self.started_at,
+            'duration_ms': round(self.duration * 1000, 3),
+            'interval_ms': self.interval * 1000,
+            'samples': self.profiler.samples,
+            'collapsed': self.collapsed(),
+            'sql': self.timeline.queries,
+        }
+
+
+def _directory():
+    return Path(settings.PROFILING_DIR)
+
+
+def save_capture(data):
+    """Zapisuje profil w buforze pierścieniowym i zwraca jego identyfikator."""
+    directory = _directory()
+    directory.mkdir(parents=True, exist_ok=True)
+    capture_id = f'{time.time_ns()}-{os.getpid()}'
+    path = directory / f'{capture_id}.json'
+    temporary = directory / f'.{capture_id}.tmp'
+    temporary.write_text(json.dumps({'id': capture_id, **data}), encoding='utf-8')
+    os.replace(temporary, path)
+
+    captures = sorted(directory.glob('*.json'))
+    for old in captures[:-settings.PROFILING_MAX_CAPTURES]:
+        old.unlink(missing_ok=True)
+    return capture_id
+
+
+def list_captures():
+    """Zwraca zapisane profile (od najstarszego)."""
+    captures = []
+    for path in sorted(_directory().glob('*.json')):
+        try:
+            captures.append(json.loads(path.read_text(encoding='utf-8')))
+        except (OSError, ValueError):
+            # Plik usunięty lub nadpisany przez inny proces w trakcie odczytu.
+            continue
+    return captures
+
+
+def load_capture(capture_id):
+    path = _directory() / f'{Path(capture_id).name}.json'
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return None
+
+
+def can_profile(request):
+    """
+    Czy nadawca żądania może zażądać profilu nagłówkiem (moderator lub staff).
+
+    Ścieżki API nie mają request.user przed widokiem, więc token JWT z ciasteczka
+    jest sprawdzany tutaj – tylko dla żądań z nagłówkiem profilowania.
+    """
+    from rest_framework.exceptions import AuthenticationFailed
+
+    from .custom_auth import CookieJWTAuthentication
+
+    try:
+        authenticated = CookieJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    if authenticated is None:
+        return False
+    user = authenticated[0]
+    return user.is_staff or user.groups.filter(name='Moderator').exists()
@@ -0,0 +1,240 @@
+"""
+Budżety zapytań SQL endpointów: scenariusze, dane i pomiar.
+
+Wspólne dla polecenia `check_query_budgets` (CI, raport z diffem SQL) i testów
+(api_app.tests.test_query_budgets). Każdy scenariusz jest mierzony przy pustym
+cache w transakcji wycofywanej po żądaniu, łącznie we wszystkich bazach.
+"""
+
+import json
+import re
+from collections import namedtuple
+from contextlib import ExitStack
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from django_rest_passwordreset.models import ResetPasswordToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .activation import issue_activation_token
+from .revocation import revocation_filter
+from .models import (
+    ArchivedExpense, Category, CategoryBudget, Expense, ModeratorAuditEvent, MonthlyCategorySpend, MonthlyExpenseTotal,
+    RecurringExpense,
+)
+
+PASSWORD = 'Budzet!123x'
+
+# Scenariusz: żądanie do trasy `route` (nazwa z myproject/urls.py) w imieniu `actor`
+# ('owner', 'moderator', 'superuser' albo None). `kwargs`, `body` i `prepare` to funkcje danych
+# z seed(); `prepare` jest wywoływane przed pomiarem (np. wydanie tokenu).
+Scenario = namedtuple('Scenario', 'route method actor status budget kwargs body prepare')
+
+
+def scenario(route, method, actor, status, budget, kwargs=None, body=None, prepare=None):
+    return Scenario(route, method, actor, status, budget, kwargs, body, prepare)
+
+
+def _reset_token(data):
+    data['reset_token'] = ResetPasswordToken.objects.create(user=data['owner']).key
+
+
+def _activation_token(data):
+    data['activation_token'] = issue_activation_token(data['inactive'])
+
+
+def _revocation_filter(data):
+    # Filtr unieważnień buduje się raz na proces – nie wliczamy tego do żądania.
+    revocation_filter.sync(force=True)
+
+
+# Limity zapytań SQL na żądanie (łącznie we wszystkich bazach, przy pustym cache,
+# wliczając SAVEPOINT/RELEASE). Liczba zapytań nie może też zależeć od ilości danych.
+# Zmniejszenie liczby zapytań to dobry moment na obniżenie limitu.
+SCENARIOS = [
+    scenario('token_obtain_pair', 'post', None, 200, 2,
+             body=lambda data: {'username': data['owner'].username, 'password': PASSWORD}),
+    scenario('token_refresh', 'post', 'owner', 200, 4, body=lambda data: {}, prepare=_revocation_filter),
+    scenario('password_reset:reset-password-request', 'post', None, 200, 3,
+             body=lambda data: {'email': data['owner'].email}),
+    scenario('password_reset:reset-password-validate', 'post', None, 200, 1, prepare=_reset_token,
+             body=lambda data: {'token': data['reset_token']}),
+    scenario('password_reset:reset-password-confirm', 'post', None, 200, 5, prepare=_reset_token,
+             body=lambda data: {'token': data['reset_token'], 'password': 'NoweHaslo!456'}),
+    scenario('register', 'post', None, 201, 4, body=lambda data: {
+        'username': 'nowy_uzytkownik', 'email': 'nowy@example.com', 'first_name': 'Nowy',
+        'last_name': 'Użytkownik', 'password': 'Rejestracja!789', 'password2': 'Rejestracja!789',
+    }),
+    scenario('activate_account', 'post', None, 200, 2, prepare=_activation_token,
+             body=lambda data: {'uid': data['inactive'].pk, 'token': data['activation_token']}),
+    scenario('get_csrf_token', 'get', None, 200, 0),
+    scenario('logout', 'post', 'owner', 200, 4, prepare=_revocation_filter),
+    scenario('is_logged_in', 'get', 'owner', 200, 2),
+    scenario('resend_activation', 'post', None, 200, 1,
+             body=lambda data: {'username': data['inactive'].username}),
+    scenario('category-list', 'get', 'owner', 200, 2),
+    scenario('expense-list', 'get', 'owner', 200, 3),
+    scenario('expense-list', 'post', 'owner', 201, 8,
+             body=lambda data: {'category': data['category'].pk, 'amount': '12.34', 'date': str(timezone.localdate())}),
+    scenario('expense-detail', 'get', 'owner', 200, 2, kwargs=lambda data: {'pk': data['expense'].pk}),
+    scenario('expense-detail', 'put', 'owner', 200, 6, kwargs=lambda data: {'pk': data['expense'].pk},
+             body=lambda data: {'amount': '99.99'}),
+    scenario('expense-detail', 'delete', 'owner', 204, 6, kwargs=lambda data: {'pk': data['expense'].pk}),
+    scenario('expense-detail', 'delete', 'owner', 204, 13, kwargs=lambda data: {'pk': data['archived'].pk}),
+    scenario('recurring-expense-list', 'get', 'owner', 200, 2),
+    scenario('recurring-expense-list', 'post', 'owner', 201, 3, body=lambda data: {
+        'category': data['category'].pk, 'amount': '1500.00', 'interval': 'month', 'start_date': str(timezone.localdate()),
+    }),
+    scenario('recurring-expense-detail', 'delete', 'owner', 204, 2, kwargs=lambda data: {'pk': data['recurring'].pk}),
+    # Pod WSGI (klient testowy) strumień SSE odpowiada 501 bez zapytań.
+    scenario('expense-events', 'get', 'owner', 501, 0),
+    scenario('expense-summary', 'get', 'owner', 200, 3),
+    scenario('expense-analytics', 'get', 'owner', 200, 4),
+    scenario('budget-list', 'get', 'owner', 200, 4),
+    scenario('budget-list', 'post', 'owner', 200, 9,
+             body=lambda data: {'category': data['category'].pk, 'limit': '500.00'}),
+    scenario('budget-detail', 'delete', 'owner', 204, 5, kwargs=lambda data: {'category_id': data['category'].pk}),
+    scenario('dashboard', 'get', 'owner', 200, 6),
+    scenario('moderator-users-list', 'get', 'moderator', 200, 4),
+    scenario('moderator-user-detail', 'get', 'moderator', 200, 4, kwargs=lambda data: {'pk': data['owner'].pk}),
+    scenario('moderator-user-detail', 'delete', 'moderator', 204, 21, kwargs=lambda data: {'pk': data['owner'].pk}),
+    scenario('moderator-audit-log', 'get', 'superuser', 200, 2),
+]
+
+
+def route_names(patterns=None, namespace=''):
+    """Zwraca nazwy wszystkich tras URLconf (z przestrzeniami nazw)."""
+    names = []
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            inner = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            names += route_names(pattern.url_patterns, inner)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.append(f'{namespace}{pattern.name}')
+    return names
+
+
+def seed(size):
+    """
+    Tworzy dane o rozmiarze `size`: kategorie, właściciela z `size` bieżącymi
+    i `size` zarchiwizowanymi wydatkami, moderatora, superużytkownika oraz `size` innych
+    użytkowników (część w grupie Moderator) z wpisami w dzienniku działań moderatorów.
+    """
+    password = make_password(PASSWORD)
+    moderators = Group.objects.get(name='Moderator')
+    categories = [Category.objects.create(name=f'Kategoria {i}') for i in range(size)]
+
+    owner = User.objects.create(username='wlasciciel', email='wlasciciel@example.com', password=password)
+    moderator = User.objects.create(username='moderator', email='moderator@example.com', password=password)
+    moderator.groups.add(moderators)
+    superuser = User.objects.create(
+        username='administrator', email='administrator@example.com', password=password, is_superuser=True
+    )
+    inactive = User.objects.create(
+        username='nieaktywny', email='nieaktywny@example.com', password=password, is_active=False
+    )
+    others = User.objects.bulk_create([
+        User(username=f'uzytkownik{i}', email=f'uzytkownik{i}@example.com', password=password,
+             first_name=f'Imię{i}', last_name=f'Nazwisko{i}')
+        for i in range(size)
+    ])
+    for other in others[::3]:
+        other.groups.add(moderators)
+
+    today = timezone.localdate()
+    month_start = today.replace(day=1)
+    Expense.objects.for_user(owner).bulk_create([
+        Expense(user=owner, category=categories[i % size] if i % 4 else None,
+                amount=f'{i + 1}.50', date=month_start + timedelta(days=i % today.day))
+        for i in range(size)
+    ])
+    archived_month = date(today.year - 3, today.month, 1)
+    ArchivedExpense.objects.for_user(owner).bulk_create([
+        ArchivedExpense(id=10 ** 9 + i, user=owner, category=categories[i % size],
+                        amount=f'{i + 1}.25', date=archived_month + timedelta(days=i % 28))
+        for i in range(size)
+    ])
+    MonthlyExpenseTotal.objects.for_user(owner).bulk_create([
+        MonthlyExpenseTotal(user=owner, category=category, month=archived_month, total='10.00', count=1)
+        for category in categories
+    ])
+    # Limit pierwszej kategorii (z bieżącą sumą) – zapisy wydatków przechodzą przez api_app.budgets.
+    CategoryBudget.objects.for_user(owner).create(user=owner, category=categories[0], limit='1000000.00')
+    MonthlyCategorySpend.objects.for_user(owner).create(
+        user=owner, category=categories[0], month=month_start, total='0.00'
+    )
+    RecurringExpense.objects.for_user(owner).bulk_create([
+        RecurringExpense(user=owner, category=categories[i % size], amount='99.00', interval=RecurringExpense.MONTH,
+                         start_date=month_start, next_run=month_start)
+        for i in range(size)
+    ])
+    ModeratorAuditEvent.objects.bulk_create([
+        ModeratorAuditEvent(actor=moderator, actor_username=moderator.username, action=ModeratorAuditEvent.VIEW,
+                            target=other, target_username=other.username, status_code=200)
+        for other in others
+    ])
+    return {
+        'owner': owner,
+        'moderator': moderator,
+        'superuser': superuser,
+        'inactive': inactive,
+        'category': categories[0],
+        'expense': Expense.objects.for_user(owner).order_by('pk').first(),
+        'archived': ArchivedExpense.objects.for_user(owner).order_by('pk').first(),
+        'recurring': RecurringExpense.objects.for_user(owner).order_by('pk').first(),
+    }
+
+
+def normalize_sql(sql):
+    """Zastępuje literały, aby różnice dotyczyły kształtu zapytań, a nie wartości."""
+    sql = re.sub(r"'(?:[^']|'')*'", "'?'", sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    return re.sub(r'IN \((?:\?, )*\?\)', 'IN (...)', sql)
+
+
+def client_for(user):
+    """Klient testowy z ciasteczkami JWT użytkownika (None – anonimowy)."""
+    # Wyjątek w widoku to status 500 w raporcie, a nie przerwanie całego sprawdzenia.
+    client = Client(raise_request_exception=False)
+    if user is not None:
+        refresh = RefreshToken.for_user(user)
+        client.cookies[settings.JWT_AUTH_COOKIE] = str(refresh.access_token)
+        client.cookies[settings.JWT_AUTH_REFRESH_COOKIE] = str(refresh)
+    return client
+
+
+def rolled_back():
+    """Transakcja na każdej bazie, wycofywana na końcu bloku."""
+    stack = ExitStack()
+    for alias in connections:
+        stack.enter_context(transaction.atomic(using=alias))
+    stack.callback(lambda: [transaction.set_rollback(True, using=alias) for alias in connections])
+    return stack
+
+
+def measure(item, data):
+    """Wykonuje scenariusz przy pustym cache. Zwraca (status HTTP, lista zapytań ze wszystkich baz)."""
+    client = client_for(data.get(item.actor))
+    cache.clear()
+    with rolled_back():
+        if item.prepare:
+            item.prepare(data)
+        url = reverse(item.route, kwargs=item.kwargs(data) if item.kwargs else None)
+        body = json.dumps(item.body(data)) if item.body else None
+        with ExitStack() as stack:
+            captures = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            if body is None:
+                response = getattr(client, item.method)(url)
+            else:
+                response = getattr(client, item.method)(url, body, content_type='application/json')
+    queries = [query for capture in captures for query in capture.captured_queries]
+    return response.status_code, queries
@@ -0,0 +1,111 @@
+"""
+Wydatki cykliczne (RecurringExpense).
+
+Polecenie `run_recurring_expenses` przetwarza partiami reguły z next_run <= dziś:
+w jednej transakcji blokuje partię (SELECT ... FOR UPDATE SKIP LOCKED – równoległe
+procesy biorą różne reguły), generuje wszystkie zaległe wydatki (nadrabianie po
+przestoju) jednym bulk_create i przesuwa next_run. Para (reguła, data) jest
+unikalna w Expense, a daty już wygenerowane są pomijane, więc ponowne przetworzenie
+reguły nie dubluje wydatków.
+
+bulk_create nie wysyła sygnałów, dlatego partia sama aktualizuje sumy limitów
+(api_app.budgets), unieważnia analizę (api_app.analytics) i wysyła użytkownikom
+zdarzenie `reset` w strumieniu zmian (api_app.events).
+"""
+
+import calendar
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+
+from . import events
+from .analytics import invalidate_expense_analytics
+from .budgets import record_generated_expenses
+from .models import Expense, RecurringExpense
+
+
+def _add_months(day, months, anchor_day):
+    year, month = divmod(day.year * 12 + day.month - 1 + months, 12)
+    month += 1
+    return day.replace(year=year, month=month, day=min(anchor_day, calendar.monthrange(year, month)[1]))
+
+
+def next_occurrence(rule, day):
+    """Zwraca datę wydatku następującego po wydatku z dnia `day`."""
+    step = rule.interval_count
+    if rule.interval == RecurringExpense.DAY:
+        return day + timedelta(days=step)
+    if rule.interval == RecurringExpense.WEEK:
+        return day + timedelta(weeks=step)
+    months = step if rule.interval == RecurringExpense.MONTH else 12 * step
+    return _add_months(day, months, rule.start_date.day)
+
+
+def due_dates(rule, today):
+    """
+    Zwraca (daty wydatków do wygenerowania do `today` włącznie, nowe next_run).
+
+    Nowe next_run to None, gdy kolejny wydatek wypadałby po end_date.
+    """
+    dates = []
+    day = rule.next_run
+    while day is not None and day <= today:
+        if rule.end_date and day > rule.end_date:
+            return dates, None
+        dates.append(day)
+        day = next_occurrence(rule, day)
+    if day is not None and rule.end_date and day > rule.end_date:
+        day = None
+    return dates, day
+
+
+def materialize_batch(alias, today, batch_size=1000):
+    """
+    Przetwarza w bazie `alias` jedną partię reguł do wykonania.
+
+    Zwraca (liczba reguł, liczba wygenerowanych wydatków); (0, 0) – nie ma już
+    reguł do przetworzenia (albo pozostałe są zablokowane przez inne procesy).
+    """
+    with transaction.atomic(using=alias):
+        rules = list(
+            RecurringExpense.objects.using(alias)
+            .select_for_update(skip_locked=True)
+            .filter(next_run__lte=today)
+            .order_by('next_run', 'pk')[:batch_size]
+        )
+        if not rules:
+            return 0, 0
+
+        planned = []
+        for rule in rules:
+            dates, rule.next_run = due_dates(rule, today)
+            planned += [(rule, day) for day in dates]
+
+        # Daty wygenerowane już wcześniej (np. po ręcznej zmianie next_run) są pomijane.
+        existing = set(
+            Expense.objects.using(alias)
+            .filter(recurring_rule__in=rules, date__gte=min(day for _rule, day in planned))
+            .values_list('recurring_rule_id', 'date')
+        ) if planned else set()
+        expenses = [
+            Expense(user_id=rule.user_id, category_id=rule.category_id, amount=rule.amount,
+                    date=day, recurring_rule=rule)
+            for rule, day in planned
+            if (rule.pk, day) not in existing
+        ]
+        Expense.objects.using(alias).bulk_create(expenses, batch_size=1000)
+        # Jedno UPDATE na każdą nową wartość next_run (w partii jest ich zwykle kilka) –
+        # bulk_update budowałby wyrażenie CASE z gałęzią dla każdej reguły.
+        by_next_run = defaultdict(list)
+        for rule in rules:
+            by_next_run[rule.next_run].append(rule.pk)
+        for next_run, pks in by_next_run.items():
+            RecurringExpense.objects.using(alias).filter(pk__in=pks).update(next_run=next_run)
+
+        record_generated_expenses(expenses, alias)
+        users = {expense.user_id for expense in expenses}
+        invalidate_expense_analytics(*users, using=alias)
+        for user_id in users:
+            events.publish_on_commit(user_id, 'reset', {}, alias)
+    return len(rules), len(expenses)
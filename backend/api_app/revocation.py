@@ -0,0 +1,213 @@
+"""
+Unieważnianie refresh tokenów JWT (rotacja w CustomTokenRefreshView, wylogowanie).
+
+Źródłem prawdy jest tabela RevokedToken w bazie głównej. Sprawdzenie przy każdym
+odświeżeniu tokenu poprzedza filtr Blooma w pamięci procesu: gdy filtr nie zawiera
+jti, token na pewno nie jest unieważniony i odpowiedź nie kosztuje żadnego zapytania
+ani odczytu cache. Trafienie w filtrze (unieważnienie albo fałszywy alarm z
+prawdopodobieństwem ok. REVOCATION_FILTER_ERROR_RATE) rozstrzyga zapytanie do bazy.
+
+Procesy wymieniają się unieważnieniami przez współdzielony cache: revoke() dopisuje
+jti do dziennika (licznik REVOCATION_SEQ_CACHE_KEY i wpis na każdy numer), a filtr
+co najwyżej raz na REVOCATION_SYNC_INTERVAL sekund dopisuje nowe wpisy dziennika
+(jeden odczyt licznika i jeden get_many). Token unieważniony w innym procesie może
+więc być przyjęty jeszcze przez ten czas; w procesie, który go unieważnił – od razu.
+Dlatego przy kilku workerach cache musi być współdzielony (Redis, CACHE_URL): przy
+cache w pamięci procesu dziennik nie wychodzi poza proces i inne workery dowiadują
+się o unieważnieniu dopiero po przebudowie filtra z bazy, czyli nawet po
+REVOCATION_FILTER_REBUILD_INTERVAL. gunicorn.conf.py odmawia wtedy startu kilku
+workerów (api_app.checks). Ponowne użycie tokenu po rotacji i tak nie przejdzie –
+rotację rozstrzyga INSERT do bazy w revoke().
+Gdy dziennika nie da się odtworzyć (pusty lub wyczyszczony cache, wygasłe wpisy,
+za duża zaległość) oraz co REVOCATION_FILTER_REBUILD_INTERVAL sekund filtr jest
+budowany od nowa z bazy, bez wygasłych tokenów.
+"""
+
+import hashlib
+import math
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.utils import timezone
+
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken
+
+REVOCATION_SEQ_CACHE_KEY = 'revocation_seq'
+REVOCATION_EPOCH_CACHE_KEY = 'revocation_epoch'
+
+
+def revocation_log_key(seq):
+    return f'revocation_log:{seq}'
+
+
+class BloomFilter:
+    """Filtr Blooma na napisach: brak fałszywych negatywów, fałszywe trafienia z zadanym prawdopodobieństwem."""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(1, capacity)
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Podwójne haszowanie (Kirsch–Mitzenmacher): k pozycji z dwóch połówek jednego skrótu.
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * step) % self.size for index in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationFilter:
+    """
+    Filtr Blooma unieważnionych jti w pamięci procesu, synchronizowany z dziennikiem w cache.
+
+    Stan to (epoka, numer ostatniego wpisu dziennika): zmiana epoki w cache oznacza,
+    że dziennik zaczął się od nowa i filtr trzeba zbudować z bazy.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._epoch = None
+        self._seq = 0
+        self._pid = None
+        self._synced_at = 0.0
+        self._built_at = 0.0
+
+    def might_contain(self, jti):
+        """False oznacza, że jti na pewno nie jest unieważniony (bez zapytań poza synchronizacją)."""
+        self.sync()
+        return jti in self._bloom
+
+    def is_revoked(self, jti):
+        """Czy jti jest unieważniony; trafienie w filtrze (także fałszywe) sprawdza baza."""
+        if not self.might_contain(jti):
+            return False
+        return RevokedToken.objects.using(DEFAULT_DB_ALIAS).filter(jti=jti).exists()
+
+    def add(self, jti):
+        """Dopisuje jti unieważniony w tym procesie – widoczny tu od razu, bez czekania na synchronizację."""
+        self.sync()
+        with self._lock:
+            self._bloom.add(jti)
+
+    def sync(self, force=False):
+        """Dopisuje nowe wpisy dziennika z cache (najwyżej raz na REVOCATION_SYNC_INTERVAL s)."""
+        now = time.monotonic()
+        if not force and self._fresh(now):
+            return
+        with self._lock:
+            if not force and self._fresh(now):
+                return
+            # Po fork() (np. gunicorn --preload) filtr rodzica nie dostaje już jego unieważnień.
+            if (self._pid != os.getpid() or self._bloom is None
+                    or now - self._built_at >= settings.REVOCATION_FILTER_REBUILD_INTERVAL
+                    or self._bloom.count > self._bloom.capacity
+                    or not self._catch_up()):
+                self._rebuild(now)
+            self._synced_at = now
+
+    def _fresh(self, now):
+        return (self._pid == os.getpid() and self._bloom is not None
+                and now - self._synced_at < settings.REVOCATION_SYNC_INTERVAL)
+
+    def _catch_up(self):
+        """Dopisuje wpisy dziennika od ostatniej synchronizacji; False, gdy dziennika nie da się odtworzyć."""
+        state = cache.get_many([REVOCATION_EPOCH_CACHE_KEY, REVOCATION_SEQ_CACHE_KEY])
+        epoch = state.get(REVOCATION_EPOCH_CACHE_KEY)
+        seq = state.get(REVOCATION_SEQ_CACHE_KEY)
+        if epoch is None or epoch != self._epoch or seq is None or seq < self._seq:
+            return False
+        if seq - self._seq > settings.REVOCATION_SYNC_BATCH:
+            return False
+        if seq == self._seq:
+            return True
+        keys = [revocation_log_key(number) for number in range(self._seq + 1, seq + 1)]
+        entries = cache.get_many(keys)
+        if len(entries) != len(keys):
+            return False
+        for jti in entries.values():
+            self._bloom.add(jti)
+        self._seq = seq
+        return True
+
+    def _rebuild(self, now):
+        """Buduje filtr od nowa z bazy (tylko niewygasłe tokeny) i zapamiętuje stan dziennika."""
+        if cache.add(REVOCATION_SEQ_CACHE_KEY, 0, timeout=None):
+            cache.delete(REVOCATION_EPOCH_CACHE_KEY)
+        cache.add(REVOCATION_EPOCH_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+        # Stan dziennika czytany przed bazą: wpisy dopisane w trakcie zostaną dodane
+        # przy następnej synchronizacji (powtórne dodanie do filtra niczego nie psuje).
+        state = cache.get_many([REVOCATION_EPOCH_CACHE_KEY, REVOCATION_SEQ_CACHE_KEY])
+        jtis = list(
+            RevokedToken.objects.using(DEFAULT_DB_ALIAS)
+            .filter(expires_at__gt=timezone.now())
+            .values_list('jti', flat=True)
+        )
+        bloom = BloomFilter(max(settings.REVOCATION_FILTER_CAPACITY, 2 * len(jtis)),
+                            settings.REVOCATION_FILTER_ERROR_RATE)
+        for jti in jtis:
+            bloom.add(jti)
+        self._bloom = bloom
+        self._epoch = state.get(REVOCATION_EPOCH_CACHE_KEY)
+        self._seq = state.get(REVOCATION_SEQ_CACHE_KEY) or 0
+        self._pid = os.getpid()
+        self._built_at = now
+
+
+revocation_filter = RevocationFilter()
+
+
+def revoke(token):
+    """
+    Unieważnia refresh token (obiekt tokenu SimpleJWT) do końca jego ważności.
+
+    Zwraca False, gdy token był już unieważniony. Rozstrzyga o tym INSERT do bazy
+    głównej (klucz główny jti), a nie wcześniejsze sprawdzenie – z dwóch równoległych
+    rotacji tego samego tokenu tylko jedna dostaje True. jti trafia od razu do filtra
+    tego procesu i do dziennika w cache, skąd pobiorą go pozostałe procesy.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    expires_at = datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+    try:
+        # Savepoint – konflikt nie psuje transakcji, w której działa widok.
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            RevokedToken.objects.using(DEFAULT_DB_ALIAS).create(jti=jti, expires_at=expires_at)
+    except IntegrityError:
+        revocation_filter.add(jti)
+        return False
+    revocation_filter.add(jti)
+    if cache.add(REVOCATION_SEQ_CACHE_KEY, 0, timeout=None):
+        # Licznik zaczyna od zera – procesy ze starszym stanem muszą przebudować filtr.
+        cache.delete(REVOCATION_EPOCH_CACHE_KEY)
+    try:
+        seq = cache.incr(REVOCATION_SEQ_CACHE_KEY)
+    except ValueError:
+        cache.delete(REVOCATION_EPOCH_CACHE_KEY)
+        return True
+    cache.set(revocation_log_key(seq), jti, timeout=settings.REVOCATION_LOG_TTL)
+    return True
+
+
+def is_revoked(jti):
+    """Czy token o danym jti jest unieważniony; zapytanie do bazy tylko po trafieniu w filtrze."""
+    return revocation_filter.is_revoked(jti)
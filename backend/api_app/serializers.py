@@ -1,10 +1,19 @@
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, ExpressionWrapper, Q
 
 from rest_framework import serializers
-from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 
-from .models import Category, Expense
+from .emails import normalize_email, users_with_email_key
+from .archive import archive_cutoff
+from .models import (
+    CATEGORY_CYCLE_MESSAGE, ArchivedExpense, Category, CategoryBudget, Expense, ModeratorAuditEvent, RecurringExpense,
+)
+from .revocation import is_revoked, revoke
 
 from datetime import date
 
@@ -14,15 +23,11 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     Waliduje unikalność adresu e-mail i nazwy użytkownika, sprawdza zgodność podanych haseł
     oraz stosuje dodatkowe reguły walidacji dla hasła.
+    Unikalność obu pól jest sprawdzana jednym zapytaniem; e-mail porównywany jest
+    bez rozróżniania wielkości liter przez indeks funkcyjny (zob. api_app.emails).
     """
-    email = serializers.EmailField(
-        required=True,
-        validators=[UniqueValidator(queryset=User.objects.all(), message="Użytkownik z tym adresem e-mail już istnieje.")]
-    )
-    username = serializers.CharField(
-        required=True,
-        validators=[UniqueValidator(queryset=User.objects.all(), message="Użytkownik o tej nazwie już istnieje.")]
-    )
+    email = serializers.EmailField(required=True)
+    username = serializers.CharField(required=True)
     first_name = serializers.CharField(required=True)
     last_name = serializers.CharField(required=True)
     password = serializers.CharField(
@@ -44,43 +49,82 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         """
-        Sprawdza, czy oba podane hasła są identyczne.
+        Sprawdza, czy oba podane hasła są identyczne, a następnie czy nazwa użytkownika
+        i adres e-mail są wolne.
 
-        Jeśli hasła nie są zgodne, zgłasza wyjątek walidacji z odpowiednim komunikatem.
+        Jeśli hasła nie są zgodne lub dane są zajęte, zgłasza wyjątek walidacji z odpowiednim komunikatem.
         """
         if data['password'] != data['password2']:
             raise serializers.ValidationError({"password": "Hasła muszą się zgadzać."})
+
+        errors = self._clashes(data['username'], data['email'])
+        if errors:
+            raise serializers.ValidationError(errors)
         return data
 
+    @staticmethod
+    def _clashes(username, email):
+        """Błędy walidacji dla zajętej nazwy użytkownika lub adresu e-mail (jedno zapytanie)."""
+        email_key = normalize_email(email)
+        # Zgodność nazwy rozstrzyga baza – z tym samym porównaniem (collation) co
+        # unikalny indeks auth_user.username, a nie .lower() w Pythonie.
+        clashes = (
+            users_with_email_key()
+            .filter(Q(username=username) | Q(email_key=email_key))
+            .annotate(username_taken=ExpressionWrapper(Q(username=username), output_field=BooleanField()))
+            .values_list('username_taken', 'email_key')[:2]
+        )
+        errors = {}
+        for username_taken, existing_email_key in clashes:
+            if existing_email_key == email_key:
+                errors['email'] = ["Użytkownik z tym adresem e-mail już istnieje."]
+            if username_taken:
+                errors['username'] = ["Użytkownik o tej nazwie już istnieje."]
+        return errors
+
     def create(self, validated_data):
         """
         Tworzy nowego użytkownika na podstawie zweryfikowanych danych.
 
-        Usuwa dodatkowe pole 'password2', tworzy użytkownika z ustawionym hasłem,
-        a następnie oznacza konto jako nieaktywne (is_active = False).
+        Usuwa dodatkowe pole 'password2' i tworzy nieaktywne konto (is_active = False)
+        z ustawionym hasłem jednym INSERT-em. Równoległa rejestracja z tą samą nazwą lub adresem mogła przejść validate();
+        wtedy unikalny indeks zgłasza IntegrityError, zamieniany na błąd walidacji (400).
         """
         validated_data.pop('password2')
-        user = User.objects.create_user(
-            username=validated_data['username'],
-            email=validated_data['email'],
-            password=validated_data['password'],
-            first_name=validated_data['first_name'],
-            last_name=validated_data['last_name']
-        )
-        user.is_active = False
-        user.save()
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    username=validated_data['username'],
+                    email=validated_data['email'],
+                    password=validated_data['password'],
+                    first_name=validated_data['first_name'],
+                    last_name=validated_data['last_name'],
+                    is_active=False,
+                )
+        except IntegrityError:
+            errors = self._clashes(validated_data['username'], validated_data['email'])
+            raise serializers.ValidationError(errors or {'username': ["Użytkownik o tej nazwie już istnieje."]})
         return user
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ['id', 'name']
+        fields = ['id', 'name', 'parent']
+
+    def validate_parent(self, value):
+        if value is not None and self.instance is not None and self.instance.is_ancestor_of(value.pk):
+            raise serializers.ValidationError(CATEGORY_CYCLE_MESSAGE)
+        return value
 
 class ExpenseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Expense
         fields = ['id', 'category', 'amount', 'date']
-    
+
+    def create(self, validated_data):
+        # Nowy wydatek zapisywany jest w shardzie użytkownika.
+        return Expense.objects.for_user(validated_data['user']).create(**validated_data)
+
     def validate_date(self, value):
         if value > date.today():
             raise serializers.ValidationError("Data nie może być w przyszłości.")
@@ -91,6 +135,58 @@ class ExpenseSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Kwota musi być większa niż 0.")
         return value
 
+class ArchivedExpenseSerializer(serializers.ModelSerializer):
+    """
+    Serializer zarchiwizowanego wydatku – te same pola co ExpenseSerializer, tylko do odczytu.
+    """
+    class Meta:
+        model = ArchivedExpense
+        fields = ['id', 'category', 'amount', 'date']
+        read_only_fields = fields
+
+class CategoryBudgetSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CategoryBudget
+        fields = ['category', 'limit']
+
+    def validate_limit(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Limit musi być większy niż 0.")
+        return value
+
+class RecurringExpenseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RecurringExpense
+        fields = ['id', 'category', 'amount', 'interval', 'interval_count', 'start_date', 'end_date', 'next_run']
+        read_only_fields = ['next_run']
+
+    def create(self, validated_data):
+        # Reguła trafia do shardu użytkownika; pierwszy wydatek powstaje w dniu startu.
+        return RecurringExpense.objects.for_user(validated_data['user']).create(
+            next_run=validated_data['start_date'], **validated_data
+        )
+
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Kwota musi być większa niż 0.")
+        return value
+
+    def validate_interval_count(self, value):
+        if value < 1:
+            raise serializers.ValidationError("Odstęp musi wynosić co najmniej 1.")
+        return value
+
+    def validate_start_date(self, value):
+        # Nadrabianie od starszej daty tworzyłoby wydatki, które od razu trafiają do archiwum.
+        if value < archive_cutoff():
+            raise serializers.ValidationError("Data startu nie może być starsza niż horyzont archiwum.")
+        return value
+
+    def validate(self, data):
+        if data.get('end_date') and data['end_date'] < data['start_date']:
+            raise serializers.ValidationError({'end_date': "Data końca nie może być wcześniejsza niż data startu."})
+        return data
+
 class ModeratorUserListSerializer(serializers.ModelSerializer):
     """
     Serializer do wyświetlania listy użytkowników dla moderatora.
@@ -109,3 +205,46 @@ class ModeratorUserDetailSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'first_name', 'last_name', 'username', 'email']
 
+class ModeratorAuditEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ModeratorAuditEvent
+        fields = ['id', 'created_at', 'actor', 'actor_username', 'action', 'target', 'target_username',
+                  'status_code', 'ip_address']
+        read_only_fields = fields
+
+class ModeratorAuditQuerySerializer(serializers.Serializer):
+    """
+    Parametry zapytania dziennika działań moderatorów (wszystkie opcjonalne).
+    Zakres dat jest domknięty; `before` to id ostatniego wpisu poprzedniej strony.
+    """
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    actor = serializers.IntegerField(required=False)
+    target = serializers.IntegerField(required=False)
+    action = serializers.ChoiceField(choices=ModeratorAuditEvent.ACTION_CHOICES, required=False)
+    before = serializers.IntegerField(required=False, min_value=1)
+
+    def validate(self, data):
+        if data.get('date_from') and data.get('date_to') and data['date_to'] < data['date_from']:
+            raise serializers.ValidationError({'date_to': "Data końca nie może być wcześniejsza niż data początku."})
+        return data
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Odświeżenie tokenu z odrzucaniem unieważnionych refresh tokenów.
+
+    Przy rotacji (ROTATE_REFRESH_TOKENS) stary refresh token jest unieważniany,
+    więc nie da się go użyć ponownie (zob. api_app.revocation). is_revoked() to
+    tylko szybkie odrzucenie; z równoległych odświeżeń tego samego tokenu nowe
+    tokeny dostaje tylko to, którego INSERT w revoke() się udał.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if is_revoked(refresh[api_settings.JTI_CLAIM]):
+            raise TokenError("Token został unieważniony.")
+        data = super().validate(attrs)
+        if api_settings.ROTATE_REFRESH_TOKENS and not revoke(refresh):
+            raise TokenError("Token został unieważniony.")
+        return data
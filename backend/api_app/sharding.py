@@ -0,0 +1,224 @@
+"""
+Sharding danych wydatków per użytkownik.
+
+Każdy użytkownik ma przypisany jeden shard (alias bazy 'shard_N' z settings.EXPENSE_SHARDS),
+w którym leżą wszystkie jego wiersze modeli z USER_SHARDED_MODELS. Przypisanie jest
+trzymane w tabeli UserShard w bazie głównej oraz w cache, więc dodanie shardu nie
+przenosi istniejących użytkowników – nowi są rozkładani po wszystkich shardach,
+a istniejących przenosi polecenie `rebalance_expense_shards`.
+
+Każdy shard przydziela klucze główne z rozłącznego zakresu (SHARD_ID_SPAN), dzięki
+czemu wiersze zachowują identyfikatory po przeniesieniu do innego shardu.
+
+Bez skonfigurowanych shardów wszystko działa w bazie 'default' jak dotąd.
+
+Bez shardingu klucze obce modeli dzielonych do użytkownika i kategorii są zwykłymi
+ograniczeniami z CASCADE/SET_NULL. Z shardami użytkownicy i kategorie leżą w innej
+bazie, więc ograniczeń nie ma (api_app.models.user_sharded_fk), a usunięcie
+użytkownika i kategorii obsługują sygnały (delete_user_data, clear_category).
+Pominięcie ich (surowy SQL, _raw_delete, usunięcie wprost w bazie) zostawia
+osierocone wiersze; wykrywa je i naprawia polecenie `check_shard_integrity`
+(orphaned_references, repair_orphans).
+"""
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models.fields import AutoFieldMixin
+
+from . import events
+from .models import UserShard
+
+USER_SHARDED_MODELS = {
+    'api_app.expense', 'api_app.archivedexpense', 'api_app.monthlyexpensetotal',
+    'api_app.categorybudget', 'api_app.monthlycategoryspend', 'api_app.budgetalert',
+    'api_app.recurringexpense',
+}
+SHARD_ID_SPAN = 10 ** 12
+
+
+def sharding_enabled():
+    return bool(settings.EXPENSE_SHARDS)
+
+
+def shard_aliases():
+    """Zwraca aliasy shardów ('default', jeśli sharding jest wyłączony)."""
+    if not sharding_enabled():
+        return [DEFAULT_DB_ALIAS]
+    return [alias for alias in settings.DATABASES if alias.startswith('shard_')]
+
+
+def is_user_sharded(model):
+    return model._meta.label_lower in USER_SHARDED_MODELS
+
+
+def user_sharded_models():
+    return [apps.get_model(label) for label in sorted(USER_SHARDED_MODELS)]
+
+
+def _cache_key(user_id):
+    return f'expense_shard_{user_id}'
+
+
+def shard_for_user(user_id):
+    """
+    Zwraca alias shardu użytkownika, przypisując go przy pierwszym użyciu.
+
+    Przypisanie jest cache'owane bez limitu czasu – przy kilku instancjach
+    aplikacji cache musi być współdzielony (CACHE_URL), aby przeniesienie
+    użytkownika było widoczne od razu we wszystkich workerach.
+    """
+    if not sharding_enabled():
+        return DEFAULT_DB_ALIAS
+    key = _cache_key(user_id)
+    alias = cache.get(key)
+    if alias is None:
+        aliases = shard_aliases()
+        assignment, _created = UserShard.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+            user_id=user_id,
+            defaults={'alias': aliases[user_id % len(aliases)]},
+        )
+        alias = assignment.alias
+        cache.set(key, alias, timeout=None)
+    return alias
+
+
+def delete_user_data(user_id):
+    """Usuwa dane usuniętego użytkownika ze wszystkich shardów."""
+    with events.muted():
+        for alias in shard_aliases():
+            for model in user_sharded_models():
+                model._base_manager.using(alias).filter(user_id=user_id).delete()
+    cache.delete(_cache_key(user_id))
+
+
+def clear_category(category_id):
+    """
+    Odpowiednik SET_NULL (pole category z null=True) albo CASCADE (limity kategorii)
+    dla usuniętej kategorii we wszystkich shardach.
+    """
+    fields = [model._meta.get_field('category') for model in user_sharded_models()
+              if any(f.name == 'category' for f in model._meta.fields)]
+    for alias in shard_aliases():
+        for field in fields:
+            rows = field.model._base_manager.using(alias).filter(category_id=category_id)
+            if field.null:
+                rows.update(category=None)
+            else:
+                rows.delete()
+
+
+def _referenced_models():
+    return {get_user_model(), apps.get_model('api_app', 'Category')}
+
+
+def orphaned_references(alias, chunk_size=1000):
+    """
+    Zwraca [(pole, zbiór id)] – odwołania wierszy w bazie `alias` do nieistniejących
+    użytkowników i kategorii (w shardach bez ograniczeń kluczy obcych pilnują ich tylko sygnały).
+
+    Użytkownicy i kategorie leżą w bazie głównej, więc zamiast złączenia porównuje
+    różne id z bazy `alias` z bazą główną partiami po `chunk_size`.
+    """
+    referenced = _referenced_models()
+    orphans = []
+    for model in user_sharded_models():
+        for field in model._meta.concrete_fields:
+            if not field.is_relation or field.related_model not in referenced:
+                continue
+            ids = sorted(
+                model._base_manager.using(alias).exclude(**{field.attname: None})
+                .values_list(field.attname, flat=True).distinct()
+            )
+            existing = set()
+            for start in range(0, len(ids), chunk_size):
+                existing.update(
+                    field.related_model._base_manager.using(DEFAULT_DB_ALIAS)
+                    .filter(pk__in=ids[start:start + chunk_size]).values_list('pk', flat=True)
+                )
+            missing = set(ids) - existing
+            if missing:
+                orphans.append((field, missing))
+    return orphans
+
+
+def repair_orphans(alias, field, ids):
+    """
+    Naprawia osierocone wiersze jak sygnały: SET_NULL dla pól z null=True, inaczej CASCADE.
+
+    Zwraca liczbę zmienionych lub usuniętych wierszy.
+    """
+    rows = field.model._base_manager.using(alias).filter(**{f'{field.attname}__in': ids})
+    with events.muted():
+        if field.null:
+            return rows.update(**{field.attname: None})
+        deleted, _ = rows.delete()
+    return deleted
+
+
+def _copy_user_rows(model, user_id, source, target):
+    """Kopiuje do shardu docelowego wiersze użytkownika, których tam jeszcze nie ma."""
+    manager = model._base_manager
+    present = set(manager.using(target).filter(user_id=user_id).values_list('pk', flat=True))
+    rows = [obj for obj in manager.using(source).filter(user_id=user_id) if obj.pk not in present]
+    manager.using(target).bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def move_user(user_id, target, source=None):
+    """
+    Przenosi dane użytkownika do shardu `target`. Zwraca liczbę skopiowanych wierszy.
+
+    Kolejność: kopia wierszy, przełączenie przypisania (baza + cache), dokopiowanie
+    wierszy dodanych w międzyczasie i dopiero wtedy usunięcie ich ze źródła – dane
+    nie znikają nawet przy przerwaniu w połowie (ponowne uruchomienie dokończy
+    przenosiny). Zmiany istniejących wierszy wykonane w trakcie przenosin mogą
+    zostać utracone, dlatego rebalansowanie należy uruchamiać poza szczytem ruchu.
+    `source` pozwala przenieść dane z bazy spoza mapy (np. 'default' przed
+    włączeniem shardingu).
+    """
+    source = source or shard_for_user(user_id)
+    if source == target:
+        return 0
+    models = user_sharded_models()
+    copied = sum(_copy_user_rows(model, user_id, source, target) for model in models)
+
+    UserShard.objects.using(DEFAULT_DB_ALIAS).update_or_create(user_id=user_id, defaults={'alias': target})
+    cache.set(_cache_key(user_id), target, timeout=None)
+
+    with events.muted():
+        for model in models:
+            copied += _copy_user_rows(model, user_id, source, target)
+            model._base_manager.using(source).filter(user_id=user_id).delete()
+    return copied
+
+
+def reserve_id_range(alias):
+    """
+    Ustawia licznik autoinkrementacji tabel shardu na początek jego zakresu.
+
+    Shard 'shard_N' przydziela identyfikatory od N * SHARD_ID_SPAN. Wywoływane po
+    migracji (sygnał post_migrate); nie zmienia liczników, które już są dalej.
+    """
+    if not alias.startswith('shard_'):
+        return
+    start = int(alias.split('_', 1)[1]) * SHARD_ID_SPAN
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        for model in user_sharded_models():
+            if not isinstance(model._meta.pk, AutoFieldMixin):
+                continue
+            table = model._meta.db_table
+            if table not in connection.introspection.table_names(cursor):
+                continue
+            cursor.execute(f'SELECT MAX({model._meta.pk.column}) FROM {connection.ops.quote_name(table)}')
+            if (cursor.fetchone()[0] or 0) >= start:
+                continue
+            if connection.vendor == 'mysql':
+                cursor.execute(f'ALTER TABLE {connection.ops.quote_name(table)} AUTO_INCREMENT = {start}')
+            elif connection.vendor == 'sqlite':
+                cursor.execute('UPDATE sqlite_sequence SET seq = %s WHERE name = %s', [start - 1, table])
+                if not cursor.rowcount:
+                    cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, start - 1])
@@ -1,10 +1,18 @@
 from django.conf import settings
 from django.contrib.auth.models import User, Group, Permission
-from django.contrib.auth.tokens import default_token_generator
 from django.core.mail import send_mail
-from django.db.models.signals import post_save, post_migrate
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, post_migrate
 from django.dispatch import receiver, Signal
 from django_rest_passwordreset.signals import reset_password_token_created
+
+from .activation import activation_link
+from .analytics import invalidate_expense_analytics
+from .catalogue import invalidate_category_catalogue
+from .category_tree import sync_category_closure
+from .events import expense_event_data, is_muted, publish_on_commit
+from .models import ArchivedExpense, Category, Expense
+from .sharding import clear_category, delete_user_data, reserve_id_range, sharding_enabled
 resend_activation_email = Signal()
 
 def send_custom_email(subject: str, message: str, recipient: str) -> None:
@@ -38,14 +46,13 @@ def handle_activation_email(sender, instance, created, **kwargs):
     """
     Obsługuje sygnał zapisu nowego użytkownika (post_save).
     
-    Po utworzeniu nowego użytkownika generuje token aktywacyjny, buduje link aktywacyjny
+    Po utworzeniu nowego użytkownika wydaje token aktywacyjny (api_app.activation), buduje link aktywacyjny
     i wysyła wiadomość e-mail z linkiem do aktywacji konta. Adres e-mail jest pobierany automatycznie
     z modelu użytkownika.
+    Zapisy typu raw (np. loaddata) są pomijane – fixture nie powinny wysyłać e-maili.
     """
-    if created:
-        token = default_token_generator.make_token(instance)
-        activation_link = f"{settings.FRONTEND_URL}/activate?uid={instance.pk}&token={token}"
-        message = f"Aby aktywować konto, kliknij w poniższy link: {activation_link}"
+    if created and not kwargs.get('raw', False):
+        message = f"Aby aktywować konto, kliknij w poniższy link: {activation_link(instance)}"
         send_custom_email("Aktywacja konta", message, instance.email)
 
 @receiver(resend_activation_email)
@@ -53,15 +60,96 @@ def send_activation_email_on_request(sender, user, **kwargs):
     """
     Odbiornik sygnału resend_activation_email.
     
-    Generuje nowy token aktywacyjny i wysyła e-mail z linkiem aktywacyjnym.
+    Wydaje nowy token aktywacyjny (zastępujący poprzedni) i wysyła e-mail z linkiem aktywacyjnym.
     Adres e-mail do wysyłki jest pobierany automatycznie z modelu użytkownika.
     """
-    token = default_token_generator.make_token(user)
-    activation_link = f"{settings.FRONTEND_URL}/activate?uid={user.pk}&token={token}"
-    message = f"Aby aktywować konto, kliknij w poniższy link: {activation_link}"
+    message = f"Aby aktywować konto, kliknij w poniższy link: {activation_link(user)}"
     send_custom_email("Aktywacja konta", message, user.email)
 
 
+@receiver(post_save, sender=Category)
+def handle_category_tree(sender, instance, using, **kwargs):
+    """
+    Aktualizuje tabelę domknięcia drzewa kategorii (także przy ładowaniu fixture – raw).
+    Usunięcie kategorii usuwa jej wiersze kaskadowo.
+    """
+    sync_category_closure(instance, using)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def handle_category_change(sender, using, **kwargs):
+    """
+    Unieważnia katalog kategorii w cache po każdej zmianie lub usunięciu kategorii
+    (po zatwierdzeniu transakcji – razem z tabelą domknięcia).
+    """
+    transaction.on_commit(invalidate_category_catalogue, using=using)
+
+
+@receiver(post_save, sender=Expense)
+def publish_expense_save(sender, instance, created, using, **kwargs):
+    """
+    Publikuje zdarzenie `created`/`updated` w strumieniu zmian użytkownika (api_app.events).
+    """
+    if not kwargs.get('raw', False):
+        event_type = 'created' if created else 'updated'
+        publish_on_commit(instance.user_id, event_type, expense_event_data(instance), using)
+
+
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=ArchivedExpense)
+def publish_expense_delete(sender, instance, using, **kwargs):
+    """
+    Publikuje zdarzenie `deleted` w strumieniu zmian użytkownika (również dla wydatków z archiwum).
+    """
+    publish_on_commit(instance.user_id, 'deleted', {'id': instance.pk}, using)
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=ArchivedExpense)
+def handle_expense_change(sender, instance, using, **kwargs):
+    """
+    Unieważnia analizę wydatków użytkownika (api_app.analytics) po zapisie lub usunięciu wydatku.
+
+    Pomija operacje wyciszone w api_app.events (archiwizacja, przenosiny między
+    shardami) – nie zmieniają one wydatków, na których liczona jest analiza.
+    """
+    if not kwargs.get('raw', False) and not is_muted():
+        invalidate_expense_analytics(instance.user_id, using=using)
+
+
+@receiver(post_delete, sender=User)
+def handle_user_delete(sender, instance, **kwargs):
+    """
+    Usuwa wydatki usuniętego użytkownika z shardów (odpowiednik CASCADE).
+
+    Wydatki leżą wtedy w innej bazie niż użytkownik, więc nie usuwa ich ani baza
+    danych, ani Collector Django. Bez shardingu robi to CASCADE klucza obcego.
+    """
+    if sharding_enabled():
+        delete_user_data(instance.pk)
+
+
+@receiver(post_delete, sender=Category)
+def handle_category_delete(sender, instance, **kwargs):
+    """
+    Odpina usuniętą kategorię od wydatków we wszystkich shardach (odpowiednik SET_NULL).
+    Bez shardingu robi to on_delete klucza obcego.
+    """
+    if sharding_enabled():
+        clear_category(instance.pk)
+
+
+@receiver(post_migrate)
+def reserve_shard_id_ranges(sender, using, **kwargs):
+    """
+    Po migracji shardu ustawia początek jego zakresu kluczy głównych (api_app.sharding).
+    """
+    if sender.label == 'api_app':
+        reserve_id_range(using)
+
+
 @receiver(post_migrate)
 def create_groups(sender, **kwargs):
     if sender.label == 'auth':
@@ -0,0 +1,72 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from api_app.idempotency import RETRY_AFTER_SECONDS, _fingerprint
+from api_app.models import Expense, IdempotencyKey
+
+
+class IdempotencyKeyTests(APITestCase):
+    """Nagłówek Idempotency-Key w POST /api/expenses/ (api_app.idempotency)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('idempotencja', 'idempotencja@example.com', 'Haslo!123x')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('expense-list')
+
+    def _body(self, amount='12.34'):
+        return json.dumps({'category': None, 'amount': amount, 'date': str(timezone.localdate())})
+
+    def _post(self, key, body):
+        return self.client.post(self.url, body, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_first_response(self):
+        first = self._post('klucz-1', self._body())
+        cached = self._post('klucz-1', self._body())
+        cache.clear()
+        stored = self._post('klucz-1', self._body())
+
+        self.assertEqual(first.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', first)
+        for retry in (cached, stored):
+            self.assertEqual(retry.status_code, 201)
+            self.assertEqual(retry['Idempotent-Replayed'], 'true')
+            self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Expense.objects.for_user(self.user).count(), 1)
+
+    def test_duplicate_of_in_flight_request_gets_409(self):
+        body = self._body()
+        now = timezone.now()
+        IdempotencyKey.objects.create(
+            user=self.user,
+            key_hash=hashlib.sha256(b'klucz-2').hexdigest(),
+            fingerprint=_fingerprint(RequestFactory().post(self.url, body, content_type='application/json')),
+            locked_until=now + timedelta(seconds=30),
+            expires_at=now + timedelta(days=1),
+        )
+
+        response = self._post('klucz-2', body)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], str(RETRY_AFTER_SECONDS))
+        self.assertFalse(Expense.objects.for_user(self.user).exists())
+        self.assertIsNone(IdempotencyKey.objects.get(user=self.user).status_code)
+
+    def test_same_key_with_different_body_gets_422(self):
+        self.assertEqual(self._post('klucz-3', self._body('12.34')).status_code, 201)
+
+        response = self._post('klucz-3', self._body('56.78'))
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Expense.objects.for_user(self.user).count(), 1)
@@ -0,0 +1,55 @@
+import difflib
+
+from django.test import TestCase, override_settings
+
+from api_app.query_budgets import SCENARIOS, measure, normalize_sql, rolled_back, route_names, seed
+
+SIZES = (3, 30)
+
+
+# Dziennik audytu zapisuje w wątku w tle – poza mierzonym połączeniem i transakcją.
+@override_settings(AUDIT_LOG_ENABLED=False)
+class QueryBudgetTests(TestCase):
+    """
+    Liczba zapytań SQL każdego endpointu (api_app.query_budgets): mieści się w budżecie
+    scenariusza i nie zależy od ilości danych.
+    """
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.results = {item: {} for item in SCENARIOS}
+        for size in SIZES:
+            with rolled_back():
+                data = seed(size)
+                for item in SCENARIOS:
+                    cls.results[item][size] = measure(item, data)
+
+    def test_every_route_has_scenario(self):
+        covered = {item.route for item in SCENARIOS}
+        self.assertEqual([route for route in route_names() if route not in covered], [])
+
+    def test_status(self):
+        for item, by_size in self.results.items():
+            with self.subTest(route=item.route, method=item.method):
+                self.assertEqual({status for status, _queries in by_size.values()}, {item.status})
+
+    def test_budget(self):
+        for item, by_size in self.results.items():
+            with self.subTest(route=item.route, method=item.method):
+                queries = by_size[SIZES[-1]][1]
+                self.assertLessEqual(
+                    len(queries), item.budget,
+                    '\n'.join(normalize_sql(query['sql']) for query in queries),
+                )
+
+    def test_query_count_does_not_grow_with_data(self):
+        for item, by_size in self.results.items():
+            with self.subTest(route=item.route, method=item.method):
+                small, large = (by_size[size][1] for size in (SIZES[0], SIZES[-1]))
+                diff = difflib.unified_diff(
+                    [normalize_sql(query['sql']) for query in small],
+                    [normalize_sql(query['sql']) for query in large],
+                    lineterm='',
+                )
+                self.assertEqual(len(small), len(large), '\n'.join(diff))
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api_app.models import RevokedToken
+from api_app.revocation import RevocationFilter, revocation_filter
+
+
+class RevocationTests(TestCase):
+    """Unieważnianie refresh tokenów i filtr Blooma przed bazą (api_app.revocation)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('uniewaznienia', 'uniewaznienia@example.com', 'Haslo!123x')
+
+    def setUp(self):
+        # Filtr procesu jest globalny – bez dziennika w cache buduje się z bazy tego testu.
+        cache.clear()
+        revocation_filter.sync(force=True)
+
+    def _refresh(self, refresh):
+        self.client.cookies[settings.JWT_AUTH_REFRESH_COOKIE] = str(refresh)
+        return self.client.post(reverse('token_refresh'), {}, content_type='application/json')
+
+    def test_refresh_after_logout_is_rejected(self):
+        refresh = RefreshToken.for_user(self.user)
+        self.client.cookies[settings.JWT_AUTH_COOKIE] = str(refresh.access_token)
+        self.client.cookies[settings.JWT_AUTH_REFRESH_COOKIE] = str(refresh)
+        self.assertEqual(self.client.post(reverse('logout')).status_code, 200)
+
+        self.assertEqual(self._refresh(refresh).status_code, 401)
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        refresh = RefreshToken.for_user(self.user)
+        self.assertEqual(self._refresh(refresh).status_code, 200)
+
+        self.assertEqual(self._refresh(refresh).status_code, 401)
+
+    @override_settings(REVOCATION_FILTER_CAPACITY=1, REVOCATION_FILTER_ERROR_RATE=0.3)
+    def test_false_positive_is_resolved_by_database(self):
+        expires_at = timezone.now() + timedelta(days=1)
+        RevokedToken.objects.bulk_create(RevokedToken(jti=f'uniewazniony-{i}', expires_at=expires_at) for i in range(50))
+        revocations = RevocationFilter()
+        revocations.sync(force=True)
+
+        hits = [jti for jti in (f'wazny-{i}' for i in range(200)) if revocations.might_contain(jti)]
+        self.assertTrue(hits)
+        with self.assertNumQueries(len(hits)):
+            self.assertFalse(any(revocations.is_revoked(jti) for jti in hits))
+        self.assertTrue(revocations.is_revoked('uniewazniony-0'))
+
+    def test_filter_is_rebuilt_from_database_after_cache_loss(self):
+        revocations = RevocationFilter()
+        revocations.sync(force=True)
+        # Unieważnienie, którego dziennik w cache nie dotarł do tego procesu (np. inna instancja).
+        RevokedToken.objects.create(jti='z-innej-instancji', expires_at=timezone.now() + timedelta(days=1))
+        revocations.sync(force=True)
+        self.assertFalse(revocations.is_revoked('z-innej-instancji'))
+
+        cache.clear()
+        revocations.sync(force=True)
+
+        self.assertTrue(revocations.is_revoked('z-innej-instancji'))
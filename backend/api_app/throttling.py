@@ -0,0 +1,68 @@
+from rest_framework.throttling import ScopedRateThrottle
+
+
+class ScopedSlidingWindowThrottle(ScopedRateThrottle):
+    """
+    Throttling per zakres (throttle_scope) oparty o licznik okna przesuwnego.
+
+    Zakresy i limity są te same co w ScopedRateThrottle (REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']),
+    ale zamiast listy znaczników czasu zapisywanej w całości przy każdym żądaniu
+    przechowywane są dwa liczniki całkowite: dla bieżącego i poprzedniego okna
+    o długości `duration`. Liczba żądań w oknie przesuwnym jest szacowana jako
+
+        poprzednie * (1 - czas_od_początku_okna / duration) + bieżące
+
+    Licznik bieżącego okna jest zwiększany atomowo (cache.incr), więc koszt
+    sprawdzenia to O(1) czasu i pamięci niezależnie od limitu: zwykle dwie
+    operacje na cache (incr + get), a przy odrzuceniu dodatkowo decr.
+    """
+    cache_format = 'throttle_sw_%(scope)s_%(ident)s'
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window = int(now // self.duration)
+        elapsed = now - window * self.duration
+        current_key = f'{self.key}_{window}'
+
+        current = self._increment(current_key)
+        previous = self.cache.get(f'{self.key}_{window - 1}', 0)
+        estimated = previous * (1 - elapsed / self.duration) + current
+        if estimated <= self.num_requests:
+            return True
+
+        # Odrzucone żądania nie zajmują miejsca w limicie.
+        self.cache.decr(current_key)
+        self._wait = self._seconds_until_allowed(previous, current - 1, elapsed)
+        return False
+
+    def _increment(self, key):
+        """Atomowo zwiększa licznik okna, tworząc go przy pierwszym żądaniu."""
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Licznik wygasa po dwóch oknach – potem służy jeszcze jako "poprzednie".
+            if self.cache.add(key, 1, timeout=2 * self.duration):
+                return 1
+            return self.cache.incr(key)
+
+    def _seconds_until_allowed(self, previous, current, elapsed):
+        """Szacuje, po ilu sekundach kolejne żądanie zmieści się w limicie."""
+        remaining = self.duration - elapsed
+        if current + 1 > self.num_requests or not previous:
+            return remaining
+        # Czas, po którym wkład poprzedniego okna spadnie na tyle, by zmieścić żądanie.
+        needed = self.duration * (1 - (self.num_requests - current - 1) / previous) - elapsed
+        return max(0.0, min(needed, remaining))
+
+    def wait(self):
+        return getattr(self, '_wait', None)
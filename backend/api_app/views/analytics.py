@@ -0,0 +1,37 @@
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import ensure_csrf_cookie
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+
+from ..analytics import get_expense_analytics
+from ..throttling import ScopedSlidingWindowThrottle
+
+@method_decorator(ensure_csrf_cookie, name='get')
+class ExpenseAnalyticsView(APIView):
+    """
+    Widok analizy i prognozy wydatków.
+
+    Wymaga autoryzacji (IsAuthenticated) oraz jest zabezpieczony przed atakami CSRF (ensure_csrf_cookie).
+
+    GET:
+      - Zwraca analizę wszystkich wydatków zalogowanego użytkownika (również z archiwum):
+          - 'daily': dzienne sumy z ostatnich EXPENSE_ANALYTICS_DAYS dni ze średnimi
+            kroczącymi 7- i 30-dniowymi ('date', 'total', 'average7', 'average30'),
+          - 'monthly': sumy w kategoriach z ostatnich EXPENSE_ANALYTICS_MONTHS miesięcy
+            ('months' oraz 'categories' z polami 'category', 'totals', 'change' i
+            'changePercent' – zmiana względem poprzedniego miesiąca),
+          - 'forecast': wydatki od początku miesiąca i prognoza do jego końca
+            ('monthToDate', 'forecastRemaining', 'forecastTotal', 'daysRemaining', 'dailyTrend'),
+          - 'outliers': wydatki z ostatnich dni wyraźnie wyższe niż zwykle w ich kategorii.
+      - Kwoty są zwracane jako stringi; wynik jest w cache do najbliższego zapisu wydatku.
+      - Zwraca status 200 (OK) w przypadku powodzenia.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
+    throttle_scope     = 'expense'
+
+    def get(self, request):
+        return Response(get_expense_analytics(request.user), status=status.HTTP_200_OK)
@@ -1,25 +1,34 @@
 import time
 
-from django.utils import timezone
 from django.utils.decorators import method_decorator
-from django.utils.http import base36_to_int
 from django.http import JsonResponse
 from django.middleware.csrf import get_token
 from django.views.decorators.csrf import ensure_csrf_cookie, csrf_protect
 from django.conf import settings
-from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth.models import User
 from django.core.cache import cache
 
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.throttling import ScopedRateThrottle
 
-from ..serializers import RegisterSerializer
+from .. import activation, login
+from ..hashing import HashingBusy
+from ..revocation import revoke
+from ..serializers import RegisterSerializer, RevocableTokenRefreshSerializer
 from ..signals import resend_activation_email
+from ..throttling import ScopedSlidingWindowThrottle
+
+ACTIVATION_ERRORS = {
+    activation.ALREADY_ACTIVE: "Konto już aktywne.",
+    activation.EXPIRED: "Token wygasł.",
+    activation.INVALID: "Nieprawidłowy token.",
+    activation.UNKNOWN_USER: "Użytkownik nie istnieje.",
+}
 
 @ensure_csrf_cookie
 def get_csrf_token(request):
@@ -39,13 +48,15 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     Rozszerzony widok logowania JWT z:
 
       - Ochroną CSRF przy pomocy @csrf_protect.
-      - Limitowaniem zapytań ScopedRateThrottle (scope='login').
+      - Limitowaniem zapytań ScopedSlidingWindowThrottle (scope='login').
       - Mechanizmem „linear back-off” przy kolejnych nieudanych próbach logowania.
       - Śledzeniem nieudanych prób w cache i resetem licznika przy sukcesie.
       - Sprawdzeniem aktywności konta (401 + action='resend_activation').
+      - Jednym zapytaniem o użytkownika i zapisem wyłącznie last_login (api_app.login).
+      - Liczeniem skrótu hasła w ograniczonej puli (503, gdy pula jest pełna).
       - Generowaniem i ustawianiem ciasteczek JWT przy sukcesie.
     """
-    throttle_classes = [ScopedRateThrottle]
+    throttle_classes = [ScopedSlidingWindowThrottle]
     throttle_scope   = 'login'
 
     def post(self, request, *args, **kwargs):
@@ -56,28 +67,34 @@ class CustomTokenObtainPairView(TokenObtainPairView):
             time.sleep(failures - 1)
 
         username = request.data.get('username')
-        if username:
-            try:
-                user = User.objects.get(username=username)
-                if not user.is_active:
-                    return Response(
-                        {"error": "Konto nie zostało aktywowane.", "action": "resend_activation"},
-                        status=status.HTTP_401_UNAUTHORIZED
-                    )
-            except User.DoesNotExist:
-                pass
-
-        serializer = self.get_serializer(data=request.data)
-        if not serializer.is_valid():
+        password = request.data.get('password')
+        missing = {field: ["This field is required."] for field in ('username', 'password') if not request.data.get(field)}
+        if missing:
             cache.set(cache_key, failures + 1, timeout=getattr(settings, 'LOGIN_FAILURE_TIMEOUT', 900))
-            return Response(serializer.errors, status=status.HTTP_401_UNAUTHORIZED)
+            return Response(missing, status=status.HTTP_401_UNAUTHORIZED)
 
-        cache.delete(cache_key)
-        user = serializer.user
-        user.last_login = timezone.now()
-        user.save()
+        try:
+            result, user = login.authenticate_login(username, password, request)
+        except HashingBusy:
+            return Response(
+                {"error": "Serwer jest chwilowo przeciążony. Spróbuj ponownie za chwilę."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '1'}
+            )
+        if result == login.INACTIVE:
+            return Response(
+                {"error": "Konto nie zostało aktywowane.", "action": "resend_activation"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        if result != login.SUCCESS:
+            cache.set(cache_key, failures + 1, timeout=getattr(settings, 'LOGIN_FAILURE_TIMEOUT', 900))
+            return Response(
+                {"detail": "No active account found with the given credentials"},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
 
-        data = serializer.validated_data
+        cache.delete(cache_key)
+        data = login.issue_token_pair(user)
         response = Response(data, status=status.HTTP_200_OK)
         response.set_cookie(
             settings.JWT_AUTH_COOKIE,
@@ -99,8 +116,10 @@ class CustomTokenObtainPairView(TokenObtainPairView):
 class CustomTokenRefreshView(TokenRefreshView):
     """
     Widok odświeżania tokena JWT z ochroną CSRF i ponownym ustawianiem ciasteczek.
+    Unieważnione refresh tokeny (po rotacji i wylogowaniu) są odrzucane z 401.
     """
-    throttle_classes = [ScopedRateThrottle]
+    serializer_class = RevocableTokenRefreshSerializer
+    throttle_classes = [ScopedSlidingWindowThrottle]
     throttle_scope   = 'login'
 
     def post(self, request, *args, **kwargs):
@@ -133,7 +152,7 @@ class RegisterView(APIView):
     Rejestracja użytkownika przez POST z walidacją.
     """
     permission_classes = [AllowAny]
-    throttle_classes   = [ScopedRateThrottle]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
     throttle_scope     = 'registration'
 
     def post(self, request):
@@ -150,9 +169,11 @@ class ActivateAccountView(APIView):
 
     Oczekuje JSON z polami 'uid' i 'token'.
     Zwraca szczegółowe komunikaty o stanie konta.
+    Nieznane i przeterminowane tokeny są odrzucane na podstawie wpisu w cache,
+    bez zapytania do bazy (zob. api_app.activation).
     """
     permission_classes = []
-    throttle_classes   = [ScopedRateThrottle]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
     throttle_scope     = 'registration'
 
     def post(self, request):
@@ -162,58 +183,48 @@ class ActivateAccountView(APIView):
         if not uid or not token:
             return Response({"error": "Uid i token są wymagane."}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            user = User.objects.get(pk=uid)
-        except User.DoesNotExist:
-            return Response({"error": "Użytkownik nie istnieje."}, status=status.HTTP_400_BAD_REQUEST)
-
-        if user.is_active:
-            return Response({"error": "Konto już aktywne."}, status=status.HTTP_400_BAD_REQUEST)
-
-        if default_token_generator.check_token(user, token):
-            user.is_active = True
-            user.save()
+        result = activation.activate_account(uid, token)
+        if result == activation.ACTIVATED:
             return Response({"message": "Konto pomyślnie aktywowane."}, status=status.HTTP_200_OK)
-        else:
-            try:
-                ts_b36, _ = token.split("-")
-                ts = base36_to_int(ts_b36)
-                age = default_token_generator._num_seconds(default_token_generator._now()) - ts
-                if age > settings.PASSWORD_RESET_TIMEOUT:
-                    return Response({"error": "Token wygasł."}, status=status.HTTP_400_BAD_REQUEST)
-            except Exception:
-                pass
-            return Response({"error": "Nieprawidłowy token."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"error": ACTIVATION_ERRORS[result]}, status=status.HTTP_400_BAD_REQUEST)
 
 @method_decorator(csrf_protect, name='dispatch')
 class LogoutView(APIView):
-    """Wylogowanie użytkownika przez usunięcie ciasteczek JWT."""
+    """Wylogowanie użytkownika: unieważnienie refresh tokenu i usunięcie ciasteczek JWT."""
     permission_classes = [IsAuthenticated]
-    throttle_classes   = [ScopedRateThrottle]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
     throttle_scope     = 'user'
 
     def post(self, request):
+        refresh_cookie = request.COOKIES.get(settings.JWT_AUTH_REFRESH_COOKIE)
+        if refresh_cookie:
+            try:
+                revoke(RefreshToken(refresh_cookie))
+            except TokenError:
+                pass  # Nieprawidłowy albo wygasły token i tak nie odświeży sesji.
         response = Response({"message": "Wylogowano."}, status=status.HTTP_200_OK)
         response.delete_cookie(settings.JWT_AUTH_COOKIE)
         response.delete_cookie(settings.JWT_AUTH_REFRESH_COOKIE)
         return response
 
+def login_state(user):
+    """Stan zalogowania i rola uwierzytelnionego użytkownika (IsLoggedInView, dashboard)."""
+    return {'isLoggedIn': True, 'isModerator': user.groups.filter(name='Moderator').exists()}
+
 class IsLoggedInView(APIView):
     """Sprawdzenie statusu zalogowania i roli moderatora."""
     permission_classes = [IsAuthenticated]
-    throttle_classes   = [ScopedRateThrottle]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
     throttle_scope     = 'user'
 
     def get(self, request):
-        user = request.user
-        is_mod = user.groups.filter(name='Moderator').exists()
-        return Response({'isLoggedIn': True, 'isModerator': is_mod})
+        return Response(login_state(request.user))
 
 @method_decorator(csrf_protect, name='dispatch')
 class ResendActivationView(APIView):
     """Ponowne wysłanie linku aktywacyjnego przez POST."""
     permission_classes = []
-    throttle_classes   = [ScopedRateThrottle]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
     throttle_scope     = 'registration'
 
     def post(self, request):
@@ -0,0 +1,80 @@
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_protect
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+
+from ..archive import category_totals
+from ..budgets import delete_budget, save_budget
+from ..catalogue import get_category_catalogue
+from ..models import CategoryBudget
+from ..serializers import CategoryBudgetSerializer
+from ..throttling import ScopedSlidingWindowThrottle
+
+@method_decorator(csrf_protect, name='dispatch')
+class BudgetListView(APIView):
+    """
+    Widok obsługujący listę limitów wydatków w kategoriach i ustawianie limitu.
+
+    GET:
+      - Wymaga autoryzacji.
+      - Zwraca limity zalogowanego użytkownika z wydatkami bieżącego miesiąca:
+        'category' (id), 'name', 'limit', 'spent' (kwoty jako string) i 'percent'.
+    POST:
+      - Wymaga autoryzacji.
+      - Ustawia limit kategorii ({'category', 'limit'}); zwraca 201 dla nowego
+        limitu i 200 dla zmiany istniejącego.
+      - Przekroczenie progu limitu w bieżącym miesiącu trafia do kolejki powiadomień.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
+    throttle_scope     = 'expense'
+
+    def get(self, request):
+        today = timezone.localdate()
+        spent = category_totals(request.user, today.replace(day=1), today)
+        names = {category['id']: category['name'] for category in get_category_catalogue()}
+        budgets = CategoryBudget.objects.for_user(request.user).order_by('category_id')
+        return Response([
+            {
+                'category': budget.category_id,
+                'name': names.get(budget.category_id),
+                'limit': str(budget.limit),
+                'spent': str(spent.get(budget.category_id, 0)),
+                'percent': round(float(spent.get(budget.category_id, 0) / budget.limit * 100), 1),
+            }
+            for budget in budgets
+        ], status=status.HTTP_200_OK)
+
+    def post(self, request):
+        serializer = CategoryBudgetSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        budget, created = save_budget(
+            request.user, serializer.validated_data['category'].pk, serializer.validated_data['limit']
+        )
+        return Response(
+            CategoryBudgetSerializer(budget).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+@method_decorator(csrf_protect, name='dispatch')
+class BudgetDetailView(APIView):
+    """
+    Widok usuwania limitu kategorii.
+
+    DELETE:
+      - Wymaga autoryzacji.
+      - Usuwa limit kategorii `category_id` zalogowanego użytkownika (204) albo zwraca 404.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
+    throttle_scope     = 'expense'
+
+    def delete(self, request, category_id):
+        if delete_budget(request.user, category_id):
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(status=status.HTTP_404_NOT_FOUND)
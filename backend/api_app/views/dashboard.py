@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import ensure_csrf_cookie
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+
+from ..catalogue import get_category_catalogue
+from ..throttling import ScopedSlidingWindowThrottle
+from .auth import login_state
+from .events import events_supported
+from .expenses import group_by_date, user_expenses
+from .summary import month_summary
+
+@method_decorator(ensure_csrf_cookie, name='get')
+class DashboardView(APIView):
+    """
+    Widok startowy panelu – wszystko, czego Dashboard potrzebuje, w jednym żądaniu.
+
+    Wymaga autoryzacji (IsAuthenticated) oraz ustawia ciasteczko CSRF (ensure_csrf_cookie).
+
+    GET:
+      - Zwraca obiekt JSON z polami:
+          - 'auth': stan zalogowania i rola (jak /api/is-logged-in/),
+          - 'categories': płaski katalog kategorii {id, name, parent} (drzewo zwraca /api/categories/),
+          - 'summary': podsumowanie bieżącego miesiąca (jak /api/expenses/summary/),
+          - 'expenses': pierwsza strona wydatków – DASHBOARD_EXPENSES_PAGE_SIZE najnowszych,
+            pogrupowanych wg daty (jak /api/expenses/),
+          - 'hasMoreExpenses': czy istnieją starsze wydatki spoza strony
+            (pełną listę zwraca /api/expenses/),
+          - 'expenseEvents': czy serwer obsługuje strumień /api/expenses/events/
+            (tylko pod ASGI – pod WSGI klient nie otwiera strumienia).
+      - Dane są składane tymi samymi funkcjami co widoki pojedyncze.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
+    throttle_scope     = 'expense'
+
+    def get(self, request):
+        user = request.user
+        page_size = settings.DASHBOARD_EXPENSES_PAGE_SIZE
+        # Jeden wydatek ponad stronę mówi, czy istnieją starsze.
+        expenses = user_expenses(user, limit=page_size + 1)
+        return Response({
+            'auth': login_state(user),
+            'categories': get_category_catalogue(),
+            'summary': month_summary(user),
+            'expenses': group_by_date(expenses[:page_size]),
+            'hasMoreExpenses': len(expenses) > page_size,
+            'expenseEvents': events_supported(request._request),
+        }, status=status.HTTP_200_OK)
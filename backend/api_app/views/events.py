@@ -0,0 +1,129 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+
+from rest_framework.exceptions import AuthenticationFailed
+
+from ..custom_auth import CookieJWTAuthentication
+from ..events import Event, event_sort_key, get_broker
+
+# Po ilu milisekundach EventSource ma się połączyć ponownie po zerwaniu strumienia.
+RETRY_MS = 3000
+
+
+def events_supported(request):
+    """
+    Czy serwer obsłuży strumień zdarzeń dla tego żądania (HttpRequest).
+
+    Strumień działa tylko pod ASGI (uvicorn); pod WSGI expense_events zwraca 501,
+    więc klient nie powinien go otwierać (pole 'expenseEvents' w /api/dashboard/).
+    """
+    return isinstance(request, ASGIRequest)
+
+
+def _authenticate(request):
+    """
+    Zwraca (użytkownik, token) z ciasteczka JWT albo None.
+
+    Wykonywane w puli wątków; połączenie z bazą jest od razu zamykane, żeby
+    otwarty strumień nie trzymał ani wątku, ani połączenia.
+    """
+    try:
+        return CookieJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    finally:
+        connections.close_all()
+
+
+def _format(event):
+    lines = [] if event.id is None else [f'id: {event.id}']
+    lines += [f'event: {event.type}', f'data: {json.dumps(event.data)}']
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _stream(user_id, last_event_id, expires_at):
+    """
+    Generator strumienia SSE użytkownika.
+
+    Subskrypcja zaczyna się przed odczytem historii, więc zdarzenia opublikowane
+    w międzyczasie nie giną; duplikaty są pomijane po identyfikatorze. Strumień
+    kończy się wraz z wygaśnięciem tokena dostępu zdarzeniem `expired` – tylko po
+    nim klient odświeża token i łączy się ponownie (z Last-Event-ID).
+    """
+    broker = get_broker()
+    queue = asyncio.Queue(maxsize=settings.EXPENSE_EVENTS_HISTORY)
+    entry = await broker.subscribe(user_id, queue)
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        events, complete = await broker.history(user_id, last_event_id)
+        last_key = None
+        if complete:
+            if last_event_id:
+                last_key = event_sort_key(last_event_id)
+            for event in events:
+                yield _format(event)
+        else:
+            # Historia nie sięga Last-Event-ID – klient musi pobrać pełną listę.
+            yield _format(Event(events[-1].id if events else None, 'reset', {}))
+        if events:
+            last_key = event_sort_key(events[-1].id)
+
+        while (remaining := expires_at - time.time()) > 0:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), timeout=min(settings.EXPENSE_EVENTS_HEARTBEAT_SECONDS, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ': heartbeat\n\n'
+                continue
+            if event.id is not None:
+                if last_key is not None and event_sort_key(event.id) <= last_key:
+                    continue
+                last_key = event_sort_key(event.id)
+            yield _format(event)
+        yield _format(Event(None, 'expired', {}))
+    finally:
+        await broker.unsubscribe(user_id, entry)
+
+
+async def expense_events(request):
+    """
+    Strumień zmian wydatków zalogowanego użytkownika (Server-Sent Events).
+
+    GET:
+      - Wymaga ważnego tokena JWT w ciasteczku (jak CookieJWTAuthentication).
+      - Zwraca text/event-stream ze zdarzeniami `created`, `updated` (dane wydatku)
+        i `deleted` (id), komentarzem heartbeat co EXPENSE_EVENTS_HEARTBEAT_SECONDS
+        oraz zdarzeniem `reset`, gdy nie da się wznowić strumienia od Last-Event-ID
+        (nagłówek lub parametr `lastEventId`). Po wygaśnięciu tokena dostępu wysyła
+        zdarzenie `expired` i kończy strumień.
+      - Zwraca 401 bez ważnego tokena, 501 poza serwerem ASGI – pod WSGI otwarty
+        strumień zająłby cały wątek workera.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    if not events_supported(request):
+        return JsonResponse({'detail': 'Strumień zdarzeń wymaga serwera ASGI.'}, status=501)
+
+    authenticated = await sync_to_async(_authenticate, thread_sensitive=False)(request)
+    if authenticated is None:
+        return JsonResponse({'detail': 'Nie podano prawidłowych danych uwierzytelniających.'}, status=401)
+    user, token = authenticated
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('lastEventId')
+    response = StreamingHttpResponse(
+        _stream(user.pk, last_event_id, token['exp']),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Wyłącza buforowanie odpowiedzi w nginx, które wstrzymywałoby zdarzenia.
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,19 +1,51 @@
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import ensure_csrf_cookie, csrf_protect
-from django.db.models import Sum
-from django.utils import timezone
+from django.db import transaction
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from rest_framework.throttling import ScopedRateThrottle
 
 from itertools import groupby
 from operator import itemgetter
 
-from ..models import Category, Expense
-from ..serializers import CategorySerializer, ExpenseSerializer
+from .. import archive
+from ..budgets import expense_state, record_expense_change
+from ..catalogue import get_category_tree
+from ..idempotency import IdempotentWritesMixin
+from ..models import ArchivedExpense, Expense
+from ..serializers import ArchivedExpenseSerializer, ExpenseSerializer
+from ..throttling import ScopedSlidingWindowThrottle
+
+def user_expenses(user, limit=None):
+    """
+    Zwraca wydatki użytkownika (bieżące i zarchiwizowane) jako listę słowników
+    posortowaną malejąco wg daty; z `limit` – tylko `limit` najnowszych.
+
+    Archiwum jest czytane tylko wtedy, gdy strona nie mieści się w bieżących wydatkach.
+    """
+    hot = Expense.objects.for_user(user).order_by('-date', '-id')
+    expenses_data = list(ExpenseSerializer(hot if limit is None else hot[:limit], many=True).data)
+    if limit is None or len(expenses_data) < limit or expenses_data[-1]['date'] < archive.archive_cutoff().isoformat():
+        archived = ArchivedExpense.objects.for_user(user).order_by('-date', '-id')
+        expenses_data += ArchivedExpenseSerializer(archived if limit is None else archived[:limit], many=True).data
+    expenses_data.sort(key=itemgetter('date'), reverse=True)
+    return expenses_data if limit is None else expenses_data[:limit]
+
+
+def group_by_date(expenses_data):
+    """Grupuje posortowane wg daty wydatki w listę {'date', 'expenses'} (bez pola date w wydatkach)."""
+    grouped = []
+    for date_key, items in groupby(expenses_data, key=itemgetter('date')):
+        group_list = []
+        for exp in items:
+            entry = exp.copy()
+            entry.pop('date', None)
+            group_list.append(entry)
+        grouped.append({'date': date_key, 'expenses': group_list})
+    return grouped
+
 
 @method_decorator(ensure_csrf_cookie, name='dispatch')
 class CategoryListView(APIView):
@@ -23,56 +55,48 @@ class CategoryListView(APIView):
     GET:
       - Wymaga autoryzacji (IsAuthenticated).
       - Ustawia ciasteczko CSRF przy pierwszym żądaniu.
-      - Zwraca listę wszystkich kategorii (id, name).
+      - Zwraca drzewo kategorii (id, name, children – podkategorie) z katalogu trzymanego w cache.
     """
     permission_classes = [IsAuthenticated]
-    throttle_classes   = [ScopedRateThrottle]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
     throttle_scope     = 'expense'
 
     def get(self, request):
-        categories = Category.objects.all()
-        serializer = CategorySerializer(categories, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(get_category_tree(), status=status.HTTP_200_OK)
 
 @method_decorator(csrf_protect, name='dispatch')
-class ExpenseListView(APIView):
+class ExpenseListView(IdempotentWritesMixin, APIView):
     """
     Widok obsługujący listę wydatków i tworzenie nowego wydatku.
 
     GET:
       - Wymaga autoryzacji.
-      - Zwraca pogrupowane wg daty wydatki zalogowanego użytkownika.
+      - Zwraca pogrupowane wg daty wydatki zalogowanego użytkownika
+        (bieżące i zarchiwizowane).
     POST:
       - Wymaga autoryzacji.
-      - Tworzy nowy wydatek.
+      - Tworzy nowy wydatek i aktualizuje bieżącą sumę limitu kategorii (api_app.budgets).
+      - Z nagłówkiem Idempotency-Key ponowienie zwraca pierwszą odpowiedź (api_app.idempotency).
     """
     permission_classes = [IsAuthenticated]
-    throttle_classes   = [ScopedRateThrottle]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
     throttle_scope     = 'expense'
 
     def get(self, request):
-        expenses = Expense.objects.filter(user=request.user).order_by('-date')
-        serializer = ExpenseSerializer(expenses, many=True)
-        expenses_data = sorted(serializer.data, key=itemgetter('date'), reverse=True)
-        grouped = []
-        for date_key, items in groupby(expenses_data, key=itemgetter('date')):
-            group_list = []
-            for exp in items:
-                entry = exp.copy()
-                entry.pop('date', None)
-                group_list.append(entry)
-            grouped.append({'date': date_key, 'expenses': group_list})
-        return Response(grouped, status=status.HTTP_200_OK)
+        return Response(group_by_date(user_expenses(request.user)), status=status.HTTP_200_OK)
 
     def post(self, request):
         serializer = ExpenseSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(user=request.user)
+            alias = Expense.objects.for_user(request.user).db
+            with transaction.atomic(using=alias):
+                expense = serializer.save(user=request.user)
+                record_expense_change(request.user.pk, None, expense_state(expense), alias)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @method_decorator(csrf_protect, name='dispatch')
-class ExpenseDetailView(APIView):
+class ExpenseDetailView(IdempotentWritesMixin, APIView):
     """
     Widok obsługujący szczegóły, edycję i usuwanie wydatku.
 
@@ -80,41 +104,60 @@ class ExpenseDetailView(APIView):
       - Wymaga autoryzacji.
     PUT:
       - Wymaga autoryzacji.
-      - Aktualizuje wydatek częściowo.
+      - Aktualizuje wydatek częściowo (zarchiwizowanych wydatków nie można edytować – 400).
     DELETE:
       - Wymaga autoryzacji.
-      - Usuwa wydatek.
+      - Usuwa wydatek (również zarchiwizowany).
+    PUT i DELETE przesuwają bieżące sumy limitów kategorii o zmianę wydatku (api_app.budgets)
+    i obsługują nagłówek Idempotency-Key (api_app.idempotency).
     """
     permission_classes = [IsAuthenticated]
-    throttle_classes   = [ScopedRateThrottle]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
     throttle_scope     = 'expense'
 
-    def get_object(self, pk, user):
+    def get_object(self, pk, user, for_update=False):
+        expenses = Expense.objects.for_user(user)
         try:
-            return Expense.objects.get(pk=pk, user=user)
+            return (expenses.select_for_update() if for_update else expenses).get(pk=pk)
         except Expense.DoesNotExist:
             return None
 
     def get(self, request, pk):
         exp = self.get_object(pk, request.user)
-        if not exp:
-            return Response({'error': 'Nie znaleziono wydatku.'}, status=status.HTTP_404_NOT_FOUND)
-        serializer = ExpenseSerializer(exp)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        if exp:
+            return Response(ExpenseSerializer(exp).data, status=status.HTTP_200_OK)
+        archived = archive.get_archived_expense(request.user, pk)
+        if archived:
+            return Response(ArchivedExpenseSerializer(archived).data, status=status.HTTP_200_OK)
+        return Response({'error': 'Nie znaleziono wydatku.'}, status=status.HTTP_404_NOT_FOUND)
 
     def put(self, request, pk):
-        exp = self.get_object(pk, request.user)
-        if not exp:
-            return Response({'error': 'Nie znaleziono wydatku.'}, status=status.HTTP_404_NOT_FOUND)
-        serializer = ExpenseSerializer(exp, data=request.data, partial=True)
-        if serializer.is_valid():
+        # Blokada wiersza – stan sprzed zmiany musi być tym, który nadpisujemy.
+        alias = Expense.objects.for_user(request.user).db
+        with transaction.atomic(using=alias):
+            exp = self.get_object(pk, request.user, for_update=True)
+            if not exp:
+                if archive.get_archived_expense(request.user, pk):
+                    return Response({'error': 'Zarchiwizowanego wydatku nie można edytować.'}, status=status.HTTP_400_BAD_REQUEST)
+                return Response({'error': 'Nie znaleziono wydatku.'}, status=status.HTTP_404_NOT_FOUND)
+            serializer = ExpenseSerializer(exp, data=request.data, partial=True)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            before = expense_state(exp)
             serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            record_expense_change(request.user.pk, before, expense_state(exp), alias)
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
     def delete(self, request, pk):
-        exp = self.get_object(pk, request.user)
-        if not exp:
-            return Response(status=status.HTTP_404_NOT_FOUND)
-        exp.delete()
+        alias = Expense.objects.for_user(request.user).db
+        with transaction.atomic(using=alias):
+            exp = self.get_object(pk, request.user, for_update=True)
+            if exp:
+                exp.delete()
+            else:
+                exp = archive.get_archived_expense(request.user, pk)
+                if not exp:
+                    return Response(status=status.HTTP_404_NOT_FOUND)
+                archive.delete_archived_expense(exp)
+            record_expense_change(request.user.pk, expense_state(exp), None, alias)
         return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1,4 +1,8 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
 from django.contrib.auth.models import User, Group
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_protect
 
@@ -6,22 +10,28 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.throttling import ScopedRateThrottle
 
-from ..permissions import IsModerator  
+from ..audit import ModeratorAuditMixin
+from ..models import ModeratorAuditEvent
+from ..permissions import IsModerator, IsSuperuser
 from ..serializers import (
+    ModeratorAuditEventSerializer,
+    ModeratorAuditQuerySerializer,
     ModeratorUserListSerializer,
     ModeratorUserDetailSerializer
 )
+from ..throttling import ScopedSlidingWindowThrottle
 
-class ModeratorUserListView(APIView):
+class ModeratorUserListView(ModeratorAuditMixin, APIView):
     """
     Widok dla moderatora, zwraca listę zwykłych użytkowników
     (bez siebie i bez moderatorów/superuserów).
+    Każde żądanie trafia do dziennika działań moderatorów (api_app.audit).
     """
     permission_classes = [IsAuthenticated, IsModerator]
-    throttle_classes   = [ScopedRateThrottle]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
     throttle_scope     = 'moderator'
+    audit_actions      = {'GET': ModeratorAuditEvent.LIST}
 
     def get(self, request):
         mod_group = Group.objects.filter(name='Moderator').first()
@@ -40,19 +50,23 @@ class ModeratorUserListView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
     
 @method_decorator(csrf_protect, name='dispatch')
-class ModeratorUserDetailView(APIView):
+class ModeratorUserDetailView(ModeratorAuditMixin, APIView):
     """
     Widok dla moderatora, szczegóły i DELETE.
     Blokujemy każdą operację GET/DELETE na moderatorach,
     superuserach oraz na sobie samym.
+    Każde żądanie (także odrzucone) trafia do dziennika działań moderatorów (api_app.audit).
     """
     permission_classes = [IsAuthenticated, IsModerator]
-    throttle_classes   = [ScopedRateThrottle]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
     throttle_scope     = 'moderator'
-    
+    audit_actions      = {'GET': ModeratorAuditEvent.VIEW, 'DELETE': ModeratorAuditEvent.DELETE}
+
     def get_object(self, pk):
         try:
-            return User.objects.get(pk=pk)
+            # Nazwa użytkownika trafia do dziennika – także po usunięciu konta.
+            self.audit_target = User.objects.get(pk=pk)
+            return self.audit_target
         except User.DoesNotExist:
             return None
 
@@ -93,3 +107,42 @@ class ModeratorUserDetailView(APIView):
 
         user_obj.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+class ModeratorAuditLogView(APIView):
+    """
+    Widok dziennika działań moderatorów (tylko dla superużytkowników).
+
+    GET:
+      - Zwraca najnowsze wpisy (najwyżej AUDIT_PAGE_SIZE) pasujące do parametrów
+        date_from, date_to, actor, target, action (zob. ModeratorAuditQuerySerializer).
+      - Kolejną stronę pobiera się z parametrem before=<next> z poprzedniej odpowiedzi.
+      - Wpisy trafiają do bazy partiami, więc ostatnie sekundy mogą jeszcze nie być widoczne.
+    """
+    permission_classes = [IsAuthenticated, IsSuperuser]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
+    throttle_scope     = 'moderator'
+
+    def get(self, request):
+        query = ModeratorAuditQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        params = query.validated_data
+
+        events = ModeratorAuditEvent.objects.order_by('-id')
+        # Zakres jako przedział czasu (a nie __date), aby zapytanie korzystało z indeksu created_at.
+        if 'date_from' in params:
+            events = events.filter(created_at__gte=timezone.make_aware(datetime.combine(params['date_from'], time.min)))
+        if 'date_to' in params:
+            end = params['date_to'] + timedelta(days=1)
+            events = events.filter(created_at__lt=timezone.make_aware(datetime.combine(end, time.min)))
+        for field in ('actor', 'target', 'action'):
+            if field in params:
+                events = events.filter(**{field: params[field]})
+        if 'before' in params:
+            events = events.filter(pk__lt=params['before'])
+
+        page = list(events[:settings.AUDIT_PAGE_SIZE])
+        return Response({
+            'results': ModeratorAuditEventSerializer(page, many=True).data,
+            'next': page[-1].pk if len(page) == settings.AUDIT_PAGE_SIZE else None,
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,105 @@
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from rest_framework import exceptions, status
+from rest_framework.response import Response
+
+from django_rest_passwordreset.models import ResetPasswordToken, get_password_reset_token_expiry_time
+from django_rest_passwordreset.signals import reset_password_token_created
+from django_rest_passwordreset.views import (
+    HTTP_IP_ADDRESS_HEADER,
+    HTTP_USER_AGENT_HEADER,
+    ResetPasswordRequestToken,
+)
+
+from ..emails import normalize_email, users_by_email
+
+
+def reset_token_cutoff():
+    """Zwraca moment, przed którym utworzone tokeny resetowania hasła są przeterminowane."""
+    return timezone.now() - timedelta(hours=get_password_reset_token_expiry_time())
+
+
+def allow_reset_request(email):
+    """
+    Liczy żądania resetu dla adresu e-mail we wspólnym cache.
+
+    Zwraca False, jeśli w bieżącym oknie PASSWORD_RESET_EMAIL_WINDOW przekroczono
+    PASSWORD_RESET_EMAIL_LIMIT. Klucz zawiera skrót adresu, aby był poprawny
+    dla każdego backendu cache.
+    """
+    digest = hashlib.sha256(normalize_email(email).encode('utf-8')).hexdigest()
+    key = f'password_reset_rate_{digest}'
+    cache.add(key, 0, timeout=settings.PASSWORD_RESET_EMAIL_WINDOW)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Klucz wygasł pomiędzy add() a incr() – zaczynamy nowe okno.
+        cache.set(key, 1, timeout=settings.PASSWORD_RESET_EMAIL_WINDOW)
+        count = 1
+    return count <= settings.PASSWORD_RESET_EMAIL_LIMIT
+
+
+def issue_reset_token(email, user_agent='', ip_address=''):
+    """
+    Zwraca ważny token resetu dla aktywnego użytkownika o danym adresie e-mail.
+
+    Użytkownik wyszukiwany jest przez indeks znormalizowanego e-maila (api_app.emails),
+    a istniejący token jest ponownie używany tylko, jeśli nie wygasł. Zachowanie przy
+    braku konta jest takie jak w django_rest_passwordreset (ValidationError, chyba że
+    DJANGO_REST_PASSWORDRESET_NO_INFORMATION_LEAKAGE).
+    """
+    for user in users_by_email(email):
+        if user.eligible_for_reset():
+            token = user.password_reset_tokens.filter(created_at__gt=reset_token_cutoff()).first()
+            return token or ResetPasswordToken.objects.create(
+                user=user,
+                user_agent=user_agent,
+                ip_address=ip_address.split(",")[0],
+            )
+
+    if not getattr(settings, 'DJANGO_REST_PASSWORDRESET_NO_INFORMATION_LEAKAGE', False):
+        raise exceptions.ValidationError({
+            'email': ["We couldn't find an account associated with that email. Please try a different e-mail address."],
+        })
+    return None
+
+
+class ResetPasswordRequestView(ResetPasswordRequestToken):
+    """
+    Żądanie tokenu resetowania hasła z limitem per adres e-mail.
+
+    W odróżnieniu od widoku z django_rest_passwordreset:
+      - nie usuwa przeterminowanych tokenów przy każdym żądaniu (pełny skan tabeli) –
+        robi to okresowo polecenie `prune_reset_tokens`,
+      - wyszukuje użytkownika przez indeks znormalizowanego e-maila,
+      - ponownie używa tylko nieprzeterminowanego tokenu użytkownika,
+      - odrzuca nadmiarowe żądania dla jednego adresu (429) zanim dotkną bazy danych.
+    """
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        email = serializer.validated_data['email']
+
+        if not allow_reset_request(email):
+            return Response(
+                {"error": "Zbyt wiele prób resetowania hasła. Spróbuj ponownie później."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+
+        token = issue_reset_token(
+            email,
+            user_agent=request.META.get(HTTP_USER_AGENT_HEADER, ''),
+            ip_address=request.META.get(HTTP_IP_ADDRESS_HEADER, ''),
+        )
+        if token:
+            reset_password_token_created.send(
+                sender=self.__class__,
+                instance=self, reset_password_token=token
+            )
+        return Response({'status': 'OK'})
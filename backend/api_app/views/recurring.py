@@ -0,0 +1,59 @@
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_protect
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+
+from ..models import RecurringExpense
+from ..serializers import RecurringExpenseSerializer
+from ..throttling import ScopedSlidingWindowThrottle
+
+@method_decorator(csrf_protect, name='dispatch')
+class RecurringExpenseListView(APIView):
+    """
+    Widok obsługujący listę reguł wydatków cyklicznych i tworzenie nowej reguły.
+
+    GET:
+      - Wymaga autoryzacji.
+      - Zwraca reguły zalogowanego użytkownika (z datą następnego wydatku 'next_run';
+        None – reguła zakończona).
+    POST:
+      - Wymaga autoryzacji.
+      - Tworzy regułę; wydatki (także zaległe od daty startu) generuje polecenie
+        `run_recurring_expenses`.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
+    throttle_scope     = 'expense'
+
+    def get(self, request):
+        rules = RecurringExpense.objects.for_user(request.user).order_by('start_date', 'id')
+        return Response(RecurringExpenseSerializer(rules, many=True).data, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        serializer = RecurringExpenseSerializer(data=request.data)
+        if serializer.is_valid():
+            serializer.save(user=request.user)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+@method_decorator(csrf_protect, name='dispatch')
+class RecurringExpenseDetailView(APIView):
+    """
+    Widok usuwania reguły wydatku cyklicznego.
+
+    DELETE:
+      - Wymaga autoryzacji.
+      - Usuwa regułę (204); wygenerowane już wydatki pozostają.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
+    throttle_scope     = 'expense'
+
+    def delete(self, request, pk):
+        deleted, _ = RecurringExpense.objects.for_user(request.user).filter(pk=pk).delete()
+        if deleted:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(status=status.HTTP_404_NOT_FOUND)
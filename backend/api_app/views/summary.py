@@ -1,4 +1,3 @@
-from django.db.models import Sum
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import ensure_csrf_cookie
@@ -7,9 +6,63 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from rest_framework.throttling import ScopedRateThrottle
 
-from ..models import Expense
+from ..archive import category_totals
+from ..catalogue import get_category_catalogue, get_category_subtrees
+from ..category_tree import rollup_totals
+from ..throttling import ScopedSlidingWindowThrottle
+
+def month_summary(user):
+    """
+    Zwraca sumy wydatków użytkownika wg kategorii od 1. dnia bieżącego miesiąca do dziś
+    jako listę {'category': nazwa, 'total': kwota jako string}.
+    """
+    today = timezone.now().date()
+    first_day_of_month = today.replace(day=1)
+
+    # Grupowanie po id kategorii – nazwy pochodzą z katalogu w cache,
+    # bo kategorie mogą leżeć w innej bazie niż wydatki (sharding).
+    totals = category_totals(user, first_day_of_month, today)
+    names = {category['id']: category['name'] for category in get_category_catalogue()}
+
+    return [
+        {
+            'category': names.get(category_id) or 'Brak kategorii',
+            'total': str(total)
+        }
+        for category_id, total in totals.items()
+    ]
+
+
+def month_rollup(user, root=None):
+    """
+    Zwraca sumy bieżącego miesiąca zwinięte do kategorii nadrzędnych jako listę
+    {'id', 'category', 'parent', 'total' (z podkategoriami), 'own_total'}.
+
+    Z `root` (id kategorii) sumowane jest tylko jej poddrzewo – jednym zapytaniem
+    z listą id z mapy poddrzew w cache; bez `root` wynik obejmuje też wydatki
+    bez kategorii (id None).
+    """
+    today = timezone.now().date()
+    subtrees = get_category_subtrees()
+    totals = category_totals(user, today.replace(day=1), today, category_ids=None if root is None else subtrees[root])
+    rolled = rollup_totals(totals, subtrees if root is None else {pk: subtrees[pk] for pk in subtrees[root]})
+
+    rows = [
+        {
+            'id': category['id'],
+            'category': category['name'],
+            'parent': category['parent'],
+            'total': str(rolled[category['id']]),
+            'own_total': str(totals.get(category['id'], 0)),
+        }
+        for category in get_category_catalogue()
+        if category['id'] in rolled
+    ]
+    if root is None and None in totals:
+        rows.append({'id': None, 'category': 'Brak kategorii', 'parent': None,
+                     'total': str(totals[None]), 'own_total': str(totals[None])})
+    return rows
 
 @method_decorator(ensure_csrf_cookie, name='get')
 class ExpenseSummaryView(APIView):
@@ -25,26 +78,19 @@ class ExpenseSummaryView(APIView):
           - 'category': nazwa kategorii (lub 'Brak kategorii', jeśli pole jest puste),
           - 'total': łączna kwota wydatków w tej kategorii (jako string).
       - Zwraca status 200 (OK) w przypadku powodzenia.
+      - Z parametrem rollup=1 sumy są zwinięte do kategorii nadrzędnych (month_rollup),
+        a z category=<id> – ograniczone do poddrzewa tej kategorii (404 dla nieznanej).
     """
     permission_classes = [IsAuthenticated]
-    throttle_classes   = [ScopedRateThrottle]
+    throttle_classes   = [ScopedSlidingWindowThrottle]
     throttle_scope     = 'expense'
 
     def get(self, request):
-        today = timezone.now().date()
-        first_day_of_month = today.replace(day=1)
-
-        expenses = Expense.objects.filter(
-            user=request.user,
-            date__range=[first_day_of_month, today]
-        )
-        summary = expenses.values('category__name').annotate(total=Sum('amount'))
-
-        data = [
-            {
-                'category': item['category__name'] or 'Brak kategorii',
-                'total': str(item['total'])
-            }
-            for item in summary
-        ]
-        return Response(data, status=status.HTTP_200_OK)
+        root = request.query_params.get('category')
+        if root is not None:
+            if not root.isdigit() or int(root) not in get_category_subtrees():
+                return Response({'error': 'Nie znaleziono kategorii.'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(month_rollup(request.user, int(root)), status=status.HTTP_200_OK)
+        if request.query_params.get('rollup') in ('1', 'true'):
+            return Response(month_rollup(request.user), status=status.HTTP_200_OK)
+        return Response(month_summary(request.user), status=status.HTTP_200_OK)
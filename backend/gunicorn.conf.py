@@ -0,0 +1,136 @@
+"""
+Konfiguracja gunicorna dla backendu (gunicorn --config gunicorn.conf.py).
+
+Model workerów wybiera GUNICORN_WORKER_CLASS:
+
+  - gthread (domyślnie) – procesy z pulą wątków; żądanie czekające na bazę, SMTP
+    albo opóźnienie po nieudanym logowaniu zajmuje jeden wątek, a nie cały proces,
+  - sync – jedno żądanie na proces; najprostszy, ale każde wolne żądanie blokuje workera,
+  - uvicorn – aplikacja ASGI (myproject.asgi); otwarte strumienie SSE
+    (/api/expenses/events/) nie zajmują wątków, ale synchroniczne widoki DRF
+    wykonują się w jednym wątku na proces.
+
+Liczba procesów i wątków jest dobierana do liczby dostępnych CPU (z limitem cgroup
+kontenera), chyba że podano GUNICORN_WORKERS / GUNICORN_THREADS; GUNICORN_MAX_WORKERS
+ogranicza liczbę procesów (pamięć). Każdy wątek to osobne połączenie z bazą.
+
+Aplikacja jest ładowana raz w procesie głównym (preload_app), a workery dziedziczą ją
+przez fork() – po nim zamykamy odziedziczone połączenia z bazą i cache. Workery są
+restartowane co GUNICORN_MAX_REQUESTS żądań z losowym rozrzutem, żeby nie
+restartowały się wszystkie naraz. Porównanie modeli: `manage.py bench_workers`.
+
+Więcej niż jeden worker wymaga współdzielonego cache (CACHE_URL), a pod uvicornem także
+brokera zdarzeń (EXPENSE_EVENTS_REDIS_URL) – inaczej gunicorn odmawia startu (zob.
+api_app.checks). GUNICORN_ALLOW_LOCAL_CACHE=1 wyłącza tę blokadę – tylko do
+benchmarków na jednym hoście, nigdy w produkcji.
+"""
+
+import math
+import multiprocessing
+import os
+
+WORKER_CLASSES = {
+    'sync': 'sync',
+    'gthread': 'gthread',
+    'uvicorn': 'uvicorn.workers.UvicornWorker',
+}
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def available_cpus():
+    """Liczba CPU dostępnych dla procesu: limit cgroup v2 (cpu.max) albo przypisane rdzenie."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = multiprocessing.cpu_count()
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as quota_file:
+            quota, period = quota_file.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def autotune(worker_model, cpus):
+    """Domyślna liczba (procesów, wątków) dla modelu workerów i liczby CPU."""
+    if worker_model == 'gthread':
+        # Wątki obsługują oczekiwanie na I/O, procesy – równoległość mimo GIL.
+        return cpus + 1, 4
+    return 2 * cpus + 1, 1
+
+
+worker_model = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_model not in WORKER_CLASSES:
+    raise RuntimeError(f"GUNICORN_WORKER_CLASS musi być jednym z: {', '.join(WORKER_CLASSES)}.")
+worker_class = WORKER_CLASSES[worker_model]
+wsgi_app = 'myproject.asgi:application' if worker_model == 'uvicorn' else 'myproject.wsgi:application'
+
+_default_workers, _default_threads = autotune(worker_model, available_cpus())
+workers = min(_env_int('GUNICORN_WORKERS', _default_workers), _env_int('GUNICORN_MAX_WORKERS', 16))
+# Gunicorn z threads > 1 sam zamienia sync na gthread – wątki tylko dla gthread.
+threads = _env_int('GUNICORN_THREADS', _default_threads) if worker_model == 'gthread' else 1
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+timeout = _env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10)
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() not in ('0', 'false', 'no')
+
+# Plik bicia serca workerów w pamięci – na overlayfs kontenera zapis bywa blokowany.
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+access_log_format = '%(t)s "%(r)s" %(s)s %(b)s in %(L)s'
+
+
+def on_starting(server):
+    # Przy preload_app ustawienia są już wczytane; bez niego wczytujemy je tutaj.
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
+    from api_app.checks import process_local_state
+
+    problems = process_local_state(serves_events=worker_model == 'uvicorn')
+    if workers > 1 and problems and os.environ.get('GUNICORN_ALLOW_LOCAL_CACHE') != '1':
+        raise SystemExit(
+            f"Odmowa startu {workers} workerów – stan nie jest współdzielony: {'; '.join(problems)}. "
+            "Ustaw Redis albo GUNICORN_WORKERS=1."
+        )
+
+
+def when_ready(server):
+    server.log.info("Model workerów: %s, procesy: %d, wątki: %d, max_requests: %d (+0..%d)",
+                    worker_model, workers, threads, max_requests, max_requests_jitter)
+
+
+def post_fork(server, worker):
+    # Połączenia otwarte w procesie głównym (preload_app) nie mogą być współdzielone
+    # między procesami – każdy worker otwiera własne przy pierwszym zapytaniu.
+    from django.apps import apps
+
+    if not apps.ready:
+        return
+    from django.core.cache import caches
+    from django.db import connections
+
+    connections.close_all()
+    for cache in caches.all(initialized_only=True):
+        cache.close()
+
+
+def worker_exit(server, worker):
+    # Restart po max_requests albo zamknięcie: zapisujemy bufor dziennika moderatorów.
+    from django.apps import apps
+
+    if apps.ready:
+        from api_app.audit import audit_buffer
+
+        audit_buffer.shutdown()
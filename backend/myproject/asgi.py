@@ -3,6 +3,11 @@ ASGI config for myproject project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Strumień zmian wydatków (/api/expenses/events/) działa tylko pod ASGI – otwarte
+połączenie SSE to wtedy uśpiona korutyna, a nie zajęty wątek workera, np.:
+
+    gunicorn myproject.asgi:application -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -0,0 +1,204 @@
+"""
+Adapter AWS Lambda (API Gateway -> WSGI) dla projektu.
+
+Django jest inicjalizowane raz, przy imporcie modułu (zimny start kontenera).
+Kolejne wywołania w tym samym kontenerze (ciepłe) korzystają z gotowej aplikacji
+WSGI, połączenia z bazą danych (przy DB_CONN_MAX_AGE > 0), katalogu kategorii
+w cache oraz przygotowanego klucza weryfikującego JWT.
+
+Obsługiwane są zdarzenia API Gateway REST API (format 1.0) oraz HTTP API (format 2.0).
+Do odpowiedzi dodawane są nagłówki X-Cold-Start i Server-Timing z czasami
+inicjalizacji i obsługi wywołania.
+
+Konfiguracja funkcji Lambda: handler = myproject.lambda_handler.handler
+"""
+
+import base64
+import io
+import logging
+import os
+import sys
+import time
+from urllib.parse import urlencode
+
+_init_started = time.perf_counter()
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
+
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
+application = get_wsgi_application()
+
+logger = logging.getLogger(__name__)
+
+TEXT_CONTENT_TYPES = ('text/', 'application/json', 'application/javascript', 'application/xml')
+
+
+def _warm_up():
+    """
+    Przygotowuje zasoby współdzielone przez kolejne wywołania w kontenerze:
+    URLconf wraz z modułami widoków, klucze JWT (cached_property w TokenBackend),
+    katalog kategorii i połączenie z bazą danych.
+
+    Faza init Lambdy jest tańsza od pierwszego żądania, więc leniwe widoki są
+    tu importowane z wyprzedzeniem (LAMBDA_PRELOAD_VIEWS=0 wyłącza to zachowanie).
+    """
+    from django.db import connection
+    from django.urls import get_resolver
+    from rest_framework_simplejwt.state import token_backend
+
+    from myproject.lazy_views import preload_lazy_views
+
+    patterns = get_resolver().url_patterns
+    if os.environ.get('LAMBDA_PRELOAD_VIEWS', '1') != '0':
+        preload_lazy_views(patterns)
+    token_backend.prepared_signing_key
+    token_backend.prepared_verifying_key
+    try:
+        from api_app.catalogue import get_category_catalogue
+
+        get_category_catalogue()
+    except Exception:
+        # Brak bazy przy inicjalizacji nie może blokować startu – katalog
+        # zostanie załadowany przy pierwszym żądaniu.
+        logger.exception("Nie udało się wstępnie załadować katalogu kategorii.")
+    finally:
+        if not connection.settings_dict.get('CONN_MAX_AGE'):
+            connection.close()
+
+
+_warm_up()
+
+INIT_DURATION_MS = (time.perf_counter() - _init_started) * 1000
+_invocation_count = 0
+
+
+def _event_to_environ(event):
+    """Buduje słownik środowiska WSGI na podstawie zdarzenia API Gateway (1.0 lub 2.0)."""
+    headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+    for name, values in (event.get('multiValueHeaders') or {}).items():
+        if values:
+            # Powtórzone nagłówki łączymy przecinkiem (RFC 9110), ale Cookie – średnikiem
+            # (RFC 6265), jak `cookies` w formacie 2.0 poniżej.
+            separator = '; ' if name.lower() == 'cookie' else ','
+            headers[name.lower()] = separator.join(values)
+
+    if event.get('version') == '2.0':
+        http = event['requestContext']['http']
+        method = http['method']
+        path = event.get('rawPath') or http.get('path', '/')
+        query_string = event.get('rawQueryString', '')
+        source_ip = http.get('sourceIp', '')
+        if event.get('cookies'):
+            headers['cookie'] = '; '.join(event['cookies'])
+    else:
+        method = event['httpMethod']
+        path = event.get('path', '/')
+        multi = event.get('multiValueQueryStringParameters')
+        if multi:
+            query_string = urlencode([(k, v) for k, values in multi.items() for v in values])
+        else:
+            query_string = urlencode(event.get('queryStringParameters') or {})
+        source_ip = (event.get('requestContext') or {}).get('identity', {}).get('sourceIp', '')
+
+    body = event.get('body') or ''
+    if event.get('isBase64Encoded'):
+        body = base64.b64decode(body)
+    elif isinstance(body, str):
+        body = body.encode('utf-8')
+
+    host = headers.get('host', 'localhost')
+    environ = {
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': path,
+        'QUERY_STRING': query_string,
+        'SERVER_NAME': host.split(':')[0],
+        'SERVER_PORT': headers.get('x-forwarded-port', '443'),
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': source_ip,
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': headers.get('x-forwarded-proto', 'https'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in headers.items():
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'content-length':
+            environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return environ
+
+
+def _encode_body(body, content_type):
+    """Zwraca (treść, czy_base64) – treści tekstowe są przekazywane bez kodowania."""
+    if not body:
+        return '', False
+    if content_type.startswith(TEXT_CONTENT_TYPES):
+        try:
+            return body.decode('utf-8'), False
+        except UnicodeDecodeError:
+            pass
+    return base64.b64encode(body).decode('ascii'), True
+
+
+def handler(event, context=None):
+    """
+    Punkt wejścia AWS Lambda.
+
+    Przekazuje zdarzenie do aplikacji WSGI i zwraca odpowiedź w formacie
+    oczekiwanym przez API Gateway (odpowiednio 1.0 lub 2.0).
+    """
+    global _invocation_count
+    _invocation_count += 1
+    cold = _invocation_count == 1
+    started = time.perf_counter()
+
+    captured = {}
+
+    def start_response(status, response_headers, exc_info=None):
+        captured['status'] = int(status.split(' ', 1)[0])
+        captured['headers'] = response_headers
+
+    result = application(_event_to_environ(event), start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+
+    duration_ms = (time.perf_counter() - started) * 1000
+    timing = f'app;dur={duration_ms:.2f}'
+    if cold:
+        timing = f'init;dur={INIT_DURATION_MS:.2f}, ' + timing
+
+    headers, cookies = {}, []
+    for name, value in captured['headers']:
+        if name.lower() == 'set-cookie':
+            cookies.append(value)
+        else:
+            headers[name] = value
+    headers['X-Cold-Start'] = '1' if cold else '0'
+    headers['Server-Timing'] = timing
+
+    logger.info(
+        "lambda invocation=%d cold=%s init_ms=%.2f duration_ms=%.2f status=%d",
+        _invocation_count, cold, INIT_DURATION_MS if cold else 0.0, duration_ms, captured['status'],
+    )
+
+    body, is_base64 = _encode_body(body, headers.get('Content-Type', ''))
+    response = {
+        'statusCode': captured['status'],
+        'headers': headers,
+        'body': body,
+        'isBase64Encoded': is_base64,
+    }
+    if event.get('version') == '2.0':
+        response['cookies'] = cookies
+    elif cookies:
+        response['multiValueHeaders'] = {'Set-Cookie': cookies}
+    return response
@@ -0,0 +1,88 @@
+"""
+Leniwe ładowanie widoków dla URLconf.
+
+Moduły widoków (a wraz z nimi DRF, SimpleJWT i serializery) są importowane
+dopiero przy pierwszym żądaniu trafiającym do danego widoku, a nie przy
+imporcie `myproject.urls`. Skraca to zimny start (np. na AWS Lambda), gdy
+kontener obsługuje tylko część endpointów.
+"""
+
+from asgiref.sync import markcoroutinefunction
+
+from django.utils.module_loading import import_string
+
+
+class LazyView:
+    """
+    Widok importujący `dotted_path` przy pierwszym wywołaniu (zob. lazy_view).
+
+    Atrybuty `cls` i `initkwargs`, które DRF ustawia na widoku z `as_view()`
+    (generowanie schematu, `resolve(...).func.cls`), są właściwościami – ich
+    odczyt importuje widok. Celowo nie ma tu `view_class`: Django czyta go przy
+    budowaniu resolvera (URLPattern.lookup_str), co zaimportowałoby wszystkie widoki.
+    """
+
+    def __init__(self, dotted_path, csrf_exempt):
+        self.dotted_path = dotted_path
+        self.__module__, self.__name__ = dotted_path.rsplit('.', 1)
+        self.__qualname__ = self.__name__
+        self.csrf_exempt = csrf_exempt
+        self._resolved = None
+
+    def preload(self):
+        if self._resolved is None:
+            target = import_string(self.dotted_path)
+            self._resolved = target.as_view() if isinstance(target, type) else target
+        return self._resolved
+
+    @property
+    def cls(self):
+        return getattr(self.preload(), 'cls', None)
+
+    @property
+    def initkwargs(self):
+        return getattr(self.preload(), 'initkwargs', None)
+
+    def __call__(self, request, *args, **kwargs):
+        return self.preload()(request, *args, **kwargs)
+
+    def __repr__(self):
+        return f'<LazyView {self.dotted_path}>'
+
+
+class AsyncLazyView(LazyView):
+    """LazyView dla widoków `async def` – Django musi wiedzieć o tym przed importem."""
+
+    def __init__(self, dotted_path, csrf_exempt):
+        super().__init__(dotted_path, csrf_exempt)
+        markcoroutinefunction(self)
+
+    async def __call__(self, request, *args, **kwargs):
+        return await self.preload()(request, *args, **kwargs)
+
+
+def lazy_view(dotted_path, csrf_exempt=True, is_async=False):
+    """
+    Zwraca widok, który importuje `dotted_path` przy pierwszym wywołaniu.
+
+    Dla klas (APIView) wywoływane jest `as_view()`. Parametr `csrf_exempt`
+    odwzorowuje atrybut, który `APIView.as_view()` ustawia na prawdziwym
+    widoku – CsrfViewMiddleware sprawdza go, zanim widok zostanie zaimportowany.
+    Dla zwykłych widoków funkcyjnych należy przekazać csrf_exempt=False, a dla
+    widoków `async def` – is_async=True (Django musi wiedzieć o tym przed importem).
+    """
+    return (AsyncLazyView if is_async else LazyView)(dotted_path, csrf_exempt)
+
+
+def preload_lazy_views(patterns):
+    """
+    Importuje z wyprzedzeniem wszystkie leniwe widoki z listy wzorców URL.
+
+    Przydatne tam, gdzie faza inicjalizacji jest tańsza niż pierwsze żądanie
+    (np. init kontenera AWS Lambda).
+    """
+    for pattern in patterns:
+        if hasattr(pattern, 'url_patterns'):
+            preload_lazy_views(pattern.url_patterns)
+        elif hasattr(pattern.callback, 'preload'):
+            pattern.callback.preload()
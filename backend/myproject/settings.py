@@ -41,6 +41,7 @@ CORS_ALLOW_HEADERS = [
     "content-type",
     "authorization",
     "x-csrftoken",
+    "idempotency-key",
 ]
 
 """
@@ -65,19 +66,62 @@ INSTALLED_APPS = [
 
 """
 Lista middleware.
-Django-csp oraz corsheaders umieszczone są na początku, aby odpowiednio ustawić nagłówki CSP i CORS.
-"""
+Profilowanie żądań jest pierwsze (obejmuje pozostałe middleware), kompresja odpowiedzi
+zaraz po nim (działa na gotowej treści), a corsheaders dalej, aby odpowiednio ustawić
+nagłówki CORS.
+Endpointy pod API_PATH_PREFIX (JSON, uwierzytelnianie JWT w DRF) przechodzą tylko przez
+MIDDLEWARE; sesje, uwierzytelnianie sesyjne, wiadomości i CSP (NON_API_MIDDLEWARE) działają
+wyłącznie dla pozostałych ścieżek (np. panelu admina) przez api_app.middleware.NonApiMiddleware.
+Koszt obu konfiguracji mierzy polecenie `bench_middleware`.
+"""
+API_PATH_PREFIX = '/api/'
 MIDDLEWARE = [
-    'csp.middleware.CSPMiddleware',
+    'api_app.middleware.ProfilingMiddleware',
+    'api_app.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'api_app.middleware.NonApiMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api_app.middleware.ReplicaStickinessMiddleware',
+]
+NON_API_MIDDLEWARE = [
+    'csp.middleware.CSPMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+# Panel admina dostaje sesje, uwierzytelnianie i wiadomości przez NonApiMiddleware,
+# czego kontrole admin.E408–E410 (szukające ich bezpośrednio w MIDDLEWARE) nie widzą.
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
+
+"""
+Profilowanie żądań (api_app.middleware.ProfilingMiddleware, api_app.profiling).
+Domyślnie wyłączone: PROFILING_SAMPLE_RATE to ułamek żądań do API profilowanych losowo
+(np. 0.001). Moderator lub staff może zażądać profilu pojedynczego żądania nagłówkiem
+PROFILING_HEADER. Profile (stosy w formacie collapsed + oś czasu SQL) trafiają do
+PROFILING_DIR; trzymanych jest najwyżej PROFILING_MAX_CAPTURES najnowszych. Przegląda
+je polecenie `request_profiles`.
+"""
+PROFILING_SAMPLE_RATE = env.float('PROFILING_SAMPLE_RATE', default=0.0)
+PROFILING_HEADER = 'X-Profile'
+PROFILING_INTERVAL_MS = env.float('PROFILING_INTERVAL_MS', default=5.0)
+PROFILING_DIR = env('PROFILING_DIR', default=os.path.join(BASE_DIR, 'profiles'))
+PROFILING_MAX_CAPTURES = env.int('PROFILING_MAX_CAPTURES', default=200)
+
+"""
+Kompresja odpowiedzi (api_app.middleware.CompressionMiddleware).
+Negocjowane są zstd i brotli (po zainstalowaniu pakietów `zstandard` i `brotli`) oraz gzip.
+Odpowiedzi mniejsze niż COMPRESSION_MIN_SIZE bajtów nie są kompresowane. Ścieżki z sekretami
+w treści (COMPRESSION_EXCLUDE_PATHS) nie są kompresowane ze względu na atak BREACH.
+Koszt i zysk poziomów kompresji mierzy polecenie `bench_compression`.
+"""
+COMPRESSION_MIN_SIZE = env.int('COMPRESSION_MIN_SIZE', default=1024)
+COMPRESSION_GZIP_LEVEL = env.int('COMPRESSION_GZIP_LEVEL', default=6)
+COMPRESSION_BROTLI_LEVEL = env.int('COMPRESSION_BROTLI_LEVEL', default=4)
+COMPRESSION_ZSTD_LEVEL = env.int('COMPRESSION_ZSTD_LEVEL', default=3)
+COMPRESSION_EXCLUDE_PATHS = ['/api/get-csrf-token/']
 
 """
 Konfiguracja Django REST Framework.
@@ -92,7 +136,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.ScopedRateThrottle',
+        'api_app.throttling.ScopedSlidingWindowThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon':         '20/min',
@@ -140,6 +184,7 @@ WSGI_APPLICATION = 'myproject.wsgi.application'
 Konfiguracja bazy danych.
 Dane połączenia są pobierane z pliku .env.
 W produkcji upewnij się, że baza danych jest odpowiednio zabezpieczona i skonfigurowana.
+DB_CONN_MAX_AGE > 0 utrzymuje połączenie między żądaniami (np. w ciepłym kontenerze AWS Lambda).
 """
 DATABASES = {
     'default': {
@@ -149,10 +194,160 @@ DATABASES = {
         'PASSWORD': env('DB_PASSWORD'),
         'HOST': env('DB_HOST'),
         'PORT': env('DB_PORT'),
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=0),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
+
+"""
+Repliki bazy danych do odczytu (opcjonalne).
+DB_REPLICAS to lista (oddzielona przecinkami) hostów replik – pozostałe parametry
+połączenia są takie jak dla bazy głównej. Dla SQLite (lokalnie) podaje się ścieżki
+plików, np. kopię pliku bazy głównej. Bezpieczne odczyty trafiają do replik, zapisy
+do bazy głównej; użytkownik, który zapisał dane, przez REPLICA_STICKY_SECONDS sekund
+czyta z bazy głównej na wszystkich urządzeniach (pin w cache; bez zalogowania lub przy
+cache w pamięci procesu – ciasteczko; api_app.db_routers, api_app.middleware).
+"""
+DB_REPLICAS = env.list('DB_REPLICAS', default=[])
+_LOCATION_SETTING = 'NAME' if DATABASES['default']['ENGINE'].endswith('sqlite3') else 'HOST'
+for _index, _location in enumerate(DB_REPLICAS, start=1):
+    DATABASES[f'replica_{_index}'] = {
+        **DATABASES['default'],
+        _LOCATION_SETTING: _location,
+        'TEST': {'MIRROR': 'default'},
+    }
+REPLICA_STICKY_SECONDS = env.int('REPLICA_STICKY_SECONDS', default=5)
+
+"""
+Sharding wydatków per użytkownik (opcjonalny).
+EXPENSE_SHARDS to lista (oddzielona przecinkami) hostów MySQL lub – lokalnie – ścieżek
+plików SQLite; powstają z nich aliasy 'shard_1', 'shard_2', … Wydatki użytkownika trafiają
+do jednego shardu (mapa w tabeli UserShard, zob. api_app.sharding), użytkownicy i kategorie
+zostają w bazie głównej. Każdy shard migruje się osobno (prepare_db robi to automatycznie),
+a przy kilku instancjach aplikacji wymagany jest współdzielony cache (CACHE_URL).
+Bez EXPENSE_SHARDS wydatki są w bazie 'default' jak dotąd, z ograniczeniami kluczy obcych.
+Z shardami klucze obce do użytkowników i kategorii są bez ograniczeń (spójność pilnują
+sygnały i `check_shard_integrity`); tabele już istniejące w 'default' je zachowują,
+a dane przenosi do shardów `rebalance_expense_shards`.
+"""
+EXPENSE_SHARDS = env.list('EXPENSE_SHARDS', default=[])
+for _index, _location in enumerate(EXPENSE_SHARDS, start=1):
+    DATABASES[f'shard_{_index}'] = {**DATABASES['default'], _LOCATION_SETTING: _location}
+    if DATABASES['default']['ENGINE'].endswith('mysql'):
+        # Początkowa migracja tworzy klucze obce do tabel, których w shardzie nie ma;
+        # kolejna je usuwa (db_constraint=False).
+        DATABASES[f'shard_{_index}']['OPTIONS'] = {'init_command': 'SET foreign_key_checks = 0'}
+DATABASE_ROUTERS = [
+    'api_app.db_routers.UserShardRouter',
+    'api_app.db_routers.PrimaryReplicaRouter',
+]
+
+"""
+Archiwum i partycjonowanie wydatków.
+Wydatki starsze niż EXPENSE_ARCHIVE_MONTHS pełnych miesięcy są przenoszone poleceniem
+`archive_expenses` do zwartej tabeli archiwum wraz z sumami miesięcznymi (minimum 1 –
+bieżący miesiąc zawsze zostaje w tabeli Expense). W MySQL tabela Expense jest
+partycjonowana miesięcznie po dacie; `maintain_expense_partitions` (uruchamiane też
+przez prepare_db) tworzy partycje na EXPENSE_PARTITION_MONTHS_AHEAD miesięcy naprzód
+i usuwa puste partycje sprzed horyzontu archiwum.
+"""
+EXPENSE_ARCHIVE_MONTHS = max(1, env.int('EXPENSE_ARCHIVE_MONTHS', default=24))
+EXPENSE_PARTITION_MONTHS_AHEAD = env.int('EXPENSE_PARTITION_MONTHS_AHEAD', default=3)
 FRONTEND_URL = env('FRONTEND_URL')
 
+"""
+Widok startowy panelu (/api/dashboard/).
+Liczba najnowszych wydatków zwracanych razem z kategoriami i podsumowaniem;
+starsze wydatki frontend pobiera z /api/expenses/ na żądanie użytkownika.
+"""
+DASHBOARD_EXPENSES_PAGE_SIZE = env.int('DASHBOARD_EXPENSES_PAGE_SIZE', default=50)
+
+"""
+Analiza wydatków (/api/expenses/analytics/, api_app.analytics).
+EXPENSE_ANALYTICS_DAYS to liczba ostatnich dni z dziennymi sumami i średnimi kroczącymi
+(i okno, z którego zgłaszane są wydatki odstające); EXPENSE_ANALYTICS_MONTHS to liczba
+miesięcy w zestawieniu kategorii miesiąc do miesiąca. Wynik jest trzymany w cache do
+zapisu wydatku, najwyżej EXPENSE_ANALYTICS_CACHE_TTL sekund; przy cache w pamięci
+procesu (zmiana wersji nie dociera do innych workerów) – EXPENSE_ANALYTICS_LOCAL_CACHE_TTL.
+"""
+EXPENSE_ANALYTICS_DAYS = env.int('EXPENSE_ANALYTICS_DAYS', default=90)
+EXPENSE_ANALYTICS_MONTHS = env.int('EXPENSE_ANALYTICS_MONTHS', default=12)
+EXPENSE_ANALYTICS_CACHE_TTL = env.int('EXPENSE_ANALYTICS_CACHE_TTL', default=24 * 60 * 60)
+EXPENSE_ANALYTICS_LOCAL_CACHE_TTL = env.int('EXPENSE_ANALYTICS_LOCAL_CACHE_TTL', default=30)
+
+"""
+Limity wydatków w kategoriach (/api/budgets/, api_app.budgets).
+Progi w procentach limitu, po których przekroczeniu w bieżącym miesiącu użytkownik
+dostaje powiadomienie (kolejka BudgetAlert, wysyłka: polecenie `send_budget_alerts`).
+"""
+CATEGORY_BUDGET_THRESHOLDS = sorted(env.list('CATEGORY_BUDGET_THRESHOLDS', cast=int, default=[80, 100]))
+
+"""
+Strumień zmian wydatków (SSE, /api/expenses/events/, tylko pod ASGI – myproject.asgi).
+Bez EXPENSE_EVENTS_REDIS_URL zdarzenia krążą w pamięci procesu (testy, dev); w produkcji
+ustaw adres Redis (np. redis://redis:6379/1), aby strumienie widziały zmiany z każdego
+workera. EXPENSE_EVENTS_HISTORY to liczba ostatnich zdarzeń użytkownika trzymanych
+do wznawiania strumienia (Last-Event-ID).
+"""
+EXPENSE_EVENTS_REDIS_URL = env('EXPENSE_EVENTS_REDIS_URL', default='')
+EXPENSE_EVENTS_HISTORY = env.int('EXPENSE_EVENTS_HISTORY', default=100)
+EXPENSE_EVENTS_HEARTBEAT_SECONDS = env.int('EXPENSE_EVENTS_HEARTBEAT_SECONDS', default=15)
+
+"""
+Nagłówek Idempotency-Key w zapisach wydatków (api_app.idempotency).
+Klucz i pierwsza odpowiedź są trzymane w tabeli IdempotencyKey przez IDEMPOTENCY_KEY_TTL
+sekund (prune_idempotency_keys); klucz żądania, które nie skończyło się w ciągu
+IDEMPOTENCY_LOCK_TIMEOUT sekund, może przejąć ponowienie, a duplikat żądania w toku
+dostaje od razu 409 z Retry-After.
+"""
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', default=24 * 60 * 60)
+IDEMPOTENCY_LOCK_TIMEOUT = env.int('IDEMPOTENCY_LOCK_TIMEOUT', default=10)
+
+"""
+Dziennik działań moderatorów (api_app.audit, /api/moderator/audit/ dla superużytkowników).
+Zdarzenia są buforowane w pamięci procesu i zapisywane partiami po AUDIT_BATCH_SIZE
+albo co AUDIT_FLUSH_INTERVAL sekund; bufor mieści najwyżej AUDIT_BUFFER_SIZE zdarzeń
+(nadmiarowe są pomijane z ostrzeżeniem w logu). AUDIT_LOG_ENABLED=False wyłącza dziennik.
+"""
+AUDIT_LOG_ENABLED = env.bool('AUDIT_LOG_ENABLED', default=True)
+AUDIT_BATCH_SIZE = env.int('AUDIT_BATCH_SIZE', default=200)
+AUDIT_FLUSH_INTERVAL = env.float('AUDIT_FLUSH_INTERVAL', default=5)
+AUDIT_BUFFER_SIZE = env.int('AUDIT_BUFFER_SIZE', default=10000)
+AUDIT_PAGE_SIZE = env.int('AUDIT_PAGE_SIZE', default=100)
+
+"""
+Unieważnianie refresh tokenów JWT (rotacja i wylogowanie, zob. api_app.revocation).
+Sprawdzenie poprzedza filtr Blooma w pamięci procesu na REVOCATION_FILTER_CAPACITY
+tokenów z odsetkiem fałszywych trafień REVOCATION_FILTER_ERROR_RATE (trafienie
+rozstrzyga zapytanie do bazy). Filtr pobiera nowe unieważnienia z dziennika w cache
+co REVOCATION_SYNC_INTERVAL sekund (tyle najwyżej trwa, zanim token unieważniony
+w innym procesie zostanie odrzucony), a buduje się od nowa z bazy co
+REVOCATION_FILTER_REBUILD_INTERVAL sekund albo gdy zaległość przekroczy
+REVOCATION_SYNC_BATCH wpisów. Wpisy dziennika wygasają po REVOCATION_LOG_TTL sekundach.
+Wygasłe wpisy z bazy usuwa polecenie `prune_revoked_tokens`. Dziennik wymaga
+współdzielonego cache (CACHE_URL) – przy cache w pamięci procesu inne workery widzą
+unieważnienie dopiero po REVOCATION_FILTER_REBUILD_INTERVAL, więc gunicorn.conf.py
+odmawia wtedy startu kilku workerów.
+"""
+REVOCATION_FILTER_CAPACITY = env.int('REVOCATION_FILTER_CAPACITY', default=100_000)
+REVOCATION_FILTER_ERROR_RATE = env.float('REVOCATION_FILTER_ERROR_RATE', default=0.001)
+REVOCATION_SYNC_INTERVAL = env.float('REVOCATION_SYNC_INTERVAL', default=5)
+REVOCATION_FILTER_REBUILD_INTERVAL = env.float('REVOCATION_FILTER_REBUILD_INTERVAL', default=60 * 60)
+REVOCATION_SYNC_BATCH = env.int('REVOCATION_SYNC_BATCH', default=5000)
+REVOCATION_LOG_TTL = env.int('REVOCATION_LOG_TTL', default=60 * 60)
+
+"""
+Konfiguracja cache.
+Domyślnie używany jest cache w pamięci procesu (locmem) – tylko dla jednego procesu
+(dev, runserver). Przy kilku workerach lub instancjach CACHE_URL musi wskazywać
+współdzielony cache (docker-compose: redis://redis:6379/0): korzystają z niego limity
+zapytań, aktywacja kont, idempotencja, dziennik unieważnień tokenów i wersje cache.
+gunicorn.conf.py nie uruchomi kilku workerów na locmem (zob. api_app.checks).
+"""
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 """
 Walidatory haseł.
 Wymagania dotyczące haseł są ustawione, aby zwiększyć bezpieczeństwo użytkowników.
@@ -176,6 +371,32 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+"""
+Hashowanie haseł.
+PASSWORD_HASHER wybiera preferowany algorytm ('pbkdf2' lub 'argon2'); pozostałe
+hashery służą do weryfikacji istniejących skrótów, które są przeliczane do
+preferowanego algorytmu i parametrów przy najbliższym poprawnym logowaniu.
+Koszt jest strojony przez PBKDF2_ITERATIONS oraz ARGON2_TIME_COST,
+ARGON2_MEMORY_COST (KiB) i ARGON2_PARALLELISM.
+Skróty liczone są w puli PASSWORD_HASH_WORKERS wątków z kolejką PASSWORD_HASH_QUEUE;
+po PASSWORD_HASH_QUEUE_TIMEOUT sekundach oczekiwania logowanie zwraca 503.
+"""
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'api_app.hashers.TunedPBKDF2PasswordHasher',
+    'argon2': 'api_app.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHER = env('PASSWORD_HASHER', default='pbkdf2')
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CHOICES.items() if name != PASSWORD_HASHER
+]
+PBKDF2_ITERATIONS = env.int('PBKDF2_ITERATIONS', default=870000)
+ARGON2_TIME_COST = env.int('ARGON2_TIME_COST', default=2)
+ARGON2_MEMORY_COST = env.int('ARGON2_MEMORY_COST', default=19456)
+ARGON2_PARALLELISM = env.int('ARGON2_PARALLELISM', default=1)
+PASSWORD_HASH_WORKERS = env.int('PASSWORD_HASH_WORKERS', default=2)
+PASSWORD_HASH_QUEUE = env.int('PASSWORD_HASH_QUEUE', default=8)
+PASSWORD_HASH_QUEUE_TIMEOUT = env.float('PASSWORD_HASH_QUEUE_TIMEOUT', default=2.0)
+
 """
 Konfiguracja internacjonalizacji.
 Dostosuj LANGUAGE_CODE i TIME_ZONE według potrzeb, szczególnie jeśli Twoi użytkownicy są z innego regionu.
@@ -281,3 +502,19 @@ CSP_CONNECT_SRC = ("'self'", "http://localhost:3000", "http://localhost:8000")
 Token resetowania hasła i aktywacji konta ważny przez 3 dni
 """
 PASSWORD_RESET_TIMEOUT = 259200
+
+"""
+Resetowanie hasła (django_rest_passwordreset).
+Tokeny wygasają po DJANGO_REST_MULTITOKENAUTH_RESET_TOKEN_EXPIRY_TIME godzinach i są usuwane
+okresowo poleceniem `prune_reset_tokens`. Wydawanie tokenów jest limitowane per adres e-mail:
+najwyżej PASSWORD_RESET_EMAIL_LIMIT żądań w oknie PASSWORD_RESET_EMAIL_WINDOW sekund.
+"""
+DJANGO_REST_MULTITOKENAUTH_RESET_TOKEN_EXPIRY_TIME = 24
+PASSWORD_RESET_EMAIL_LIMIT = env.int('PASSWORD_RESET_EMAIL_LIMIT', default=3)
+PASSWORD_RESET_EMAIL_WINDOW = env.int('PASSWORD_RESET_EMAIL_WINDOW', default=3600)
+
+"""
+Budżet zimnego startu (suma czasów importów w ms) dla polecenia `bench_startup`.
+Polecenie kończy się błędem, jeżeli mediana pomiarów przekroczy tę wartość.
+"""
+STARTUP_IMPORT_BUDGET_MS = env.float('STARTUP_IMPORT_BUDGET_MS', default=1500)
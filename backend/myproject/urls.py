@@ -1,37 +1,60 @@
 from django.urls import path, include
 
-# Importy widoków związanych z autoryzacją (plik auth.py)
-from api_app.views.auth import (get_csrf_token,CustomTokenObtainPairView,CustomTokenRefreshView,RegisterView,ActivateAccountView,LogoutView,IsLoggedInView,ResendActivationView)
+from .lazy_views import lazy_view
 
-# Importy widoków do obsługi wydatków i kategorii (plik expenses.py)
-from api_app.views.expenses import (CategoryListView,ExpenseListView,ExpenseDetailView)
+# Widoki są importowane leniwie (przy pierwszym żądaniu), aby import URLconf
+# nie ładował modułów widoków, DRF i SimpleJWT podczas zimnego startu.
+AUTH = 'api_app.views.auth'                # widoki autoryzacji (plik auth.py)
+EXPENSES = 'api_app.views.expenses'        # wydatki i kategorie (plik expenses.py)
+SUMMARY = 'api_app.views.summary'          # podsumowanie (plik summary.py)
+ANALYTICS = 'api_app.views.analytics'      # analiza i prognoza wydatków (plik analytics.py)
+MODERATOR = 'api_app.views.moderator'      # widoki moderatora (plik moderator.py)
+RECURRING = 'api_app.views.recurring'      # wydatki cykliczne (plik recurring.py)
+BUDGETS = 'api_app.views.budgets'          # limity wydatków w kategoriach (plik budgets.py)
+DASHBOARD = 'api_app.views.dashboard'      # widok startowy panelu (plik dashboard.py)
+EVENTS = 'api_app.views.events'            # strumień zmian wydatków SSE (plik events.py)
+PASSWORD_RESET = 'django_rest_passwordreset.views'
 
-# Import widoku podsumowania (plik summary.py)
-from api_app.views.summary import ExpenseSummaryView
+# Odpowiednik django_rest_passwordreset.urls z leniwym importem widoków.
+password_reset_patterns = [
+    path('validate_token/', lazy_view(f'{PASSWORD_RESET}.ResetPasswordValidateToken'), name='reset-password-validate'),
+    path('confirm/', lazy_view(f'{PASSWORD_RESET}.ResetPasswordConfirm'), name='reset-password-confirm'),
+    path('', lazy_view('api_app.views.password_reset.ResetPasswordRequestView'), name='reset-password-request'),
+]
 
-# Import widoków moderatora (plik moderator.py)
-from api_app.views.moderator import (ModeratorUserListView,ModeratorUserDetailView)
 urlpatterns = [
     # --- Endpointy autoryzacji i rejestracji ---
-    path('api/auth/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/auth/token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
-    path('api/auth/password_reset/', include('django_rest_passwordreset.urls', namespace='password_reset')),
-    path('api/register/', RegisterView.as_view(), name='register'),
-    path('api/activate/', ActivateAccountView.as_view(), name='activate_account'),
-    path('api/get-csrf-token/', get_csrf_token, name='get_csrf_token'),
-    path('api/logout/', LogoutView.as_view(), name='logout'),
-    path('api/is-logged-in/', IsLoggedInView.as_view(), name='is_logged_in'),
-    path('api/resend-activation/', ResendActivationView.as_view(), name='resend_activation'),
+    path('api/auth/token/', lazy_view(f'{AUTH}.CustomTokenObtainPairView'), name='token_obtain_pair'),
+    path('api/auth/token/refresh/', lazy_view(f'{AUTH}.CustomTokenRefreshView'), name='token_refresh'),
+    path('api/auth/password_reset/', include((password_reset_patterns, 'password_reset'))),
+    path('api/register/', lazy_view(f'{AUTH}.RegisterView'), name='register'),
+    path('api/activate/', lazy_view(f'{AUTH}.ActivateAccountView'), name='activate_account'),
+    path('api/get-csrf-token/', lazy_view(f'{AUTH}.get_csrf_token', csrf_exempt=False), name='get_csrf_token'),
+    path('api/logout/', lazy_view(f'{AUTH}.LogoutView'), name='logout'),
+    path('api/is-logged-in/', lazy_view(f'{AUTH}.IsLoggedInView'), name='is_logged_in'),
+    path('api/resend-activation/', lazy_view(f'{AUTH}.ResendActivationView'), name='resend_activation'),
 
     # --- Endpointy do wydatków i kategorii ---
-    path('api/categories/', CategoryListView.as_view(), name='category-list'),
-    path('api/expenses/', ExpenseListView.as_view(), name='expense-list'),
-    path('api/expenses/<int:pk>/', ExpenseDetailView.as_view(), name='expense-detail'),
+    path('api/categories/', lazy_view(f'{EXPENSES}.CategoryListView'), name='category-list'),
+    path('api/expenses/', lazy_view(f'{EXPENSES}.ExpenseListView'), name='expense-list'),
+    path('api/expenses/<int:pk>/', lazy_view(f'{EXPENSES}.ExpenseDetailView'), name='expense-detail'),
+    path('api/recurring-expenses/', lazy_view(f'{RECURRING}.RecurringExpenseListView'), name='recurring-expense-list'),
+    path('api/recurring-expenses/<int:pk>/', lazy_view(f'{RECURRING}.RecurringExpenseDetailView'), name='recurring-expense-detail'),
+    path('api/expenses/events/', lazy_view(f'{EVENTS}.expense_events', is_async=True), name='expense-events'),
 
     # --- Endpointy podsumowania wydatków ---
-    path('api/expenses/summary/', ExpenseSummaryView.as_view(), name='expense-summary'),
+    path('api/expenses/summary/', lazy_view(f'{SUMMARY}.ExpenseSummaryView'), name='expense-summary'),
+    path('api/expenses/analytics/', lazy_view(f'{ANALYTICS}.ExpenseAnalyticsView'), name='expense-analytics'),
+
+    # --- Endpointy limitów wydatków w kategoriach ---
+    path('api/budgets/', lazy_view(f'{BUDGETS}.BudgetListView'), name='budget-list'),
+    path('api/budgets/<int:category_id>/', lazy_view(f'{BUDGETS}.BudgetDetailView'), name='budget-detail'),
+
+    # --- Widok startowy panelu (auth, kategorie, podsumowanie i pierwsza strona wydatków) ---
+    path('api/dashboard/', lazy_view(f'{DASHBOARD}.DashboardView'), name='dashboard'),
 
     # --- Endpointy moderatora ---
-    path('api/moderator/users/', ModeratorUserListView.as_view(), name='moderator-users-list'),
-    path('api/moderator/users/<int:pk>/', ModeratorUserDetailView.as_view(), name='moderator-user-detail'),
+    path('api/moderator/users/', lazy_view(f'{MODERATOR}.ModeratorUserListView'), name='moderator-users-list'),
+    path('api/moderator/users/<int:pk>/', lazy_view(f'{MODERATOR}.ModeratorUserDetailView'), name='moderator-user-detail'),
+    path('api/moderator/audit/', lazy_view(f'{MODERATOR}.ModeratorAuditLogView'), name='moderator-audit-log'),
 ]
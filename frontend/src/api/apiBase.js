@@ -12,6 +12,7 @@ export const BASE_URL = 'http://localhost:8000/api';
  */
 export const commonEndpoints = {
   csrfToken: '/get-csrf-token/',
+  tokenRefresh: '/auth/token/refresh/',
 };
 
 /**
@@ -39,6 +40,7 @@ export function translateMessage(msg) {
  * Wykonuje zapytanie HTTP do API.
  * @param {string} endpoint - Endpoint API, który zostanie dołączony do BASE_URL.
  * @param {object} [options={}] - Opcjonalne opcje dla fetch, np. metoda, nagłówki, ciało, itp.
+ *   Żądania z nagłówkiem Idempotency-Key są ponawiane po błędzie sieci (`retries`, domyślnie 2).
  * @returns {Promise<Response>} Obiekt odpowiedzi z API.
  * @throws {Error} W przypadku niepowodzenia zapytania lub błędu sieciowego.
  */
@@ -62,7 +64,8 @@ export async function apiRequest(endpoint, options = {}) {
     clearTimeout(timer);
 
     // Obsługa 401 i próba odświeżenia tokena
-    if (response.status === 401 && endpoint !== commonEndpoints.isLoggedIn) {
+    if (response.status === 401 && endpoint !== commonEndpoints.isLoggedIn
+        && endpoint !== commonEndpoints.tokenRefresh) {
       const refreshed = await refreshAuthToken();
       if (refreshed) {
         return apiRequest(endpoint, options);
@@ -71,11 +74,27 @@ export async function apiRequest(endpoint, options = {}) {
   
     return response;
   } catch (error) {
+    clearTimeout(timer);
+    // Zapis z kluczem idempotencji można bezpiecznie ponowić – serwer nie wykona go dwa razy.
+    const retries = options.retries ?? 2;
+    if (mergedOptions.headers['Idempotency-Key'] && retries > 0) {
+      await new Promise(resolve => setTimeout(resolve, 500));
+      return apiRequest(endpoint, { ...options, retries: retries - 1 });
+    }
     console.error(`Błąd w apiRequest dla ${url}:`, error);
     throw error;
   }
 }
 
+/**
+ * Tworzy losowy klucz idempotencji dla jednej operacji zapisu.
+ * Ten sam klucz musi być wysyłany przy każdym ponowieniu tej operacji.
+ * @returns {string} Klucz do nagłówka Idempotency-Key.
+ */
+export function newIdempotencyKey() {
+  return crypto.randomUUID();
+}
+
 /**
  * Zapewnia, że token CSRF jest dostępny. Pobiera go z ciasteczek lub wykonuje zapytanie do API.
  * @returns {Promise<string>} Token CSRF.
@@ -96,14 +115,31 @@ export async function ensureCsrfToken() {
   }
 }
 
+/**
+ * Trwające odświeżenie tokena (wspólne dla równoległych żądań).
+ * @type {Promise<boolean>|null}
+ */
+let refreshInFlight = null;
+
 /**
  * Próbuje odświeżyć token uwierzytelniania.
+ * Równoległe wywołania czekają na jedno żądanie – refresh token jest po rotacji
+ * unieważniany, więc drugie odświeżenie tym samym tokenem zakończyłoby się 401.
  * @returns {Promise<boolean>} True, jeśli token został pomyślnie odświeżony, w przeciwnym razie false.
  */
-async function refreshAuthToken() {
+export function refreshAuthToken() {
+  if (!refreshInFlight) {
+    refreshInFlight = requestTokenRefresh().finally(() => {
+      refreshInFlight = null;
+    });
+  }
+  return refreshInFlight;
+}
+
+async function requestTokenRefresh() {
   try {
     const csrfToken = await ensureCsrfToken();
-    const response = await apiRequest('/auth/token/refresh/', {
+    const response = await apiRequest(commonEndpoints.tokenRefresh, {
       method: 'POST',
       headers: {
         'X-CSRFToken': csrfToken
@@ -0,0 +1,31 @@
+import { apiRequest } from './apiBase';
+
+/**
+ * Definicja endpointów widoku startowego panelu.
+ * @constant {object}
+ */
+const dashboardEndpoints = {
+  dashboard: '/dashboard/',
+};
+
+/**
+ * Pobiera w jednym żądaniu dane startowe panelu: stan zalogowania, kategorie,
+ * podsumowanie bieżącego miesiąca i pierwszą stronę wydatków.
+ * @returns {Promise<object>} Obiekt z polami auth, categories, summary, expenses, hasMoreExpenses
+ *   i expenseEvents (czy serwer obsługuje strumień zmian wydatków).
+ * @throws {Error} W przypadku błędu pobierania danych panelu.
+ */
+export async function getDashboard() {
+  try {
+    const response = await apiRequest(dashboardEndpoints.dashboard, {
+      method: 'GET',
+    });
+    if (!response.ok) {
+      throw new Error('Błąd pobierania danych panelu');
+    }
+    return await response.json();
+  } catch (error) {
+    console.error('Błąd w getDashboard:', error);
+    throw error;
+  }
+}
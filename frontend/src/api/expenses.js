@@ -1,4 +1,4 @@
-import { apiRequest, ensureCsrfToken } from './apiBase';
+import { apiRequest, ensureCsrfToken, refreshAuthToken, newIdempotencyKey, BASE_URL } from './apiBase';
 
 /**
  * Definicja endpointów związanych z wydatkami.
@@ -8,11 +8,19 @@ const expensesEndpoints = {
   categories: '/categories/',
   expenses: '/expenses/',
   expenseDetail: (id) => `/expenses/${id}/`,
+  events: '/expenses/events/',
 };
 
 /**
- * Pobiera listę kategorii.
- * @returns {Promise<object>} Odpowiedź serwera w formie obiektu JSON zawierającego listę kategorii.
+ * Typy zdarzeń strumienia zmian wydatków.
+ * @constant {string[]}
+ */
+const expenseEventTypes = ['created', 'updated', 'deleted', 'reset'];
+
+/**
+ * Pobiera drzewo kategorii.
+ * @returns {Promise<object[]>} Kategorie główne {id, name, children}, gdzie children to podkategorie
+ *   w tym samym formacie.
  * @throws {Error} W przypadku niepowodzenia pobierania kategorii.
  */
 export async function getCategories() {
@@ -82,7 +90,7 @@ export async function createExpense(expenseData) {
     const csrfToken = await ensureCsrfToken();
     const response = await apiRequest(expensesEndpoints.expenses, {
       method: 'POST',
-      headers: { 'X-CSRFToken': csrfToken },
+      headers: { 'X-CSRFToken': csrfToken, 'Idempotency-Key': newIdempotencyKey() },
       body: JSON.stringify(expenseData),
     });
     if (!response.ok) {
@@ -108,7 +116,7 @@ export async function updateExpense(expenseId, expenseData) {
     const csrfToken = await ensureCsrfToken();
     const response = await apiRequest(expensesEndpoints.expenseDetail(expenseId), {
       method: 'PUT',
-      headers: { 'X-CSRFToken': csrfToken },
+      headers: { 'X-CSRFToken': csrfToken, 'Idempotency-Key': newIdempotencyKey() },
       body: JSON.stringify(expenseData),
     });
     if (!response.ok) {
@@ -133,7 +141,7 @@ export async function deleteExpense(expenseId) {
     const csrfToken = await ensureCsrfToken();
     const response = await apiRequest(expensesEndpoints.expenseDetail(expenseId), {
       method: 'DELETE',
-      headers: { 'X-CSRFToken': csrfToken },
+      headers: { 'X-CSRFToken': csrfToken, 'Idempotency-Key': newIdempotencyKey() },
     });
     if (!response.ok) {
       throw new Error('Błąd przy usuwaniu wydatku');
@@ -144,3 +152,58 @@ export async function deleteExpense(expenseId) {
     throw error;
   }
 }
+
+/**
+ * Subskrybuje strumień zmian wydatków (Server-Sent Events).
+ * Otwieraj go tylko, gdy serwer go obsługuje (pole `expenseEvents` z getDashboard) – pod
+ * WSGI strumień kończy się błędem 501.
+ * Po zerwaniu połączenia przeglądarka wznawia strumień od ostatniego zdarzenia. Token jest
+ * odświeżany tylko po zdarzeniu `expired` (wygaśnięcie tokena dostępu) – zwykły błąd
+ * strumienia nie wie, czy chodzi o token, a każde odświeżenie rotuje refresh token. Gdy
+ * serwer odrzuci połączenie, strumień jest otwierany ponownie z rosnącym opóźnieniem,
+ * a po kilku nieudanych próbach z rzędu subskrypcja jest porzucana.
+ * @param {function(string, object): void} onEvent - Wywoływana z typem zdarzenia
+ *   ('created', 'updated', 'deleted' lub 'reset') i jego danymi.
+ * @returns {function(): void} Funkcja zamykająca strumień.
+ */
+export function subscribeExpenseEvents(onEvent) {
+  let source = null;
+  let closed = false;
+  let lastEventId = null;
+  let failures = 0;
+
+  const reopen = (delay) => {
+    source.close();
+    if (!closed) setTimeout(open, delay);
+  };
+
+  const open = () => {
+    if (closed) return;
+    const query = lastEventId ? `?lastEventId=${encodeURIComponent(lastEventId)}` : '';
+    source = new EventSource(BASE_URL + expensesEndpoints.events + query, { withCredentials: true });
+    source.onopen = () => { failures = 0; };
+    expenseEventTypes.forEach(type => source.addEventListener(type, (event) => {
+      if (event.lastEventId) lastEventId = event.lastEventId;
+      onEvent(type, JSON.parse(event.data));
+    }));
+    source.addEventListener('expired', async () => {
+      source.close();
+      if (await refreshAuthToken()) reopen(0);
+    });
+    source.onerror = () => {
+      if (source.readyState !== EventSource.CLOSED || closed) return;
+      failures += 1;
+      if (failures > 5) {
+        console.error('Strumień zmian wydatków jest niedostępny.');
+        return;
+      }
+      reopen(3000 * 2 ** (failures - 1));
+    };
+  };
+
+  open();
+  return () => {
+    closed = true;
+    if (source) source.close();
+  };
+}
@@ -10,12 +10,20 @@ const summaryEndpoints = {
 
 /**
  * Pobiera podsumowanie wydatków.
+ * @param {object} [options={}] - Opcje podsumowania.
+ * @param {boolean} [options.rollup] - Sumy zwinięte do kategorii nadrzędnych
+ *   ({id, category, parent, total, own_total}).
+ * @param {number} [options.category] - Tylko poddrzewo kategorii o tym ID (zwinięte jak przy rollup).
  * @returns {Promise<object>} Odpowiedź serwera zawierająca podsumowanie wydatków.
  * @throws {Error} W przypadku błędu pobierania podsumowania wydatków.
  */
-export async function getExpenseSummary() {
+export async function getExpenseSummary({ rollup = false, category = null } = {}) {
   try {
-    const response = await apiRequest(summaryEndpoints.expenseSummary, {
+    const params = new URLSearchParams();
+    if (category !== null) params.set('category', category);
+    else if (rollup) params.set('rollup', '1');
+    const query = params.toString() ? `?${params}` : '';
+    const response = await apiRequest(summaryEndpoints.expenseSummary + query, {
       method: 'GET',
     });
     if (!response.ok) {
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import * as yup from 'yup';
 import {
   Container,
@@ -37,9 +37,9 @@ import {
   createExpense,
   updateExpense,
   deleteExpense,
-  getCategories
+  subscribeExpenseEvents
 } from '../api/expenses';
-import { getExpenseSummary } from '../api/summary';
+import { getDashboard } from '../api/dashboard';
 import { logout } from '../api/auth';
 import { useNavigate } from 'react-router-dom';
 
@@ -83,6 +83,11 @@ export default function Dashboard() {
   const [summary, setSummary] = useState([]);
   const [categories, setCategories] = useState([]);
   const [loading, setLoading] = useState(true);
+  // Dashboard zwraca tylko pierwszą stronę wydatków; starsze pobierane są na żądanie.
+  const [hasMoreExpenses, setHasMoreExpenses] = useState(false);
+  const [showAllExpenses, setShowAllExpenses] = useState(false);
+  // Czy serwer obsługuje strumień zmian wydatków (tylko pod ASGI).
+  const [expenseEvents, setExpenseEvents] = useState(false);
 
   const [errorDialogOpen, setErrorDialogOpen] = useState(false);
   const [errorMessage, setErrorMessage] = useState('');
@@ -99,16 +104,27 @@ export default function Dashboard() {
 
   useEffect(() => { fetchAll(); }, []);
 
-  const fetchAll = async () => {
+  // Zmiany z innych urządzeń przychodzą strumieniem SSE – odświeżamy wtedy dane panelu.
+  const fetchAllRef = useRef(null);
+  useEffect(() => {
+    if (!expenseEvents) return undefined;
+    return subscribeExpenseEvents(() => fetchAllRef.current());
+  }, [expenseEvents]);
+
+  const fetchAll = async (allExpenses = showAllExpenses) => {
     try {
-      const [cats, exp, sum] = await Promise.all([
-        getCategories(),
-        getExpenses(),
-        getExpenseSummary()
-      ]);
-      setCategories(cats);
-      setExpenses(exp);
-      setSummary(sum);
+      // Jedno żądanie zamiast osobnych dla kategorii, wydatków i podsumowania.
+      const data = await getDashboard();
+      setCategories(data.categories);
+      setSummary(data.summary);
+      setExpenseEvents(Boolean(data.expenseEvents));
+      if (allExpenses && data.hasMoreExpenses) {
+        setExpenses(await getExpenses());
+        setHasMoreExpenses(false);
+      } else {
+        setExpenses(data.expenses);
+        setHasMoreExpenses(data.hasMoreExpenses);
+      }
     } catch {
       showError('Błąd ładowania danych');
     } finally {
@@ -116,6 +132,16 @@ export default function Dashboard() {
     }
   };
 
+  const loadAllExpenses = async () => {
+    try {
+      setExpenses(await getExpenses());
+      setHasMoreExpenses(false);
+      setShowAllExpenses(true);
+    } catch { showError('Błąd ładowania wydatków'); }
+  };
+
+  fetchAllRef.current = fetchAll;
+
   const showError = (msg) => { setErrorMessage(msg); setErrorDialogOpen(true); };
 
   const handleFieldChange = (e) => {
@@ -249,6 +275,11 @@ export default function Dashboard() {
                 </Box>
               ))}
             </List>
+            {hasMoreExpenses && (
+              <Box sx={{ display: 'flex', justifyContent: 'center' }}>
+                <Button variant="outlined" onClick={loadAllExpenses}>Pokaż starsze wydatki</Button>
+              </Box>
+            )}
           </Paper>
         </Box>
         <Box sx={{ flexBasis: '30%' }}>